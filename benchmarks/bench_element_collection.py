@@ -0,0 +1,49 @@
+"""Benchmarks for ``element_collection`` position lookups and edits.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_element_collection.py
+
+Per-stroke times should stay flat as the paragraph grows.
+"""
+import timeit
+
+from plover_cat.steno_objects import element_collection, stroke_text
+
+PARAGRAPH_SIZES = [100, 1000, 10000, 50000, 200000]
+STROKES = 1000
+
+
+def make_paragraph(size):
+    paragraph = element_collection([stroke_text(stroke = "-T", text = "the ") for i in range(size)])
+    # index lengths once, as for a paragraph already in the editor
+    len(paragraph)
+    return(paragraph)
+
+
+def stroke_lookups(size):
+    """Time position lookups done when writing one stroke at end of paragraph."""
+    paragraph = make_paragraph(size)
+    def one_stroke():
+        paragraph.append(stroke_text(stroke = "-T", text = "the "))
+        end_pos = len(paragraph)
+        paragraph.backtrack(end_pos, 2)
+        paragraph.stroke_pos_at_pos(end_pos - 1)
+        paragraph.func_pos(end_pos)
+    return(timeit.timeit(one_stroke, number = STROKES) / STROKES)
+
+
+def stroke_insert(size, number = 100, at_end = False):
+    """Time ``insert_steno`` of one stroke in the middle or at end of paragraph."""
+    paragraph = make_paragraph(size)
+    def one_stroke():
+        pos = len(paragraph) if at_end else len(paragraph) // 2 + 1
+        paragraph.insert_steno(pos, stroke_text(stroke = "-T", text = "the "))
+    return(timeit.timeit(one_stroke, number = number) / number)
+
+
+if __name__ == "__main__":
+    print("elements  us/stroke (lookups)  us/stroke (insert_steno)  us/stroke (insert_steno at end)")
+    for size in PARAGRAPH_SIZES:
+        print(f"{size:>8}  {stroke_lookups(size) * 1e6:19.2f}  {stroke_insert(size) * 1e6:23.2f}"
+              f"  {stroke_insert(size, STROKES, True) * 1e6:30.2f}")
@@ -0,0 +1,50 @@
+"""Benchmark for creating elements from transcript JSON.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_element_factory.py
+
+Compares ``gen_element`` on each element dict with ``gen_collection`` 
+on each paragraph, for a transcript of 10,000 paragraphs.
+"""
+import json
+import timeit
+
+from plover_cat.steno_objects import element_collection, element_factory
+
+PARAGRAPHS = 10000
+PER_PARAGRAPH = 20
+
+
+def make_document(paragraphs = PARAGRAPHS, per_paragraph = PER_PARAGRAPH):
+    """Return transcript dict, mostly strokes with a few other element types."""
+    document = {}
+    for par in range(paragraphs):
+        strokes = [{"data": " word%d" % i, "element": "stroke", 
+                    "time": "2023-08-09T10:%02d:%02d.%03d" % (par // 60 % 60, par % 60, i), 
+                    "stroke": "WORD%d" % i, "audiotime": ""} 
+                    for i in range(per_paragraph - 2)]
+        strokes.insert(0, {"data": "Q.", "element": "automatic", "time": "2023-08-09T10:00:00.000", 
+                            "stroke": "STKPWHR", "audiotime": "", "prefix": "", "suffix": "\t"})
+        strokes.append({"data": "\n", "element": "text", "time": "2023-08-09T10:00:00.000"})
+        document[str(par)] = {"strokes": strokes}
+    # round trip so dicts are like a loaded transcript
+    return(json.loads(json.dumps(document)))
+
+
+def per_element(document):
+    factory = element_factory()
+    return([element_collection([factory.gen_element(el) for el in par["strokes"]]) for par in document.values()])
+
+
+def per_paragraph(document):
+    factory = element_factory()
+    return([factory.gen_collection(par["strokes"]) for par in document.values()])
+
+
+if __name__ == "__main__":
+    document = make_document()
+    print(f"{PARAGRAPHS} paragraphs, {PARAGRAPHS * PER_PARAGRAPH} elements")
+    for method in [per_element, per_paragraph]:
+        seconds = min(timeit.repeat(lambda: method(document), number = 1, repeat = 5))
+        print(f"{method.__name__:>13}: {seconds * 1000:8.1f} ms")
@@ -0,0 +1,42 @@
+"""Memory used by elements of a large transcript.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_element_memory.py
+
+Reports bytes per element retained after loading, that is the element 
+objects and the strings they keep once the parsed JSON is dropped.
+"""
+import json
+import tracemalloc
+
+from plover_cat.steno_objects import element_factory
+
+STROKES = 200000
+
+
+def make_transcript(strokes = STROKES, per_paragraph = 50):
+    """Return JSON text of a transcript with ``strokes`` stroke elements."""
+    document = {}
+    for par in range(strokes // per_paragraph):
+        document[str(par)] = {"strokes": [{"data": " word%d" % (i % 500), "element": "stroke", 
+                                            "time": "2023-08-09T10:%02d:%02d.%03d" % (i // 60 % 60, i % 60, i % 1000), 
+                                            "stroke": "WORD%d" % (i % 500), "audiotime": ""} 
+                                            for i in range(per_paragraph)]}
+    return(json.dumps(document))
+
+
+def element_bytes(transcript_json):
+    factory = element_factory()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    document = json.loads(transcript_json)
+    elements = [factory.gen_element(el) for par in document.values() for el in par["strokes"]]
+    del document
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return((after - before) / len(elements))
+
+
+if __name__ == "__main__":
+    print(f"{STROKES} stroke elements: {element_bytes(make_transcript()):.1f} bytes/element")
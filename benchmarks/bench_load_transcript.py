@@ -0,0 +1,119 @@
+"""Benchmark for building the editor document when a transcript is opened.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_load_transcript.py
+
+Times opening a transcript of 5,000 paragraphs with the old loop, inserting
+each element and processing events after each paragraph, against the one edit
+build of ``load_transcript``, with every paragraph loaded and with only
+paragraphs near the end loaded.
+"""
+import os
+import random
+import timeit
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from plover_cat.constants import blockState
+from plover_cat.helpers import save_json, ms_to_timestamp
+from plover_cat.TextEditor import PloverCATEditor
+
+PARAGRAPHS = 5000
+PARAGRAPH_SIZE = 40
+WORDS = [("it ", "T"), ("was ", "WAS"), ("the ", "-T"), ("cat", "KAT"), ("s ", "-S"), ("hello ", "HEL/LOE"), ("world, ", "WORLD/KW-BG")]
+START = 1700000000000
+
+
+def make_document(paragraphs = PARAGRAPHS, size = PARAGRAPH_SIZE):
+    """Return transcript dict of paragraphs with stroke and text elements, ending in a new line."""
+    random.seed(paragraphs)
+    document = {}
+    time = START
+    for par in range(paragraphs):
+        strokes = []
+        for i in range(size):
+            time += random.randint(50, 900)
+            text, stroke = random.choice(WORDS)
+            if i % 10 == 9:
+                strokes.append({"data": text, "element": "text", "time": ms_to_timestamp(time)})
+            else:
+                strokes.append({"data": text, "element": "stroke", "time": ms_to_timestamp(time),
+                                "stroke": stroke, "audiotime": time - START})
+        strokes.append({"data": "\n", "element": "stroke", "time": ms_to_timestamp(time),
+                        "stroke": "R-R", "audiotime": time - START})
+        document[str(par)] = {"strokes": strokes, "style": "Normal", "creationtime": ms_to_timestamp(time),
+                              "edittime": ms_to_timestamp(time), "audiostarttime": strokes[0]["audiotime"]}
+    document[str(paragraphs - 1)]["strokes"].pop()
+    return(document)
+
+
+def make_editor(project):
+    editor = PloverCATEditor(None)
+    editor.file_name = project
+    editor.load_config_file(project)
+    editor.load_check_styles(project / editor.config["style"])
+    editor.get_highlight_colors()
+    editor.resize(800, 600)
+    return(editor)
+
+
+def per_paragraph_insert(editor, document_cursor, paragraphs):
+    """Build document as before, one insert per element and events processed per paragraph."""
+    for block_data in paragraphs:
+        editor.setTextCursor(document_cursor)
+        document_cursor.block().setUserData(block_data)
+        document_cursor.block().setUserState(blockState.DEFAULT)
+        document_cursor.setBlockFormat(editor.par_formats[block_data["style"]])
+        document_cursor.setCharFormat(editor.txt_formats[block_data["style"]])
+        for el_type, el_text in block_data["strokes"].texts():
+            current_format = editor.txt_formats[block_data["style"]]
+            current_format.setForeground(editor.highlight_colors[el_type])
+            document_cursor.insertText(el_text, current_format)
+        editor.send_message.emit(f"Loading paragraph {document_cursor.blockNumber()} of {len(paragraphs)}")
+        QApplication.processEvents()
+
+
+def per_paragraph_load(editor, transcript):
+    editor.window_threshold = PARAGRAPHS
+    editor.insert_blocks = lambda document_cursor, paragraphs: per_paragraph_insert(editor, document_cursor, paragraphs)
+    try:
+        editor.load_transcript(transcript)
+    finally:
+        del editor.insert_blocks
+
+
+def bulk_load(editor, transcript):
+    editor.window_threshold = PARAGRAPHS
+    editor.load_transcript(transcript)
+
+
+def windowed_load(editor, transcript):
+    editor.window_threshold = 1000
+    editor.load_transcript(transcript)
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    project = Path(mkdtemp()) / "bench"
+    project.mkdir()
+    transcript = project / "bench.transcript"
+    try:
+        save_json(make_document(), transcript)
+        editor = make_editor(project)
+        editor.show()
+        print(f"{PARAGRAPHS} paragraphs of {PARAGRAPH_SIZE + 1} elements")
+        print(f"{'load':>15} {'open (ms)':>10} {'speedup':>8}")
+        baseline = None
+        for name, load in [("per paragraph", per_paragraph_load), ("one edit", bulk_load), ("windowed", windowed_load)]:
+            open_time = min(timeit.repeat(lambda: load(editor, transcript), number = 1, repeat = 3))
+            assert editor.document().blockCount() == PARAGRAPHS
+            baseline = baseline or open_time
+            print(f"{name:>15} {open_time * 1000:10.1f} {baseline / open_time:7.1f}x")
+    finally:
+        rmtree(project.parent)
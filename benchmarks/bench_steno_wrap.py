@@ -0,0 +1,41 @@
+"""Benchmark for wrapping paragraphs into lines for export.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_steno_wrap.py
+
+Times ``steno_wrap_odf`` and ``steno_wrap_srt`` on 120,000 stroke elements,
+split into paragraphs of different lengths. Time should stay flat
+as paragraphs get longer.
+"""
+import random
+import timeit
+
+from plover_cat.steno_objects import element_collection, stroke_text
+from plover_cat.export_helpers import steno_wrap_odf, steno_wrap_srt
+
+ELEMENTS = 120000
+PARAGRAPH_SIZES = [60, 2000, 20000]
+WORDS = ["it ", "was ", "the ", "cat", "s ", "hello ", "world, ", "a "]
+
+
+def make_paragraphs(size, elements = ELEMENTS):
+    """Return list of element lists for paragraphs, each element has a time and audio time."""
+    random.seed(size)
+    return([[stroke_text(stroke = "WORD", text = random.choice(WORDS), time = i, audiotime = i)
+                for i in range(size)] for par in range(max(1, elements // size))])
+
+
+def wrap_all(paragraphs, wrap):
+    for par in paragraphs:
+        wrap(element_collection(par), max_char = 60)
+
+
+if __name__ == "__main__":
+    print(f"{ELEMENTS} elements")
+    print(f"{'paragraph size':>15} {'odf (ms)':>10} {'srt (ms)':>10}")
+    for size in PARAGRAPH_SIZES:
+        paragraphs = make_paragraphs(size)
+        odf = min(timeit.repeat(lambda: wrap_all(paragraphs, steno_wrap_odf), number = 1, repeat = 3))
+        srt = min(timeit.repeat(lambda: wrap_all(paragraphs, steno_wrap_srt), number = 1, repeat = 3))
+        print(f"{size:>15} {odf * 1000:10.1f} {srt * 1000:10.1f}")
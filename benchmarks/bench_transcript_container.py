@@ -0,0 +1,77 @@
+"""Benchmark for the binary transcript container against JSON.
+
+Run from the repository root in an environment with plover2CAT installed::
+
+    python benchmarks/bench_transcript_container.py
+
+Compares file size, save and load time of a transcript with 500,000 stroke
+elements saved as indented JSON (``save_json``) and as a binary container,
+and the time to read a single paragraph from each.
+"""
+import json
+import random
+import timeit
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from plover_cat.helpers import save_json, ms_to_timestamp
+from plover_cat.transcript_container import save_container, load_container, container_reader
+
+ELEMENTS = 500000
+PARAGRAPH_SIZE = 100
+WORDS = [("it ", "T"), ("was ", "WAS"), ("the ", "-T"), ("cat", "KAT"), ("s ", "-S"), ("hello ", "HEL/LOE"), ("world, ", "WORLD/KW-BG")]
+START = 1700000000000
+
+
+def make_document(elements = ELEMENTS, size = PARAGRAPH_SIZE):
+    """Return transcript dict of paragraphs with stroke elements, as saved by the editor."""
+    random.seed(elements)
+    document = {}
+    time = START
+    for par in range(elements // size):
+        strokes = []
+        for i in range(size):
+            time += random.randint(50, 900)
+            text, stroke = random.choice(WORDS)
+            strokes.append({"data": text, "element": "stroke", "time": ms_to_timestamp(time),
+                            "stroke": stroke, "audiotime": time - START})
+        document[str(par)] = {"strokes": strokes, "style": "Normal", "creationtime": ms_to_timestamp(time),
+                              "edittime": ms_to_timestamp(time), "audiostarttime": strokes[0]["audiotime"]}
+    return(document)
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        return(json.loads(f.read()))
+
+
+def read_json_paragraph(path, key):
+    return(load_json(path)[key])
+
+
+def read_container_paragraph(path, index):
+    with container_reader(path) as reader:
+        return(reader.paragraph(index))
+
+
+if __name__ == "__main__":
+    document = make_document()
+    middle = len(document) // 2
+    temp_dir = Path(mkdtemp())
+    json_path = temp_dir / "json.transcript"
+    container_path = temp_dir / "container.transcript"
+    try:
+        print(f"{ELEMENTS} elements in {len(document)} paragraphs")
+        print(f"{'format':>10} {'size (MB)':>10} {'save (ms)':>10} {'load (ms)':>10} {'one par (ms)':>13}")
+        for name, path, save, load, read_one in [
+                ("json", json_path, save_json, load_json, lambda: read_json_paragraph(json_path, str(middle))),
+                ("container", container_path, save_container, load_container, lambda: read_container_paragraph(container_path, middle))]:
+            save_time = min(timeit.repeat(lambda: save(document, path), number = 1, repeat = 3))
+            load_time = min(timeit.repeat(lambda: load(path), number = 1, repeat = 3))
+            assert load(path) == document
+            one_time = min(timeit.repeat(read_one, number = 1, repeat = 3))
+            size = path.stat().st_size / 1e6
+            print(f"{name:>10} {size:10.1f} {save_time * 1000:10.1f} {load_time * 1000:10.1f} {one_time * 1000:13.2f}")
+    finally:
+        rmtree(temp_dir)
@@ -2,9 +2,10 @@ import subprocess
 import re
 import pathlib
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 from collections import Counter, deque
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
 from sys import platform
 from pystardict import Dictionary as stardict
@@ -96,6 +97,7 @@ from plover_cat.testDialogWindow import testDialogWindow
 from plover_cat.rtf_parsing import rtf_steno, load_rtf_styles
 from plover_cat.constants import re_strokes, clippy_strokes, blockState
 from plover_cat.qcommands import BlockUserData, element_actions
+from plover_cat.transcript_container import save_transcript_file
 from plover_cat.helpers import (
     save_json,
     remove_empty_from_dict,
@@ -104,8 +106,10 @@ from plover_cat.helpers import (
     in_to_pt,
     mock_output,
     hours_to_ms,
+    timestamp_to_ms,
+    ms_to_timestamp,
 )
-from plover_cat.steno_objects import index_text
+from plover_cat.steno_objects import index_text, stroke_matcher
 from plover_cat.spellcheck import get_sorted_suggestions, multi_gen_alternative
 from plover_cat.export_helpers import recursive_style_format, load_odf_styles
 from plover_cat.FlowLayout import FlowLayout
@@ -157,7 +161,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     :ivar cutcopy_storage: deque, length 5, holding date for copy/pasting
     :ivar thread: thread for non-main thread processing
     :ivar progressBar: instance of ``QProgressBar`` for display
-    :ivar caption_cursor_pos: integer position of text last sent to display
+    :ivar caption_cursor_pos: block number and position in block of text last sent to display
 
     """
     def __init__(self, engine):
@@ -218,7 +222,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.cutcopy_storage = deque(maxlen = 5)
         self.thread = QThread()
         self.progressBar = QProgressBar()
-        self.caption_cursor_pos = 0
+        self.caption_cursor_pos = (0, 0)
         self.actionUndo = None
         self.actionRedo = None
         self.tts_instance = None
@@ -502,6 +506,18 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         for line in lines:
             self.strokeList.appendPlainText(line)
 
+    @Slot(str)
+    def open_stage_done(self, stage):
+        """Update GUI with data loaded after transcript was shown.
+
+        :param str stage: name of stage of ``PloverCATEditor.load``
+        """
+        if not self.textEdit:
+            return
+        if stage == "tape":
+            # whole tape, including strokes sent while indexing
+            self.strokeList.setPlainText(self.textEdit.tape.text())
+
     def display_block_steno(self, strokes):
         """Update reveal steno dock with element data.
 
@@ -1294,7 +1310,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             if block_data["style"] in self.textEdit.styles and "defaultoutlinelevel" in self.textEdit.styles[block_data["style"]]:
                 item = QListWidgetItem()
                 level = int(self.textEdit.styles[block_data["style"]]["defaultoutlinelevel"])
-                txt = " " * level + block.text()
+                txt = " " * level + self.textEdit.block_text(block)
                 item.setText(txt)
                 item.setData(Qt.UserRole, block.blockNumber())
                 self.navigationList.addItem(item)
@@ -1309,23 +1325,18 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         stroke_cursor = self.strokeList.textCursor()
         edit_cursor = self.textEdit.textCursor()
         self.textEdit.blockSignals(True)
-        stroke_cursor.movePosition(QTextCursor.StartOfBlock)
-        stroke_cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        tape_line = stroke_cursor.blockNumber()
         try:
-            cursor_position_stroke = stroke_cursor.selectedText().split("|")[2].split(",")
-            par = int(cursor_position_stroke[0].replace("(", ""))
-            col = int(cursor_position_stroke[1].replace(")", ""))
-            edit_cursor.movePosition(QTextCursor.Start)
-            for i in range(par):
-                edit_cursor.movePosition(QTextCursor.NextBlock)
-            for i in range(col):
-                edit_cursor.movePosition(QTextCursor.NextCharacter)
+            par, col = self.textEdit.tape.position(tape_line)
+            self.textEdit.load_blocks(par, par)
+            block = self.textEdit.document().findBlockByNumber(min(par, self.textEdit.document().blockCount() - 1))
+            edit_cursor.setPosition(block.position() + min(col, block.length() - 1))
             self.textEdit.setTextCursor(edit_cursor)
             log.debug("Move text cursor to tape position.")
         except Exception:
             pass
         self.textEdit.blockSignals(False)
-        self.sync_media_tape(stroke_cursor.selectedText())
+        self.sync_media_tape(tape_line)
 
     def text_to_stroke_move(self):
         """Locate stroke line in tape based on cursor position in transcript.
@@ -1339,7 +1350,6 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         edit_block = edit_cursor.block()
         block_data = edit_block.userData()
         self.strokeList.blockSignals(True)
-        stroke_text = self.strokeList.document().toPlainText().split("\n")
         pos = edit_cursor.positionInBlock()
         self.cursor_status.setText("Par, Char: {line}, {char}".format(line = edit_cursor.blockNumber(), char = pos)) 
         try:
@@ -1350,14 +1360,11 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             else:
                 stroke_data = block_data["strokes"].extract_steno(pos, pos + 1)
                 stroke_time = stroke_data.data[0].time
-            # no idea how fast this will be with many many more lines, probably slow
-            for index, i in enumerate(stroke_text):
-                if i.startswith(stroke_time):
-                    stroke_pos = index
-                    break
-            stroke_cursor.movePosition(QTextCursor.Start)
-            for i in range(stroke_pos):
-                stroke_cursor.movePosition(QTextCursor.NextBlock)
+            stroke_time = ms_to_timestamp(stroke_time)
+            stroke_pos = self.textEdit.tape.line_at_time(stroke_time)
+            if stroke_pos is None:
+                raise KeyError(stroke_time)
+            stroke_cursor.setPosition(self.strokeList.document().findBlockByNumber(stroke_pos).position())
             stroke_cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
             self.strokeList.setTextCursor(stroke_cursor)
             self.strokeList.setCursorWidth(5)
@@ -1633,7 +1640,9 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             self.style_controls.setEnabled(True)
             self.actionCreateNewStyle.setEnabled(True)
         self.update_index_menu()
-        self.update_tape(self.textEdit.tape)
+        self.textEdit.open_stage_done.connect(self.open_stage_done)
+        if self.textEdit.open_stage_ready("tape"):
+            self.open_stage_done("tape")
         self.update_spell_gui()
         self.update_stardict_gui()
         self.spell_search.clicked.connect(lambda: self.spellcheck())
@@ -1754,6 +1763,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.textEdit.document().blockCountChanged.disconnect()
         self.textEdit.send_message.disconnect()
         self.textEdit.send_tape.disconnect()
+        self.textEdit.open_stage_done.disconnect()
         self.textEdit.cursorPositionChanged.disconnect()
         if getattr(self.textEdit, "audio_file", None):
             self.textEdit.player.stop()
@@ -1844,6 +1854,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     def revert_file(self):
         """Revert transcript to previous commit.
         """
+        self.textEdit.wait_open_stage("git")
         if not self.textEdit.repo:
             return
         if not self.textEdit.undo_stack.isClean():
@@ -1897,7 +1908,9 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             par["style"] = renamed_indiv_style[int(ind)]
         transcript_dir = self.textEdit.file_name
         new_file_path = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")
-        save_json(rtf_paragraphs, new_file_path)
+        transcript_format = self.textEdit.get_config_value("transcript_format")
+        shard_size = self.textEdit.get_config_value("shard_size") if transcript_format == "sharded" else 0
+        save_transcript_file(rtf_paragraphs, new_file_path, binary = transcript_format == "binary", shard_size = shard_size)
         style_file_path = self.textEdit.file_name / "styles" / pathlib.Path(pathlib.Path(selected_file[0]).name).with_suffix(".json")
         save_json(remove_empty_from_dict(style_dict), style_file_path)
         self.textEdit.set_config_value("style", str(style_file_path))
@@ -2093,7 +2106,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.display_message("Generate transcript suggestions.")
         if not self.suggest_dialog:
             self.suggest_dialog = suggestDialogWindow(None, self.engine, scowl)
-        self.suggest_dialog.update_text(self.textEdit.toPlainText())
+        self.suggest_dialog.update_text(self.textEdit.plain_text())
         self.suggest_dialog.show()      
         self.suggest_dialog.activateWindow() 
 
@@ -2215,6 +2228,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         current_block.setUserState(current_block.userState() | blockState.CHANGE)
         current_cursor.select(QTextCursor.BlockUnderCursor)
         current_cursor.removeSelectedText()
+        self.textEdit.rebuild_stroke_index()
 
     def cut_steno(self, cut = True):
         """Cut/copy selection and generate menu item.
@@ -2540,6 +2554,10 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         current_cursor = self.textEdit.textCursor()
         self.textEdit.setTextCursor(current_cursor)
         while not current_cursor.atEnd():
+            block_number = current_cursor.blockNumber()
+            position_in_block = current_cursor.positionInBlock()
+            if self.textEdit.load_blocks(block_number, block_number + 1):
+                current_cursor.setPosition(self.textEdit.document().findBlockByNumber(block_number).position() + position_in_block)
             current_cursor.movePosition(QTextCursor.StartOfWord)
             current_cursor.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
             result = self.sp_check(current_cursor.selectedText())
@@ -2631,17 +2649,34 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         old_wrap_state = self.search_wrap.isChecked()
         if old_wrap_state:
             self.search_wrap.setChecked(False)
-        old_cursor_position = cursor.block().position()        
+        old_cursor_block = cursor.blockNumber()
         cursor.movePosition(QTextCursor.Start)
         search_status = True
         log.debug("Search all, starting from beginning.")
         self.searchResults.clear()
+        steno_matches = None
+        if self.search_steno.isChecked() and not self.search_untrans.isChecked():
+            # one pass over stroke data instead of repeated searches
+            steno_matches = iter(self.steno_matches(self.search_term.text()))
         while search_status:
-            search_status = self.search()
+            if steno_matches is not None:
+                match = next(steno_matches, None)
+                if match is None:
+                    break
+                block_number, match_start, match_end = match
+                self.textEdit.load_blocks(block_number, block_number)
+                block_pos = self.textEdit.document().findBlockByNumber(block_number).position()
+                current_cursor = self.textEdit.textCursor()
+                current_cursor.setPosition(block_pos + match_start)
+                current_cursor.setPosition(block_pos + match_end, QTextCursor.KeepAnchor)
+                self.textEdit.setTextCursor(current_cursor)
+            else:
+                search_status = self.search()
             if search_status is None:
                 break
             match_start = self.textEdit.textCursor().selectionStart()
             match_end = self.textEdit.textCursor().selectionEnd()
+            match_block = self.textEdit.textCursor().block()
             item = QListWidgetItem()
             current_cursor = self.textEdit.textCursor()
             current_cursor.movePosition(QTextCursor.PreviousWord, QTextCursor.MoveAnchor, 2)
@@ -2649,10 +2684,11 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
                 current_cursor.movePosition(QTextCursor.NextWord, QTextCursor.KeepAnchor, 2)
             match_text = current_cursor.selectedText()
             item.setText(match_text)
-            item.setData(Qt.UserRole, (match_start, match_end))
+            # positions in paragraph, document positions change as paragraphs are loaded
+            item.setData(Qt.UserRole, (match_block.blockNumber(), match_start - match_block.position(), match_end - match_block.position()))
             self.searchResults.addItem(item)
         log.debug("Attempting to set cursor back to original position after search all.")
-        cursor.setPosition(old_cursor_position)
+        cursor.setPosition(self.textEdit.document().findBlockByNumber(old_cursor_block).position())
         self.textEdit.setTextCursor(cursor)
         self.search_wrap.setChecked(old_wrap_state)
         # store search options
@@ -2665,11 +2701,13 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         # add as item to qlistview, elide right 
 
     def search_navigation(self, item):
-        start_pos, end_pos = item.data(Qt.UserRole)
+        block_number, start_pos, end_pos = item.data(Qt.UserRole)
         log.debug("Navigating to selected search match.")
+        self.textEdit.load_blocks(block_number, block_number)
+        block_pos = self.textEdit.document().findBlockByNumber(block_number).position()
         current_cursor = self.textEdit.textCursor()
-        current_cursor.setPosition(start_pos)
-        current_cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
+        current_cursor.setPosition(block_pos + start_pos)
+        current_cursor.setPosition(block_pos + end_pos, QTextCursor.KeepAnchor)
         self.textEdit.setTextCursor(current_cursor)
 
     def text_search(self, direction = 1):
@@ -2685,6 +2723,10 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             flags |= QTextDocument.FindWholeWords
         if direction == -1:
             flags |= QTextDocument.FindBackward
+        if search:
+            # paragraphs not loaded yet are not in the document to search
+            term = search.lower()
+            self.textEdit.load_matching_blocks(("text", term), lambda text: term in text.lower())
         cursor = self.textEdit.textCursor()
         log.debug("Performing text search with term %s, flags %s.", search, flags)
         found = self.textEdit.document().find(search, cursor, flags)
@@ -2748,18 +2790,20 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.MoveAnchor)
             self.textEdit.setTextCursor(cursor)
             cursor_pos = cursor.positionInBlock()
-            stroke_data = current_block.userData()["strokes"].extract_steno(0, cursor_pos)
-            while True:
-                check_match = stroke_data.search_strokes(steno)
-                if check_match is not None:
-                    break
-                if current_block == self.textEdit.document().firstBlock():
-                    # end search after searching first block
-                    check_match = None
+            start_block = cursor.blockNumber()
+            matcher = stroke_matcher([steno])
+            # only paragraphs with the strokes, from stroke index
+            candidates = self.textEdit.steno_candidates(steno)
+            check_match = None
+            for block_number in reversed(candidates[:bisect_right(candidates, start_block)]):
+                current_block = self.textEdit.document().findBlockByNumber(block_number)
+                # last match ending before cursor
+                matches = [match for match in self.textEdit.block_stroke_matches(current_block, matcher) if block_number < start_block or match[1] <= cursor_pos]
+                if matches:
+                    check_match = matches[-1]
                     break
-                current_block = current_block.previous()
-                stroke_data = current_block.userData()["strokes"] 
             if check_match is not None:
+                self.textEdit.load_blocks(block_number, block_number)
                 block_pos = current_block.position()
                 cursor.setPosition(block_pos + check_match[0])
                 cursor.setPosition(block_pos + check_match[1], QTextCursor.KeepAnchor)
@@ -2779,24 +2823,22 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             cursor.movePosition(QTextCursor.NextCharacter, QTextCursor.MoveAnchor)
             self.textEdit.setTextCursor(cursor)
             cursor_pos = cursor.positionInBlock()
-            stroke_data = current_block.userData()["strokes"].extract_steno(cursor_pos, len(current_block.userData()["strokes"]))
-            while True:
-                # this is different from loop above since there is an offset 
-                # so cursor pos below has to add the offset
-                check_match = stroke_data.search_strokes(steno)
-                if check_match is not None:
-                    break
-                if current_block == self.textEdit.document().lastBlock():
-                    # end search after searching last block
-                    check_match = None
+            start_block = cursor.blockNumber()
+            matcher = stroke_matcher([steno])
+            candidates = self.textEdit.steno_candidates(steno)
+            check_match = None
+            for block_number in candidates[bisect_left(candidates, start_block):]:
+                current_block = self.textEdit.document().findBlockByNumber(block_number)
+                # first match starting at or after cursor
+                matches = [match for match in self.textEdit.block_stroke_matches(current_block, matcher) if block_number > start_block or match[0] >= cursor_pos]
+                if matches:
+                    check_match = matches[0]
                     break
-                current_block = current_block.next()
-                stroke_data = current_block.userData()["strokes"] 
-                cursor_pos = 0
             if check_match is not None:
-                block_pos = current_block.position()               
-                cursor.setPosition(block_pos + cursor_pos + check_match[0])
-                cursor.setPosition(block_pos + cursor_pos + check_match[1], QTextCursor.KeepAnchor)
+                self.textEdit.load_blocks(block_number, block_number)
+                block_pos = current_block.position()
+                cursor.setPosition(block_pos + check_match[0])
+                cursor.setPosition(block_pos + check_match[1], QTextCursor.KeepAnchor)
                 self.textEdit.setTextCursor(cursor)
                 log.debug("Search success.")
                 self.statusBar.showMessage("Steno match found.")
@@ -2806,6 +2848,27 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
                 self.statusBar.showMessage("No steno match found.")
                 return None
 
+    def steno_matches(self, steno):
+        """Find all steno matches in transcript.
+
+        Only paragraphs the stroke index has for the strokes are searched. Overlapping matches are dropped, keeping the earlier one, as searching 
+        repeatedly from end of last match would.
+
+        :param str steno: steno outline to search for
+        :return: list of tuples of block number, start and end position in block
+        """
+        matcher = stroke_matcher([steno])
+        results = []
+        for block_number in self.textEdit.steno_candidates(steno):
+            current_block = self.textEdit.document().findBlockByNumber(block_number)
+            last_end = 0
+            for match_start, match_end, query in self.textEdit.block_stroke_matches(current_block, matcher):
+                if match_start < last_end:
+                    continue
+                results.append((block_number, match_start, match_end))
+                last_end = match_end
+        return(results)
+
     def untrans_search(self, direction = 1):
         """Search for untranslated steno.
         """
@@ -2813,6 +2876,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         untrans_reg = QRegularExpression("(\\b|\\*)(?=[STKPWHRAO*EUFBLGDZ]{3,})S?T?K?P?W?H?R?A?O?\\*?E?U?F?R?P?B?L?G?T?S?D?Z?\\b")
         if direction == -1:
             flags |= QTextDocument.FindBackward
+        self.textEdit.load_matching_blocks("untrans", re.compile("[STKPWHRAO*EUFBLGDZ]{3,}").search)
         cursor = self.textEdit.textCursor()
         found = self.textEdit.document().find(untrans_reg, cursor, flags)
         log.debug("Search for untranslated steno.")
@@ -2902,21 +2966,31 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         old_wrap_state = self.search_wrap.isChecked()
         if old_wrap_state:
             self.search_wrap.setChecked(False)
-        old_cursor_position = cursor.block().position()        
+        old_cursor_block = cursor.blockNumber()
         cursor.movePosition(QTextCursor.Start)
         self.textEdit.setTextCursor(cursor)
         search_status = True
         log.debug("Replace all, starting from beginning.")
         self.textEdit.undo_stack.beginMacro("Replace All")
-        while search_status:
-            search_status = self.search()
-            if search_status is None:
-                break
-            self.replace(to_next = False, steno = steno)
+        if self.search_steno.isChecked() and not self.search_untrans.isChecked():
+            # replace from the end so positions of earlier matches stay valid
+            for block_number, match_start, match_end in reversed(self.steno_matches(self.search_term.text())):
+                self.textEdit.load_blocks(block_number, block_number)
+                block_pos = self.textEdit.document().findBlockByNumber(block_number).position()
+                cursor.setPosition(block_pos + match_start)
+                cursor.setPosition(block_pos + match_end, QTextCursor.KeepAnchor)
+                self.textEdit.setTextCursor(cursor)
+                self.replace(to_next = False, steno = steno)
+        else:
+            while search_status:
+                search_status = self.search()
+                if search_status is None:
+                    break
+                self.replace(to_next = False, steno = steno)
         self.textEdit.undo_stack.endMacro()
         # not the exact position but hopefully close
         log.debug("Attempting to set cursor back to original position after replacements.")
-        cursor.setPosition(old_cursor_position)
+        cursor.setPosition(self.textEdit.document().findBlockByNumber(old_cursor_block).position())
         self.textEdit.setTextCursor(cursor)
         self.search_wrap.setChecked(old_wrap_state)
 
@@ -3088,8 +3162,12 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
 
     def sync_media_tape(self, tape_line):
         """Sync media to time at selected tape line
+
+        :param int tape_line: line number in tape
         """
-        audio_pos = tape_line.split("|")[1]
+        if tape_line >= len(self.textEdit.tape):
+            return
+        audio_pos = self.textEdit.tape.fields(tape_line)[1]
         if audio_pos:
             audio_time = hours_to_ms(audio_pos)
             log.debug(f"Trying to sync media to {audio_time}")
@@ -3102,8 +3180,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if current_cursor.hasSelection():
             document_text = current_cursor.selectedText()
         else:
-            document_text = self.textEdit.toPlainText()
-            document_text = document_text[current_cursor.position():]
+            document_text = self.textEdit.plain_text(current_cursor)
         if document_text.strip():            
             self.tts_instance.enqueue(document_text)
 
@@ -3249,7 +3326,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             if res:
                 self.setup_caption_window(self.caption_dialog.font, self.caption_dialog.maxDisplayLines.value())
                 # if captions are enabled in middle of document, don't start from beginning
-                self.caption_cursor_pos = self.textEdit.textCursor().position()
+                self.set_caption_position(self.textEdit.textCursor().position())
                 self.thread = QThread()
                 self.cap_worker = captionWorker(roll_caps=self.caption_dialog.rollCaptions.isChecked(), max_length = self.caption_dialog.capLength.value(), max_lines = self.caption_dialog.maxDisplayLines.value(),
                                     remote = self.caption_dialog.remoteCapHost.currentText(), endpoint = self.caption_dialog.hostURL.text(), 
@@ -3274,12 +3351,14 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         """
         if not self.actionCaptioning.isChecked():
             return
+        # text not yet sent has to be in the document to be selected
+        self.textEdit.load_blocks(self.caption_cursor_pos[0], self.textEdit.textCursor().blockNumber())
+        caption_pos = self.caption_position()
         current_cursor = self.textEdit.textCursor()
         if self.caption_dialog.enableTimeBuffer.isChecked():
-            now_time = datetime.now()
-            buffer = timedelta(milliseconds = self.caption_dialog.timeOffset.value())
-            # time_limit = now_time - buffer
-            current_cursor.setPosition(self.caption_cursor_pos)
+            # elements written before time_limit are old enough to send
+            time_limit = timestamp_to_ms() - self.caption_dialog.timeOffset.value()
+            current_cursor.setPosition(caption_pos)
             current_block = current_cursor.block()
             stroke_data = current_block.userData()["strokes"]
             track_pos = current_block.position()
@@ -3287,8 +3366,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             while True:
                 # this loop can be slow if enormous paragraph
                 for el in stroke_data.data:
-                    el_time = datetime.strptime(el.time, "%Y-%m-%dT%H:%M:%S.%f")
-                    if now_time - el_time > buffer:
+                    if el.time < time_limit:
                         track_pos += len(el)
                     else:
                         # break on first time encountering element younger
@@ -3307,26 +3385,43 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         else:
             current_cursor.movePosition(QTextCursor.PreviousWord, QTextCursor.MoveAnchor, self.caption_dialog.charOffset.value())
         new_pos = current_cursor.position()
-        if self.caption_cursor_pos >= new_pos:
+        if caption_pos >= new_pos:
             return
-        current_cursor.setPosition(self.caption_cursor_pos, QTextCursor.KeepAnchor)
+        current_cursor.setPosition(caption_pos, QTextCursor.KeepAnchor)
         new_text = current_cursor.selectedText()
-        self.caption_cursor_pos = new_pos
+        self.set_caption_position(new_pos)
         self.cap_worker.intake(new_text)
 
     def flush_caption(self):
         """Send all remaining text up to cursor to caption display.
         """
-        old_pos = self.caption_cursor_pos
+        self.textEdit.load_blocks(self.caption_cursor_pos[0], self.textEdit.document().blockCount() - 1)
         current_cursor = self.textEdit.textCursor()
-        current_cursor.setPosition(old_pos) 
+        current_cursor.setPosition(self.caption_position()) 
         current_cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
         new_text = current_cursor.selectedText()
         if new_text == "":
             self.cap_worker.intake("\n" + "\u2029")
         else:
             self.cap_worker.intake(new_text)
-        self.caption_cursor_pos = current_cursor.selectionEnd()
+        self.set_caption_position(current_cursor.selectionEnd())
+
+    def caption_position(self):
+        """Return document position of text last sent to caption display."""
+        block_number, position_in_block = self.caption_cursor_pos
+        document = self.textEdit.document()
+        block = document.findBlockByNumber(min(block_number, document.blockCount() - 1))
+        return(block.position() + min(position_in_block, block.length() - 1))
+
+    def set_caption_position(self, position):
+        """Keep document position of text last sent to caption display, as block and position in block.
+
+        Loading earlier paragraphs shifts document positions, but not positions in block.
+
+        :param int position: document position
+        """
+        block = self.textEdit.document().findBlock(position)
+        self.caption_cursor_pos = (block.blockNumber(), position - block.position())
 
     def export_text(self):
         """Export transcript to text file.
@@ -3343,7 +3438,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if self.thread and self.thread.isRunning():
             QMessageBox.warning(self, "Plover2CAT", "Another export is in process.")
             return
-        contents = self.textEdit.document().toPlainText()
+        contents = self.textEdit.plain_text()
         file_path = pathlib.Path(selected_file[0])
         log.debug("Exporting plain text to %s.", str(file_path))
         with open(file_path, "w") as f:
@@ -3362,10 +3457,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         )
         if not selected_file[0]:
             return
-        tape_contents = self.strokeList.document().toPlainText()
-        tape_lines = tape_contents.splitlines()
         doc_lines = []
-        for line in tape_lines:
+        for line in self.textEdit.tape.lines():
             doc_lines.append(line.split("|")[3])
         with open(selected_file[0], "w", encoding = "utf-8") as f:
             for line in doc_lines:
@@ -3394,7 +3487,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_ascii)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3426,7 +3519,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_html)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3458,7 +3551,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_plain_ascii)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3489,7 +3582,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_srt)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3522,7 +3615,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_odf)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3555,7 +3648,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(self.textEdit.snapshot(), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_rtf)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3,17 +3,16 @@ import json
 import os
 import re
 from shutil import copyfile, copytree
-from copy import deepcopy
 from datetime import datetime
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from math import ceil
 from dulwich.repo import Repo
 from dulwich.errors import NotGitRepository
-from dulwich import porcelain
-from spylls.hunspell import Dictionary
 
 from PySide6 import QtCore, QtGui
-from PySide6.QtGui import QTextCursor, QTextDocument, QColor, QUndoStack, QImage, QImageReader, QTextImageFormat
-from PySide6.QtCore import Qt, Signal, QUrl, QSettings
+from PySide6.QtGui import QTextCursor, QTextDocument, QColor, QUndoStack, QImage, QImageReader, QTextImageFormat, QTextBlockFormat, QFontMetrics
+from PySide6.QtCore import Qt, Signal, QUrl, QSettings, QPoint
 from PySide6.QtWidgets import QCompleter, QTextEdit,  QMessageBox, QApplication
 from PySide6.QtMultimedia import (QMediaPlayer, QMediaRecorder, QMediaCaptureSession, QAudioOutput)
 
@@ -23,10 +22,15 @@ from plover.oslayer.config import CONFIG_DIR
 from plover import log
 
 from plover_cat.qcommands import steno_insert, BlockUserData, update_config_value, steno_remove, update_style, set_par_style, set_par_property, merge_steno_par, split_steno_par, update_user_data, update_entries, update_field, image_insert
-from plover_cat.steno_objects import element_collection, element_factory, text_element, stroke_text, automatic_text, image_text, text_field, user_field_dict, backtrack_coord
+from plover_cat.transcript_container import load_transcript_file, save_transcript_file, shard_dir, is_manifest, is_container
+from plover_cat.tape_store import tape_store, background_writer
+from plover_cat.versioning import commit_worker, restore_files
+from plover_cat.recovery import tape_stroke, tape_translator
+from plover_cat.spell_cache import get_dictionary
+from plover_cat.steno_objects import element_collection, lazy_collection, stroke_index, text_element, stroke_text, automatic_text, image_text, text_field, user_field_dict
 from plover_cat.rtf_parsing import import_version_one, import_version_two
 from plover_cat.export_helpers import load_odf_styles, recursive_style_format, parprop_to_blockformat, txtprop_to_textformat
-from plover_cat.helpers import ms_to_hours, save_json, backup_dictionary_stack, add_custom_dicts, load_dictionary_stack_from_backup, return_commits, hide_file
+from plover_cat.helpers import ms_to_hours, log_time, save_json, append_journal, read_journal, apply_journal, backup_dictionary_stack, add_custom_dicts, load_dictionary_stack_from_backup, return_commits, hide_file
 from plover_cat.constants import default_styles, default_config, default_dict, blockState
 
 _ = lambda txt: QtCore.QCoreApplication.translate("Plover2CAT", txt)
@@ -43,8 +47,12 @@ class PloverCATEditor(QTextEdit):
     :ivar dict config: transcript configuration
     :ivar file_name: transcript directory path
     :ivar repo: ``dulwich`` repository instance
+    :ivar versioning: ``commit_worker`` committing to ``repo``
+    :ivar dict open_stages: futures of ``load`` stages running on worker threads, by stage name
     :ivar dict backup_document: original transcript data, ``paragraph number: block data``
-    :ivar str tape: transcript tape contents as a long string with new line separators
+    :ivar bool backup_shared: ``backup_document`` has been returned by ``snapshot``
+    :ivar writer: ``background_writer`` for tape lines and edit logs
+    :ivar tape: ``tape_store`` of transcript tape, one line per stroke
     :ivar dict styles: transcript style parameters
     :ivar dict txt_formats: ``QTextCharFormat`` objects for each style by name
     :ivar dict par_formats: ``QTextBlockFormat`` objects for each style by name
@@ -60,8 +68,10 @@ class PloverCATEditor(QTextEdit):
     :ivar list track_lengths: ``deque`` of length 10 that tracks length of ``last_string_sent`` and ``last_backspaces_sent``
     :ivar undo_stack: ``QUndoStack``
     :ivar list spell_ignore: words to ignore in spellcheck, session only
-    :ivar dictionary: ``spylls`` dictionary 
+    :ivar dictionary: ``spylls`` dictionary, loaded on first use
+    :ivar dictionary_path: language code or path of ``dictionary`` files
     :ivar dictionary_name: name of ``dictionary``, usually the language code
+    :ivar spellcheck_cache: folder of parsed spellcheck dictionaries, ``None`` to always parse
     :ivar audio_file: path to file being played/recorded
     :ivar player: ``QMediaPlayer``
     :ivar media_recorder: ``QMediaCaptureSession`` that manages audio input for recording
@@ -74,6 +84,8 @@ class PloverCATEditor(QTextEdit):
     """Signal to send with message to display."""
     send_tape = Signal(str)
     """Signal to send with tape contents."""
+    open_stage_done = Signal(str)
+    """Signal to send with name of ``load`` stage finished on a worker thread."""
     audio_position_changed = Signal(int)
     """Signal to send with new audio position."""
     audio_length_changed = Signal(int)
@@ -97,13 +109,30 @@ class PloverCATEditor(QTextEdit):
         self.config = {}
         self.file_name = ""
         self.repo = None
+        self.versioning = None
+        self.open_stages = {}
         self.backup_document = {}
-        self.tape = ""       
+        self.backup_shared = False
+        self.journal_entries = 0
+        self.journal_limit = 1000
+        # first paragraph changed since transcript file was saved, sharded saves rewrite from there
+        self.first_unsaved = None
+        # transcripts with more paragraphs load paragraph text only when needed
+        self.window_threshold = 1000
+        self.window_margin = 50
+        self.unloaded_blocks = 0
+        self.loaded_searches = set()
+        self.loading_blocks = False
+        # paragraphs loaded between progress messages
+        self.load_progress_interval = 500
+        self.writer = background_writer()
+        self.tape = tape_store(writer = self.writer)
         self.styles = {}
         self.txt_formats = {}
         self.par_formats = {}
         self.highlight_colors = {}
         self.user_field_dict = {}
+        self.stroke_index = stroke_index()
         self.auto_paragraph_affixes = {}    
         self.numbers = {number: letter for letter, number in plover.system.NUMBERS.items()}
         self.cursor_block = 0
@@ -115,8 +144,11 @@ class PloverCATEditor(QTextEdit):
         self.track_lengths = deque(maxlen = 10)
         self.undo_stack = QUndoStack(self)
         self.spell_ignore = []
-        self.dictionary = Dictionary.from_files('en_US')
+        # shared by editors, loaded when spellcheck is first used
+        self._dictionary = None
+        self.dictionary_path = "en_US"
         self.dictionary_name = "en_US"
+        self.spellcheck_cache = pathlib.Path(CONFIG_DIR) / "plover2cat" / "cache" / "spellcheck"
         self._completer = None
         # media
         self.audio_file = ""
@@ -132,6 +164,8 @@ class PloverCATEditor(QTextEdit):
         self.recorder.recorderStateChanged.connect(log.debug)
         self.audio_position = 0
         self.audio_delay = 0
+        self.verticalScrollBar().valueChanged.connect(self.load_visible_blocks)
+        self.cursorPositionChanged.connect(self.load_cursor_blocks)
 
     def setCompleter(self, c):
         """Set autocompletion for transcript."""
@@ -203,6 +237,12 @@ class PloverCATEditor(QTextEdit):
         """Load transcript and associated data.
 
         The associated ``load_*`` methods will create necessary files if none exist.
+
+        Reading the transcript file, indexing the tape and opening the 
+        repository run as stages on worker threads, 
+        while configuration, Plover dictionaries and styles load here. 
+        This returns once the transcript is in the editor, the other stages 
+        may still be running, see ``wait_open_stage``. The time of each stage is logged.
         
         :param path: path of transcript to load
         :param engine: Plover engine instance
@@ -211,100 +251,290 @@ class PloverCATEditor(QTextEdit):
         self.send_message.emit("Loading data")
         self.file_name = pathlib.Path(path)
         self.file_name.mkdir(parents = True, exist_ok = True)
-        self.load_config_file(self.file_name, engine)
-        self.load_dicts(engine, self.config["dictionaries"])
-        self.load_check_styles(self.file_name / self.config["style"])
-        self.get_highlight_colors()
+        transcript = self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
+        # session file is only left behind if transcript was not closed
+        session = self.session_path()
+        new_session = not session.exists()
+        open_pool = ThreadPoolExecutor(max_workers = 4, thread_name_prefix = "plover2cat-open")
+        self.open_stages = {}
+        read = None
+        if load_transcript and transcript.is_file():
+            read = self.start_open_stage(open_pool, "read", self.read_transcript, transcript)
+        self.load_tape()
+        self.start_open_stage(open_pool, "tape", self.index_tape, new_session)
+        with log_time("Open config"):
+            self.load_config_file(self.file_name, engine)
+        self.start_open_stage(open_pool, "git", self.load_repo)
+        open_pool.shutdown(wait = False)
         self.load_spellcheck_dict()
+        with log_time("Open dictionaries"):
+            self.load_dicts(engine, self.config["dictionaries"])
+        with log_time("Open styles"):
+            self.load_check_styles(self.file_name / self.config["style"])
+            self.get_highlight_colors()
         export_path = self.file_name / "export"
         pathlib.Path(export_path).mkdir(parents = True, exist_ok = True)
+        with log_time("Open transcript"):
+            if read:
+                self.load_transcript(transcript, read.result())
+            else:
+                self.rebuild_stroke_index()
+        self.engine = engine
+        if not new_session and load_transcript:
+            self.recover_from_tape(session)
+
+    def start_open_stage(self, open_pool, stage, function, *args):
+        """Run stage of ``load`` on worker thread, logging its time.
+
+        ``open_stage_done`` is sent when the stage is done, and errors are logged.
+
+        :param open_pool: ``ThreadPoolExecutor`` to run stage on
+        :param str stage: name of stage
+        :param function: function to run, with ``args``
+        :return: future of function result
+        """
+        def run():
+            try:
+                with log_time(f"Open {stage}"):
+                    return(function(*args))
+            except Exception as e:
+                log.error(f"Open {stage} failed: {e}")
+                raise
+            finally:
+                self.open_stage_done.emit(stage)
+        self.open_stages[stage] = open_pool.submit(run)
+        return(self.open_stages[stage])
+
+    def open_stage_ready(self, stage):
+        """Check if ``load`` stage is done, or was not run."""
+        return(stage not in self.open_stages or self.open_stages[stage].done())
+
+    def wait_open_stage(self, stage = None):
+        """Wait until ``load`` stage is done.
+
+        :param str stage: name of stage, default all stages
+        """
+        if stage is None:
+            wait(self.open_stages.values())
+        elif stage in self.open_stages:
+            wait([self.open_stages[stage]])
+
+    def load_repo(self):
+        """Open ``dulwich`` repository of transcript, create if none, and commit transcript files."""
         try:
             self.repo = Repo(self.file_name)
-            self.dulwich_save()
         except NotGitRepository:
             self.repo = Repo.init(self.file_name)
-            self.dulwich_save()
-        transcript = self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
-        if load_transcript and transcript.is_file():
-            self.load_transcript(transcript)
-        self.load_tape()
-        self.engine = engine      
+        self.versioning = commit_worker(self.file_name)
+        self.versioning.commit(self.dulwich_files())
+        self.send_message.emit("Transcript repository ready.")
+
+    def read_transcript(self, transcript):
+        """Read transcript file, and journal of unsaved changes if any.
 
-    def load_transcript(self, transcript):
+        :param transcript: path to transcript file
+        :return: tuple of transcript dict, and list of journal entries or ``None``
+        """
+        transcript = pathlib.Path(transcript)
+        journal = self.journal_path(transcript)
+        journal_entries = None
+        if journal.exists():
+            # unsaved changes, replayed over the snapshot the journal was started from
+            base, journal_entries = read_journal(journal)
+            if base and transcript.with_name(base).exists():
+                transcript = transcript.with_name(base)
+        self.send_message.emit("Reading transcript data.")
+        return((load_transcript_file(transcript), journal_entries))
+
+    def load_transcript(self, transcript, transcript_data = None):
         """Load transcript steno data.
 
         :param transcript: path to transcript file
+        :param tuple transcript_data: result of ``read_transcript``, 
+            transcript file is read if ``None``
         """
         self.send_message.emit("Transcript file found, loading")
-        with open(transcript, "r") as f:
-            self.send_message.emit("Reading transcript data.")
-            json_document = json.loads(f.read())
-        self.backup_document = deepcopy(json_document)
+        self.first_unsaved = None
+        if transcript_data is None:
+            transcript_data = self.read_transcript(transcript)
+        json_document, journal_entries = transcript_data
         self.send_message.emit("Loading transcript data.")
         # check if json document is older format
-        if not json_document:
+        if not json_document and not journal_entries:
             return
-        if "data" in json_document[next(iter(json_document))]:
+        if json_document and "data" in json_document[next(iter(json_document))]:
             self.backup_document = import_version_one(json_document)
         else:
             self.backup_document = import_version_two(json_document)
+        if journal_entries is not None:
+            self.send_message.emit(f"Applying {len(journal_entries)} unsaved changes from journal.")
+            apply_journal(self.backup_document, journal_entries)
+            self.journal_entries = len(journal_entries)
+            self.first_unsaved = 0
         self.clear()
+        self.unloaded_blocks = 0
+        self.loaded_searches.clear()
         self.moveCursor(QTextCursor.Start)
         document_cursor = self.textCursor()
-        ef = element_factory()
+        paragraphs = []
         for key, value in self.backup_document.items():
             # skip if key is not a digit
             if not key.isdigit():
                 continue
             block_data = BlockUserData()
-            el_list = [ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in value["strokes"]]
-            self.setTextCursor(document_cursor)
             for k, v in value.items():
                 block_data[k] = v
-            block_data["strokes"] = element_collection()
-            document_cursor.block().setUserData(block_data)
-            document_cursor.block().setUserState(blockState.DEFAULT)
-            block_data["strokes"] = element_collection(el_list)
+            # elements are only made when the paragraph is accessed, except for images
+            block_data["strokes"] = lazy_collection(value["strokes"], user_field_dict = self.user_field_dict)
             if block_data["style"] not in self.par_formats:
                 block_data["style"] = next(iter(self.par_formats))
-            document_cursor.setBlockFormat(self.par_formats[block_data["style"]])
-            document_cursor.setCharFormat(self.txt_formats[block_data["style"]])                
-            for el in el_list:
-                if el.element == "image":
-                    i_path = self.file_name / pathlib.Path(el.path)
-                    imageUri = QUrl(i_path.as_uri())
-                    el.path = i_path.as_posix()
-                    image = QImage(QImageReader(el.path).read())
-                    self.document().addResource(
-                        QTextDocument.ImageResource,
-                        imageUri,
-                        image
-                    )
-                    imageFormat = QTextImageFormat()
-                    imageFormat.setWidth(image.width())
-                    imageFormat.setHeight(image.height())
-                    imageFormat.setName(imageUri.toString())
-                    document_cursor.insertImage(imageFormat)
-                    document_cursor.setCharFormat(self.txt_formats[block_data["style"]])                
-                else:
-                    current_format = self.txt_formats[block_data["style"]]
-                    current_format.setForeground(self.highlight_colors[el.element])            
-                    document_cursor.insertText(el.to_text(), current_format)
-            self.send_message.emit(f"Loading paragraph {document_cursor.blockNumber()} of {len(json_document)}")
-            QApplication.processEvents()
+            paragraphs.append(block_data)
+        if len(paragraphs) > self.window_threshold:
+            self.send_message.emit(f"Loading {len(paragraphs)} paragraphs, text is added when scrolled to.")
+            self.insert_unloaded_blocks(document_cursor, paragraphs)
+            last_block = self.document().blockCount() - 1
+            self.load_blocks(last_block - self.window_margin, last_block)
+            document_cursor.movePosition(QTextCursor.End)
+            self.setTextCursor(document_cursor)
+            self.load_visible_blocks()
+        else:
+            self.insert_blocks(document_cursor, paragraphs)
+            self.setTextCursor(document_cursor)
         if document_cursor.block().userData() is None:
             document_cursor.block().setUserData(BlockUserData())
             self.to_next_style()
+        self.rebuild_stroke_index()
         self.undo_stack.clear()
         self.send_message.emit("Loaded transcript.")   
 
+    def insert_blocks(self, document_cursor, paragraphs):
+        """Insert paragraphs at cursor as one edit, with editor updates disabled.
+
+        Layout is done once at the end instead of after every insert. Progress is 
+        sent every ``load_progress_interval`` paragraphs.
+
+        :param document_cursor: ``QTextCursor`` at start of empty document
+        :param list paragraphs: ``BlockUserData`` of each paragraph
+        """
+        updates = self.updatesEnabled()
+        self.setUpdatesEnabled(False)
+        document_cursor.beginEditBlock()
+        try:
+            for par_number, block_data in enumerate(paragraphs):
+                document_cursor.block().setUserData(block_data)
+                document_cursor.block().setUserState(blockState.DEFAULT)
+                self.insert_block_text(document_cursor, block_data)
+                if par_number % self.load_progress_interval == 0:
+                    self.send_message.emit(f"Loading paragraph {par_number} of {len(paragraphs)}")
+                    QApplication.processEvents()
+        finally:
+            document_cursor.endEditBlock()
+            self.setUpdatesEnabled(updates)
+
+    def insert_block_text(self, document_cursor, block_data, end_block = True):
+        """Insert text of paragraph elements at cursor, with paragraph style and highlighting.
+
+        Text of adjacent elements with the same highlight color is inserted together.
+
+        :param document_cursor: ``QTextCursor`` at start of empty block
+        :param block_data: ``BlockUserData`` of paragraph
+        :param bool end_block: insert the new line ending the paragraph, 
+            starting the next block
+        """
+        el_list = block_data.return_all()["strokes"]
+        if isinstance(el_list, lazy_collection) and el_list.has_element("image"):
+            el_list = el_list.materialize()
+            block_data["strokes"] = el_list
+        document_cursor.setBlockFormat(self.par_formats[block_data["style"]])
+        document_cursor.setCharFormat(self.txt_formats[block_data["style"]])
+        if isinstance(el_list, lazy_collection):
+            texts = [(el_type, el_text, None) for el_type, el_text in el_list.texts()]
+        else:
+            texts = [(el.element, el.to_text(), el) for el in el_list]
+        if not end_block and texts and texts[-1][1].endswith("\n"):
+            el_type, el_text, el = texts[-1]
+            texts[-1] = (el_type, el_text[:-1], el)
+        # runs of (color, texts, element), color is None for images
+        runs = []
+        for el_type, el_text, el in texts:
+            color = None if el_type == "image" else self.highlight_colors[el_type]
+            if color is not None and runs and runs[-1][0] is not None and runs[-1][0] == color:
+                runs[-1][1].append(el_text)
+            else:
+                runs.append((color, [el_text], el))
+        current_format = self.txt_formats[block_data["style"]]
+        for color, run, el in runs:
+            if color is None:
+                i_path = self.file_name / pathlib.Path(el.path)
+                imageUri = QUrl(i_path.as_uri())
+                el.path = i_path.as_posix()
+                image = QImage(QImageReader(el.path).read())
+                self.document().addResource(
+                    QTextDocument.ImageResource,
+                    imageUri,
+                    image
+                )
+                imageFormat = QTextImageFormat()
+                imageFormat.setWidth(image.width())
+                imageFormat.setHeight(image.height())
+                imageFormat.setName(imageUri.toString())
+                document_cursor.insertImage(imageFormat)
+                document_cursor.setCharFormat(self.txt_formats[block_data["style"]])                
+            else:
+                current_format.setForeground(color)
+                document_cursor.insertText("".join(run), current_format)
+
+    def insert_unloaded_blocks(self, document_cursor, paragraphs):
+        """Add a block for each paragraph without inserting its text.
+
+        Blocks are marked ``blockState.UNLOADED`` and get a fixed height estimated 
+        from the length of the text, so the scrollbar reflects the whole transcript. 
+        Text is inserted by ``load_blocks`` when a block is scrolled to, 
+        has the cursor or is searched.
+
+        :param document_cursor: ``QTextCursor`` at start of empty document
+        :param list paragraphs: ``BlockUserData`` of each paragraph
+        """
+        last_text = paragraphs[-1].return_all()["strokes"].to_text()
+        document_cursor.insertText("\n" * (len(paragraphs) - 1 + last_text.endswith("\n")))
+        block = self.document().firstBlock()
+        estimates = {}
+        width = max(self.viewport().width(), 1)
+        document_cursor.beginEditBlock()
+        for block_data in paragraphs:
+            style = block_data["style"]
+            if style not in estimates:
+                metrics = QFontMetrics(self.txt_formats[style].font())
+                estimates[style] = (max(metrics.averageCharWidth(), 1), metrics.lineSpacing())
+            char_width, line_height = estimates[style]
+            text_length = sum(len(el.get("data", "")) for el in block_data.return_all()["strokes"].to_json())
+            lines = max(1, ceil(text_length * char_width / width))
+            block_format = QTextBlockFormat(self.par_formats[style])
+            block_format.setLineHeight(lines * line_height, QTextBlockFormat.FixedHeight.value)
+            document_cursor.setPosition(block.position())
+            document_cursor.setBlockFormat(block_format)
+            block.setUserData(block_data)
+            block.setUserState(blockState.UNLOADED)
+            block = block.next()
+        document_cursor.endEditBlock()
+        self.unloaded_blocks = len(paragraphs)
+
     def load_tape(self):
-        """Load tape data."""
+        """Load tape data, lines are indexed on a separate thread."""
         transcript_tape = self.file_name.joinpath(self.file_name.stem).with_suffix(".tape")
         if pathlib.Path(transcript_tape).is_file():
             self.send_message.emit("Tape file found, loading.")
-            self.tape = transcript_tape.read_text()
-            self.send_message.emit("Loaded tape.")
+        self.tape.open(transcript_tape, background = True)
+
+    def index_tape(self, new_session = False):
+        """Wait until tape is indexed, on ``load`` stage.
+
+        :param bool new_session: write new session file once tape is indexed
+        """
+        self.tape.wait()
+        if new_session:
+            self.write_session()
+        self.send_message.emit(f"Loaded tape of {len(self.tape)} strokes.")
 
     def save(self):
         """Save transcript."""
@@ -315,6 +545,10 @@ class PloverCATEditor(QTextEdit):
         if str(self.config["style"]).endswith(".json"):
             self.save_style_file()
         self.undo_stack.setClean()
+        self.tape.flush(sync = True)
+        # session file of tape stage is written first
+        self.wait_open_stage("tape")
+        self.write_session()
         self.dulwich_save(message = "user save")
         self.send_message.emit("Saved project data")  
 
@@ -329,6 +563,7 @@ class PloverCATEditor(QTextEdit):
         transcript_name = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")        
         self.save_transcript(transcript_name)
         transcript_tape = self.file_name.joinpath(self.file_name.stem).with_suffix(".tape")
+        self.tape.flush()
         if transcript_tape.exists():
             new_tape = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".tape")
             copyfile(transcript_tape, new_tape)
@@ -346,59 +581,236 @@ class PloverCATEditor(QTextEdit):
             audio_dir = transcript_dir / "audio"
             copytree(self.file_name.joinpath("audio"), audio_dir)            
 
-    def save_transcript(self, path): 
-        """Extract transcript steno data and save.
+    def update_backup_document(self):
+        """Update backup document with data from changed paragraphs.
 
-        :param path: transcript file path
-        """     
+        Every paragraph from the first changed one is updated, as block numbers 
+        after an added or removed paragraph have shifted.
+
+        :return: list of journal entries for the changes, ending with 
+            the number of tape lines written into the document
+        """
+        if self.backup_shared:
+            # snapshots keep the old dict, paragraph dicts are shared
+            self.backup_document = dict(self.backup_document)
+            self.backup_shared = False
         json_document = self.backup_document
+        entries = []
         self.send_message.emit("Extracting block data for transcript save")
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        self.send_message.emit("Saving transcript data.")
         block = self.document().begin()
         status = 0
         for i in range(self.document().blockCount()):
-            if block.userState() & blockState.CHANGE:
+            if block.userState() & blockState.CHANGE and status == 0:
                 status = 1
+                self.first_unsaved = i if self.first_unsaved is None else min(self.first_unsaved, i)
             if status == 1:
                 if block.userData():
-                    block_dict = deepcopy(block.userData().return_all())
+                    block_dict = dict(block.userData().return_all())
                 else:
                     continue
                 block_num = block.blockNumber()
+                # new element dicts, the paragraph dict is replaced and never changed
                 block_dict["strokes"] = block_dict["strokes"].to_json()
                 json_document[str(block_num)] = block_dict
-                block.setUserState(blockState.DEFAULT)
+                entries.append({"upsert": str(block_num), "data": block_dict})
+                block.setUserState(blockState.UNLOADED if self.block_unloaded(block) else blockState.DEFAULT)
             if block == self.document().lastBlock():
                 break
             block = block.next()      
-        self.send_message.emit(f"Saving transcript data to {str(path)}")
         if len(json_document) > self.document().blockCount():
             for num in range(self.document().blockCount(), len(json_document)):
                 self.send_message.emit(f"Extra paragraphs in backup document. Removing {num}.")
                 json_document.pop(str(num), None)
+            entries.append({"truncate": self.document().blockCount()})
+            self.first_unsaved = min(self.first_unsaved if self.first_unsaved is not None else len(json_document), len(json_document))
+        entries.append({"tape": len(self.tape)})
+        return(entries)
+
+    def snapshot(self):
+        """Return transcript data as of the last update, for use while editing continues.
+
+        Paragraph dicts in ``backup_document`` are replaced on update, not changed, 
+        and ``update_backup_document`` copies the paragraph mapping before changing it, 
+        so the snapshot costs nothing and is not affected by later edits.
+
+        :return: transcript dict of form ``{"par_number": {paragraph data}, ...}``, 
+            to be read only
+        """
+        self.backup_shared = True
+        return(self.backup_document)
+
+    def save_transcript(self, path): 
+        """Extract transcript steno data and save.
+
+        Saving to the project transcript replaces the journal. Saving anywhere else 
+        adds the changes to the journal, as they are no longer marked as changed.
+
+        :param path: transcript file path
+        """     
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        self.send_message.emit("Saving transcript data.")
+        entries = self.update_backup_document()
+        json_document = self.backup_document
+        self.send_message.emit(f"Saving transcript data to {str(path)}")
         if not json_document:
             json_document = {}
-        save_json(json_document, path)
+        project_transcript = pathlib.Path(path) == self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
+        if not project_transcript:
+            first_dirty = 0
+        elif self.first_unsaved is None:
+            first_dirty = len(json_document)
+        else:
+            first_dirty = self.first_unsaved
+        save_transcript_file(json_document, path, binary = self.config["transcript_format"] == "binary", 
+                                shard_size = self.config["shard_size"] if self.config["transcript_format"] == "sharded" else 0, 
+                                first_dirty = first_dirty)
+        if project_transcript:
+            self.discard_journal()
+            self.first_unsaved = None
+        else:
+            self.write_journal(entries)
         QApplication.restoreOverrideCursor()
         return True
 
     def autosave(self):
-        """Save transcript data to backup file."""
+        """Save changed paragraphs to transcript journal.
+
+        Only the changed paragraphs are collected here. The journal is written 
+        by ``writer`` on its thread, in order with other writes, and 
+        ``send_message`` is emitted from there when done.
+        """
         if self.undo_stack.isClean():
             return
-        transcript_dir = pathlib.Path(self.file_name)
-        transcript_name = "." + str(transcript_dir.stem) + ".transcript"
-        transcript = transcript_dir / transcript_name
-        self.send_message.emit(f"Autosaving to {transcript}.")
+        self.send_message.emit(f"Autosaving to {self.journal_path()}.")
+        self.writer.call(self.write_journal, self.update_backup_document(), self.snapshot(), "Autosave complete.")
+
+    def journal_path(self, transcript = None):
+        """Return path of journal for transcript file.
+
+        :param transcript: transcript file path, default the project transcript
+        """
+        if transcript is None:
+            transcript = self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
         transcript = pathlib.Path(transcript)
-        if transcript.exists():
-            transcript.unlink()
-        save_res = self.save_transcript(transcript)       
-        if save_res and os.name == "nt":
+        return(transcript.with_name("." + transcript.stem + ".journal"))
+
+    def write_journal(self, entries, document = None, message = None):
+        """Append entries to journal, and compact if journal is too long.
+
+        The journal holds changes since the last save, on top of the 
+        project transcript. Once there are more than ``journal_limit`` entries, 
+        the backup document is written to a hidden snapshot and a new 
+        journal on top of the snapshot replaces the old one.
+
+        :param list entries: journal entries from ``update_backup_document``
+        :param dict document: transcript data with the entries applied, 
+            default ``backup_document``
+        :param str message: message to send when done
+        """
+        # journal writes queued by autosave go first
+        self.writer.flush()
+        if document is None:
+            document = self.backup_document
+        journal = self.journal_path()
+        new_journal = not journal.exists()
+        append_journal(entries, journal, base = self.file_name.stem + ".transcript")
+        self.journal_entries += len(entries)
+        if self.journal_entries > self.journal_limit:
+            transcript_dir = pathlib.Path(self.file_name)
+            snapshot = transcript_dir / ("." + str(transcript_dir.stem) + ".transcript")
+            self.send_message.emit(f"Compacting journal into {snapshot}.")
+            # write new files aside and replace, a crash leaves old journal usable
+            temp_snapshot = snapshot.with_suffix(".transcript.tmp")
+            save_transcript_file(document, temp_snapshot, binary = self.config["transcript_format"] == "binary")
+            os.replace(temp_snapshot, snapshot)
+            temp_journal = journal.with_suffix(".journal.tmp")
+            if temp_journal.exists():
+                temp_journal.unlink()
+            # the snapshot covers the same tape lines as the old journal
+            append_journal([entry for entry in entries if "tape" in entry][-1:], temp_journal, base = snapshot.name)
+            os.replace(temp_journal, journal)
+            self.journal_entries = 0
+            new_journal = True
+            if os.name == "nt":
+                hide_file(str(snapshot))
+        if new_journal and os.name == "nt":
             # hide file on windows systems
-            hide_file(str(transcript))
-            self.send_message.emit("Autosave complete.")
+            hide_file(str(journal))
+        if message:
+            self.send_message.emit(message)
+
+    def discard_journal(self):
+        """Remove journal of unsaved changes, and snapshot of compacted journal."""
+        self.writer.flush()
+        journal = self.journal_path()
+        if journal.exists():
+            journal.unlink()
+        snapshot = self.file_name / ("." + str(self.file_name.stem) + ".transcript")
+        if snapshot.exists():
+            snapshot.unlink()
+        self.journal_entries = 0
+
+    def session_path(self):
+        """Return path of session file for project transcript."""
+        return(self.file_name / ("." + str(self.file_name.stem) + ".session"))
+
+    def write_session(self):
+        """Write session file with number of tape lines in saved transcript."""
+        session = self.session_path()
+        new_session = not session.exists()
+        save_json({"tape": len(self.tape)}, session)
+        if new_session and os.name == "nt":
+            hide_file(str(session))
+
+    def recover_from_tape(self, session):
+        """Write strokes from tape that were not saved when transcript was last open.
+
+        The session file holds the number of tape lines in the saved transcript, 
+        and each journal write adds the number of lines in the journalled transcript. 
+        Tape lines after those are translated with ``tape_translator`` and written 
+        as unsaved changes, starting where the cursor was after the last 
+        kept stroke. The changes are written to the journal right away.
+
+        :param session: path of session file left by last session
+        """
+        try:
+            with open(session, "r") as f:
+                start = json.loads(f.read())["tape"]
+        except (OSError, ValueError, KeyError) as e:
+            log.error(f"Session file {str(session)} unreadable, strokes not recovered: {e}")
+            return
+        journal = self.journal_path()
+        if journal.exists():
+            for entry in read_journal(journal)[1]:
+                start = entry.get("tape", start)
+        if start >= len(self.tape) or not self.engine:
+            return
+        self.send_message.emit(f"Transcript was not closed, writing {len(self.tape) - start} strokes from tape.")
+        translator = tape_translator(self.engine.dictionaries, self.engine.config["space_placement"])
+        position = self.tape.position(start - 1) if start > 0 else None
+        self.undo_stack.beginMacro("Recover strokes from tape")
+        try:
+            for index in range(start, len(self.tape)):
+                fields = self.tape.fields(index)
+                if len(fields) < 4:
+                    continue
+                stroke = tape_stroke(fields[3])
+                self.last_backspaces_sent, self.last_string_sent = translator.translate(stroke)
+                if position:
+                    # cursor moves between strokes are not on tape, writing continues from last stroke
+                    self.navigate_to(min(position[0], self.document().blockCount() - 1))
+                    editor_cursor = self.textCursor()
+                    editor_cursor.setPosition(editor_cursor.block().position() + min(position[1], editor_cursor.block().length() - 1))
+                    self.setTextCursor(editor_cursor)
+                if self.last_string_sent or self.last_backspaces_sent:
+                    self.on_stroke(stroke, stroke_time = fields[0])
+                position = self.tape.position(index)
+        finally:
+            self.undo_stack.endMacro()
+            self.last_string_sent = ""
+            self.last_backspaces_sent = 0
+        self.autosave()
+        self.send_message.emit(f"Recovered strokes from tape, {len(self.tape) - start} strokes.")
          
     def close_transcript(self, force = False):
         """Clean up transcript for close.
@@ -414,46 +826,81 @@ class PloverCATEditor(QTextEdit):
                 else:
                     log.debug("Abort project close because of unsaved changes.")
                     return False
+        # changes not saved by user are not kept
+        self.discard_journal()
+        if self.session_path().exists():
+            self.session_path().unlink()
         self.restore_dictionary_from_backup(self.engine)
         if self.recorder.recorderState() != QMediaRecorder.StoppedState:
             self.recorder.stop()
         if self.player.playbackState() != QMediaPlayer.StoppedState:
             self.player.stop() 
+        self.wait_open_stage()
+        self.tape.close()
+        self.writer.close()
+        if self.versioning:
+            self.versioning.close()
         return True        
 
     def clear_transcript(self):
         """Clears all transcript data.
         """
         self.clear()
+        self.unloaded_blocks = 0
         self.backup_document = {}
+        self.rebuild_stroke_index()
 
     def dulwich_save(self, message = "autosave"):
         """Commit transcript files to ``dulwich`` repo.
 
+        The commit is made by ``versioning`` on its thread, only 
+        changed files are added.
+
         :param str message: commit message
         """
+        self.wait_open_stage("git")
+        self.versioning.commit(self.dulwich_files(), message = message)
+
+    def dulwich_files(self):
+        """Return paths of transcript files kept in ``dulwich`` repo."""
         transcript_dicts = self.file_name / "dict"
         available_dicts = [transcript_dicts / file for file in transcript_dicts.iterdir()]
         transcript = self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
         transcript_tape = self.file_name.joinpath(self.file_name.stem).with_suffix(".tape")
         files = [transcript, transcript_tape] + available_dicts
-        porcelain.add(self.repo.path, paths = files)
-        porcelain.commit(self.repo, message = message, author = "plover2CAT <fake_email@fakedomain.com>", committer= "plover2CAT <fake_email@fakedomain.com>")
+        shards = shard_dir(transcript)
+        if shards.exists():
+            files += sorted(shards.iterdir())
+        return(files)
 
     def get_dulwich_commits(self):
         """Get most recent commits from ``dulwich`` repo."""
+        self.wait_open_stage("git")
+        self.versioning.flush()
         commit_choices = return_commits(self.repo)
         return(commit_choices)
 
     def revert_transcript(self, commit_id):
         """Revert transcript to previous commit based on commit id.
+
+        For a sharded transcript, only shards that differ from the commit are written.
         """
         transcript = str(self.file_name.stem) + (".transcript")
-        porcelain.reset_file(self.repo, transcript, commit_id)
+        self.wait_open_stage("git")
+        self.versioning.flush()
+        restore_files(self.file_name, commit_id, [transcript])
+        transcript_path = self.file_name / transcript
+        if transcript_path.exists() and not is_container(transcript_path):
+            with open(transcript_path, "r") as f:
+                manifest = json.loads(f.read())
+            if is_manifest(manifest):
+                restored = restore_files(self.file_name, commit_id, manifest["shards"]["files"])
+                self.send_message.emit(f"Restored {len(restored)} of {len(manifest['shards']['files'])} shards.")
         new_commit_message = "revert to %s" % commit_id.decode("ascii")
         self.dulwich_save(message=new_commit_message)
         self.undo_stack.clear()
         self.clear()
+        self.discard_journal()
         transcript = self.file_name.joinpath(self.file_name.stem).with_suffix(".transcript")
         if pathlib.Path(transcript).is_file():
             self.load_transcript(transcript)
@@ -480,11 +927,13 @@ class PloverCATEditor(QTextEdit):
         new_vals = {"page_line_numbering": False, "page_linenumbering_increment": 1, "page_timestamp": False, "page_max_char": 0, "page_max_line": 0, 
                     "header_left": "", "header_center": "", "header_right": "", 
                     "footer_left": "", "footer_center": "", "footer_right": "", "enable_automatic_affix": False,
-                    "user_field_dict": user_field_dict, "auto_paragraph_affixes": {}}
+                    "user_field_dict": user_field_dict, "auto_paragraph_affixes": {}, "transcript_format": "json", 
+                    "tape_fsync_interval": 0, "shard_size": 1000}
         new_vals.update(config_contents)
         self.config = new_vals
         self.user_field_dict = self.config["user_field_dict"]
         self.auto_paragraph_affixes = self.config["auto_paragraph_affixes"]
+        self.writer.fsync_interval = self.config["tape_fsync_interval"]
 
     def save_config_file(self, config_path = None):
         """Save configuration file.
@@ -506,13 +955,21 @@ class PloverCATEditor(QTextEdit):
         self.undo_stack.push(cmd)
 
     def load_spellcheck_dict(self, dic_path = "en_US"):
-        """Load spellchecking dictionary for ``spylls``.
+        """Set spellchecking dictionary for ``spylls``, loaded when ``dictionary`` is first used.
         
         :param str dic_path: language code or path to dic files
         """
-        stemmed_path = str(dic_path).removesuffix(".dic")
-        self.dictionary = Dictionary.from_files(stemmed_path)
+        self.dictionary_path = dic_path
         self.dictionary_name = pathlib.Path(dic_path).stem
+        self._dictionary = None
+
+    @property
+    def dictionary(self):
+        """``spylls`` dictionary for spellcheck, from ``get_dictionary`` on first use."""
+        if self._dictionary is None:
+            self.send_message.emit(f"Loading spellcheck dictionary {self.dictionary_name}.")
+            self._dictionary = get_dictionary(self.dictionary_path, self.spellcheck_cache)
+        return(self._dictionary)
 
     def load_dicts(self, engine, dictionaries = None):
         """Load dictionaries for transcript.
@@ -762,6 +1219,9 @@ class PloverCATEditor(QTextEdit):
         """
         if not block:
             block = self.textCursor().block()
+        if self.block_unloaded(block):
+            # styled when loaded
+            return
         if block.userData():
             block_data = block.userData()
             block_style = block.userData()["style"]
@@ -814,11 +1274,12 @@ class PloverCATEditor(QTextEdit):
             new_style = style_data[previous_style]["nextstylename"]
         self.set_paragraph_style(new_style)
         
-    def on_stroke(self, stroke_pressed, end = False):
+    def on_stroke(self, stroke_pressed, end = False, stroke_time = None):
         """Write.
 
         :param stroke_pressed: stroke sent to Plover
         :param bool end: always append writing to end of transcript
+        :param str stroke_time: time of stroke in ISO format, default now
         """
         current_cursor = self.textCursor()
         # if cursor should be locked to end
@@ -827,7 +1288,8 @@ class PloverCATEditor(QTextEdit):
             self.setTextCursor(current_cursor)
             current_cursor = self.textCursor()          
         current_block = current_cursor.block()        
-        stroke_time = datetime.now().isoformat("T", "milliseconds")
+        if not stroke_time:
+            stroke_time = datetime.now().isoformat("T", "milliseconds")
         self.update_block_times(current_block, stroke_time)
         # gather info from Plover hooks
         string_sent = self.last_string_sent
@@ -849,8 +1311,7 @@ class PloverCATEditor(QTextEdit):
             self.track_lengths.append(-1 * backspaces_sent)
             holding_space = backspaces_sent
             current_strokes = current_cursor.block().userData()["strokes"]
-            start_pos = backtrack_coord(current_cursor.positionInBlock(), backspaces_sent, 
-                        current_strokes.lens(), current_strokes.lengths())
+            start_pos = current_strokes.backtrack(current_cursor.positionInBlock(), backspaces_sent)
             self.undo_stack.beginMacro(f"Remove: {backspaces_sent} backspaces(s).") 
             # does backspace extend before present paragraph?
             if start_pos < 0:
@@ -870,14 +1331,14 @@ class PloverCATEditor(QTextEdit):
                         start_pos = 0
                         break
                     current_strokes = current_cursor.block().userData()["strokes"]
-                    start_pos = backtrack_coord(current_cursor.positionInBlock(), holding_space, current_strokes.lens(), current_strokes.lengths())
+                    start_pos = current_strokes.backtrack(current_cursor.positionInBlock(), holding_space)
                     log.debug(f"New starting position: {start_pos}.")
                 current_cursor.setPosition(current_cursor.block().position() + start_pos, QTextCursor.KeepAnchor)
                 self.setTextCursor(current_cursor)
                 self.cut_steno(store=False)
             else:
                 end_pos = current_cursor.position() - current_block.position()
-                start_pos = backtrack_coord(end_pos, backspaces_sent, current_block.userData()["strokes"].lens(), current_block.userData()["strokes"].lengths())
+                start_pos = current_block.userData()["strokes"].backtrack(end_pos, backspaces_sent)
                 remove_cmd = steno_remove(current_cursor, self, current_cursor.blockNumber(), start_pos, end_pos - start_pos)
                 self.undo_stack.push(remove_cmd)
             self.last_backspaces_sent = 0
@@ -930,12 +1391,7 @@ class PloverCATEditor(QTextEdit):
         audio_time = self.get_audio_time()
         log_string = "{0}|{1}|({2},{3})\t|{4}|".format(self.stroke_time, audio_time, self.cursor_block, self.cursor_block_position, steno)
         self.send_tape.emit(log_string)
-        self.tape = "\n".join([self.tape, log_string])
-        # self.tape.append(log_string + "\n")
-        transcript_tape = self.file_name.joinpath(self.file_name.stem).with_suffix(".tape")
-        with open(transcript_tape, "a") as f:
-            f.write(log_string)
-            f.write("\n")
+        self.tape.append(log_string)
 
     def update_block_times(self, block, edit_time):
         """Update paragraph timestamps.
@@ -1023,6 +1479,47 @@ class PloverCATEditor(QTextEdit):
         if store:
             return(result)
 
+    def rebuild_stroke_index(self):
+        """Rebuild stroke index from all paragraphs."""
+        collections = []
+        block = self.document().firstBlock()
+        while block.isValid():
+            if block.userData():
+                # return_all so lazy paragraphs are not made into elements
+                collections.append(block.userData().return_all()["strokes"])
+            else:
+                collections.append(element_collection())
+            block = block.next()
+        self.stroke_index.reset(collections)
+
+    def steno_candidates(self, steno):
+        """Return block numbers of paragraphs that may contain steno outline.
+
+        The index is rebuilt if paragraphs were added or removed outside of undo commands.
+
+        :param str steno: steno outline
+        :return: sorted list of block numbers
+        """
+        if len(self.stroke_index) != self.document().blockCount():
+            log.debug("Stroke index out of sync, rebuilding.")
+            self.rebuild_stroke_index()
+        return(self.stroke_index.candidates(steno))
+
+    def block_stroke_matches(self, block, matcher):
+        """Return steno matches in paragraph, refreshing its index entry if there are none.
+
+        :param block: a ``QTextBlock``
+        :param matcher: a ``stroke_matcher``
+        :return: list of tuples of start, end position in block and query index
+        """
+        if not block.userData():
+            return([])
+        block_strokes = block.userData()["strokes"]
+        matches = block_strokes.stroke_matches(matcher)
+        if not matches:
+            self.stroke_index.refresh(block.blockNumber(), block_strokes)
+        return(matches)
+
     def replace(self, steno = "", replace_term = None):
         """Replace selected text with stroke element.
 
@@ -1054,7 +1551,7 @@ class PloverCATEditor(QTextEdit):
             else:
                 block_strokes = current_cursor.block().userData()["strokes"]
                 # "delete" means removing one ahead, so has to "reverse" to get start pos
-                start_pos = backtrack_coord(current_cursor.positionInBlock() + 1, 1, block_strokes.lens(), block_strokes.lengths())
+                start_pos = block_strokes.backtrack(current_cursor.positionInBlock() + 1, 1)
                 current_cursor.movePosition(QTextCursor.Right, QTextCursor.MoveAnchor)
                 current_cursor.setPosition(current_cursor.block().position() + start_pos, QTextCursor.KeepAnchor)
                 self.setTextCursor(current_cursor)
@@ -1109,6 +1606,7 @@ class PloverCATEditor(QTextEdit):
 
         :param dict new_field_dict: updated field dict
         """
+        self.load_all_blocks()
         current_cursor = self.textCursor()
         update_cmd = update_field(current_cursor, self, current_cursor.blockNumber(), current_cursor.positionInBlock(), self.user_field_dict, new_field_dict)
         self.undo_stack.push(update_cmd) 
@@ -1171,6 +1669,7 @@ class PloverCATEditor(QTextEdit):
         :param dict old: existing indices data
         :param dict new: new indices data
         """
+        self.load_all_blocks()
         current_cursor = self.textCursor()
         current_block = current_cursor.blockNumber()
         start_pos = current_cursor.positionInBlock()            
@@ -1276,6 +1775,133 @@ class PloverCATEditor(QTextEdit):
         self.setTextCursor(current_cursor)
         log.debug(f"Editor cursor set to start of block {block_number}.")
 
+    def block_unloaded(self, block):
+        """Check if text of paragraph has not been inserted into the document yet.
+
+        :param block: a ``QTextBlock``
+        """
+        state = block.userState()
+        return(state != -1 and bool(state & blockState.UNLOADED))
+
+    def load_blocks(self, first, last):
+        """Insert text of unloaded paragraphs from ``first`` to ``last`` block number, inclusive.
+
+        The editor cursor keeps its position in its paragraphs.
+
+        :return: ``True`` if any paragraph was loaded
+        """
+        if not self.unloaded_blocks or self.loading_blocks:
+            return(False)
+        first = max(first, 0)
+        last = min(last, self.document().blockCount() - 1)
+        block = self.document().findBlockByNumber(first)
+        cursor_place = self.cursor_place()
+        document_cursor = QTextCursor(self.document())
+        loaded = False
+        self.loading_blocks = True
+        try:
+            document_cursor.beginEditBlock()
+            while block.isValid() and block.blockNumber() <= last:
+                if self.block_unloaded(block):
+                    document_cursor.setPosition(block.position())
+                    self.insert_block_text(document_cursor, block.userData(), end_block = False)
+                    block.setUserState(block.userState() & ~blockState.UNLOADED)
+                    self.unloaded_blocks -= 1
+                    loaded = True
+                block = block.next()
+            document_cursor.endEditBlock()
+            # a cursor at the start of a loaded block is moved to the end of the inserted text
+            if loaded and self.cursor_place() != cursor_place:
+                (anchor_block, anchor), (position_block, position) = cursor_place
+                editor_cursor = self.textCursor()
+                editor_cursor.setPosition(self.document().findBlockByNumber(anchor_block).position() + anchor)
+                editor_cursor.setPosition(self.document().findBlockByNumber(position_block).position() + position, QTextCursor.KeepAnchor)
+                self.setTextCursor(editor_cursor)
+        finally:
+            self.loading_blocks = False
+        return(loaded)
+
+    def cursor_place(self):
+        """Return block number and position in block of editor cursor anchor and position."""
+        editor_cursor = self.textCursor()
+        anchor_block = self.document().findBlock(editor_cursor.anchor())
+        return((anchor_block.blockNumber(), editor_cursor.anchor() - anchor_block.position()), 
+                (editor_cursor.blockNumber(), editor_cursor.positionInBlock()))
+
+    def load_all_blocks(self):
+        """Insert text of all unloaded paragraphs."""
+        if self.unloaded_blocks:
+            self.send_message.emit(f"Loading text of {self.unloaded_blocks} paragraphs.")
+            self.load_blocks(0, self.document().blockCount() - 1)
+
+    def load_visible_blocks(self):
+        """Insert text of unloaded paragraphs in view, and ``window_margin`` paragraphs around."""
+        if not self.unloaded_blocks or self.loading_blocks:
+            return
+        first = self.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.cursorForPosition(QPoint(0, self.viewport().height())).blockNumber()
+        self.load_blocks(first - self.window_margin, last + self.window_margin)
+
+    def load_cursor_blocks(self):
+        """Insert text of unloaded paragraphs under cursor or selection."""
+        if not self.unloaded_blocks or self.loading_blocks:
+            return
+        editor_cursor = self.textCursor()
+        first = self.document().findBlock(editor_cursor.selectionStart()).blockNumber()
+        last = self.document().findBlock(editor_cursor.selectionEnd()).blockNumber()
+        # neighbours too, merging and styling use them
+        self.load_blocks(first - 1, last + 1)
+
+    def load_matching_blocks(self, search, match):
+        """Insert text of unloaded paragraphs that may match a search, for searching the document.
+
+        Unloaded paragraphs do not change, so each search is only done once.
+
+        :param search: hashable description of search
+        :param match: function taking paragraph text, returning ``True`` if paragraph should be loaded
+        """
+        if not self.unloaded_blocks or search in self.loaded_searches:
+            return
+        block = self.document().firstBlock()
+        while block.isValid() and self.unloaded_blocks:
+            if self.block_unloaded(block) and match(self.block_text(block)):
+                self.load_blocks(block.blockNumber(), block.blockNumber())
+            block = block.next()
+        self.loaded_searches.add(search)
+
+    def block_text(self, block):
+        """Return text of paragraph, as ``block.text()`` once it is loaded.
+
+        :param block: a ``QTextBlock``
+        """
+        if not self.block_unloaded(block):
+            return(block.text())
+        text = block.userData().return_all()["strokes"].to_text()
+        if text.endswith("\n"):
+            text = text[:-1]
+        return(text)
+
+    def plain_text(self, editor_cursor = None):
+        """Return transcript text, including paragraphs not loaded yet.
+
+        :param editor_cursor: ``QTextCursor``, only return text after cursor position
+        :return: text with paragraphs separated by new lines
+        """
+        if not self.unloaded_blocks:
+            text = self.toPlainText()
+            return(text[editor_cursor.position():] if editor_cursor else text)
+        if editor_cursor:
+            block = editor_cursor.block()
+            texts = [self.block_text(block)[editor_cursor.positionInBlock():]]
+            block = block.next()
+        else:
+            block = self.document().firstBlock()
+            texts = []
+        while block.isValid():
+            texts.append(self.block_text(block))
+            block = block.next()
+        return("\n".join(texts))
+
     def get_audio_time(self, convert = True):
         """Get audio time from media.
 
@@ -135,3 +135,4 @@ class blockState(IntFlag):
     DEFAULT = 0
     CHANGE = 1
     READONLY = 2
+    UNLOADED = 4
@@ -7,9 +7,10 @@ from math import trunc
 from PySide6.QtCore import QObject, Signal
 from PySide6.QtGui import QFontMetrics
 from plover import log
-from plover_cat.helpers import ms_to_hours, return_commits, inch_to_spaces, write_command, pixel_to_in
-from plover_cat.steno_objects import element_collection, element_factory
+from plover_cat.helpers import ms_to_hours, ms_to_clock, return_commits, inch_to_spaces, write_command, pixel_to_in
+from plover_cat.steno_objects import element_factory
 from plover_cat.rtf_parsing import in_to_twip
+from plover_cat.transcript_container import load_transcript_file
 from plover_cat.export_helpers import recursive_style_format, format_text, txtprop_to_textformat, format_odf_text, format_srt_text
 from odf.opendocument import OpenDocumentText, load
 from odf.style import (Style, TextProperties, ParagraphProperties, FontFace, PageLayout, 
@@ -24,7 +25,9 @@ class documentWorker(QObject):
     Worker to create export files, with
     each ``save_*`` function creating one specific file format.
     
-    :param dict document: transcript data of form ``{"par_number": {paragraph data}, ...}``
+    :param document: transcript data of form ``{"par_number": {paragraph data}, ...}``, 
+        or path to a JSON or binary transcript file to read it from, 
+        the data is read only and can be shared with the editor
     :param str path: path for export file
     :param styles: dict of style parameters
     :param config: transcript configuration
@@ -36,6 +39,8 @@ class documentWorker(QObject):
     """Signal sent when export is finished."""
     def __init__(self, document, path, config, styles, user_field_dict, home_dir):
         QObject.__init__(self)  
+        if isinstance(document, (str, pathlib.PurePath)):
+            document = load_transcript_file(document)
         self.document = document
         self.path = path
         self.styles = styles
@@ -69,12 +74,7 @@ class documentWorker(QObject):
                 page_hspan = self.config["page_max_char"]
             if self.config["page_max_line"] != 0:
                 page_vspan = self.config["page_max_line"]
-            el_list = element_collection(
-                [
-                    ef.gen_element(element_dict=i, user_field_dict=self.user_field_dict)
-                    for i in block_data["strokes"]
-                ]
-            )
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict=self.user_field_dict)
             par_dict = format_text(el_list, block_style, page_hspan, line)
             doc_lines.update(par_dict)
             line = line + len(par_dict)
@@ -91,7 +91,7 @@ class documentWorker(QObject):
         if self.config["page_timestamp"]:
             for key, line in doc_lines.items():
                 text_line = doc_lines[key]["text"]
-                line_time = datetime.strptime(line["time"], "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
+                line_time = ms_to_clock(line["time"])
                 doc_lines[key]["text"] = f"{line_time} {text_line}"
         file_path = pathlib.Path(self.path)
         with open(file_path, "w", encoding="utf-8") as f:
@@ -135,7 +135,7 @@ class documentWorker(QObject):
                 page_hspan = self.config["page_max_char"]
             if self.config["page_max_line"] != 0:
                 page_vspan = self.config["page_max_line"]
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict = self.user_field_dict)
             par_dict = format_text(el_list, block_style, page_hspan, line)
             doc_lines.update(par_dict)
             line = line + len(par_dict)
@@ -152,7 +152,7 @@ class documentWorker(QObject):
         if self.config["page_timestamp"]:
             for key, line in doc_lines.items():
                 text_line = doc_lines[key]["text"]
-                line_time = datetime.strptime(line["time"], "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
+                line_time = ms_to_clock(line["time"])
                 doc_lines[key]["text"] = f"{line_time} {text_line}"
         file_path = pathlib.Path(self.path)
         root = ET.Element("html")
@@ -309,7 +309,7 @@ class documentWorker(QObject):
             if self.config["page_max_char"] != 0:
                 if page_vspan > self.config["page_max_char"]:
                     text_width = self.config["page_max_char"] / chars_in_inch
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict = self.user_field_dict)
             par_dict = format_odf_text(el_list, block_style, chars_in_inch, text_width, line)
             doc_lines.update(par_dict)
             line = line + len(par_dict)
@@ -326,7 +326,7 @@ class documentWorker(QObject):
                 # the new line causes an automatic line break
                 if self.config["page_timestamp"]:
                     line_time = par_dict[k]["time"]
-                    time_text = datetime.strptime(line_time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
+                    time_text = ms_to_clock(line_time)
                     line_frame = Frame(attributes = {"stylename": "Frame", "anchortype": "char", "x": "-1.5in", "width": "0.9in"})
                     line_textbox = TextBox()
                     line_frame.addElement(line_textbox)
@@ -377,7 +377,7 @@ class documentWorker(QObject):
         ef = element_factory() 
         wrapped_text = []
         for block_num, block_data in self.document.items():
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict = self.user_field_dict)
             wrapped_text += textwrap.wrap(el_list.to_text())
         self.progress.emit(int(block_num))
         page_number = 1
@@ -490,7 +490,7 @@ class documentWorker(QObject):
             par_style_string += self.styles[par_style]["rtf_txt_style"]
             steno_string.append(par_style_string)
             # strokes = block_data["strokes"]
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict = self.user_field_dict)
             stroke_count += el_list.stroke_count()
             steno_string.append(el_list.to_rtf())
             self.progress.emit(int(block_num))
@@ -543,13 +543,12 @@ class documentWorker(QObject):
         doc_lines = []
         log.debug(f"Exporting in SRT to {self.path}")
         for block_num, block_data in self.document.items():
+            audioendtime = block_data.get("audioendtime")
             if "audioendtime" not in block_data:
                 if str(int(block_num) + 1) in self.document and "audiostarttime" in self.document[str(int(block_num) + 1)]:
-                    block_data["audioendtime"] = self.document[str(int(block_num) + 1)]["audiostarttime"]
-                else:
-                    block_data["audioendtime"] = None
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            par_dict = format_srt_text(el_list, line_num = line_num, audiostarttime = block_data["audiostarttime"], audioendtime = block_data["audioendtime"])
+                    audioendtime = self.document[str(int(block_num) + 1)]["audiostarttime"]
+            el_list = ef.gen_collection(block_data["strokes"], user_field_dict = self.user_field_dict)
+            par_dict = format_srt_text(el_list, line_num = line_num, audiostarttime = block_data["audiostarttime"], audioendtime = audioendtime)
             line_num += len(par_dict)
             for k, v in par_dict.items():
                 doc_lines += [k]
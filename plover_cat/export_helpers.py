@@ -5,7 +5,7 @@ from json import load
 from PySide6.QtGui import QTextBlockFormat, QFont, QTextCharFormat, QTextOption
 from PySide6.QtCore import Qt
 from plover import log
-from plover_cat.steno_objects import element_collection, steno_wrapper
+from plover_cat.steno_objects import steno_wrapper
 from plover_cat.helpers import inch_to_spaces, in_to_pixel, remove_empty_from_dict
 from copy import deepcopy
 from odf.style import (Style, TextProperties, ParagraphProperties, TabStops, TabStop)
@@ -248,12 +248,10 @@ def steno_wrap_odf(block_data, max_char = 80, tab_space = 4, first_line_indent =
     # the -1 in max char is because the rounding is not perfect, might have some lines that just tip over
     wrapper = steno_wrapper(width = max_char - 1, initial_indent= first_line_indent,
                 subsequent_indent= par_indent, expand_tabs = False, tabsize = tab_space, replace_whitespace=False)
-    wrapped = wrapper.wrap(text = block_data)
-    begin_pos = 0
+    wrapped = wrapper.wrap_lines(text = block_data)
     par_dict = {}
-    for ind, i in enumerate(wrapped):
-        line_time = element_collection(i).collection_time()
-        par_dict[starting_line_num + ind + 1] = {"text": wrapped[ind], "time": line_time}
+    for ind, line in enumerate(wrapped):
+        par_dict[starting_line_num + ind + 1] = {"text": line["text"], "time": line["time"]}
     return(par_dict)
 
 def steno_wrap_srt(block_data, max_char = 47, tab_space = 0, first_line_indent = "", 
@@ -274,14 +272,10 @@ def steno_wrap_srt(block_data, max_char = 47, tab_space = 0, first_line_indent =
     # change from other wrapper here, tabs are expanded into 0 spaces
     wrapper = steno_wrapper(width = max_char - 1, initial_indent= first_line_indent,
                 subsequent_indent= par_indent, expand_tabs = True, tabsize = tab_space, replace_whitespace=False)
-    wrapped = wrapper.wrap(text = block_data)
-    begin_pos = 0
+    wrapped = wrapper.wrap_lines(text = block_data)
     par_dict = {}
-    for ind, i in enumerate(wrapped):
-        ec = element_collection(i)
-        start_time = ec.audio_time()
-        end_time = ec.audio_time(reverse = True)
-        par_dict[starting_line_num + ind + 1] = {"text": wrapped[ind], "starttime": start_time, "endtime": end_time}
+    for ind, line in enumerate(wrapped):
+        par_dict[starting_line_num + ind + 1] = {"text": line["text"], "starttime": line["starttime"], "endtime": line["endtime"]}
     return(par_dict)
 
 def load_odf_styles(path):
@@ -2,6 +2,8 @@ import pathlib
 import json
 import os
 import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from plover.config import DictionaryConfig
 from plover.oslayer.keyboardcontrol import KeyboardEmulation
 from plover import log
@@ -66,6 +68,61 @@ def hours_to_ms(hour_str):
     total_ms = int(milliseconds) + int(seconds) * 1000 + int(minutes) * 60000 + int(hours) * 3600000
     return(total_ms)
 
+epoch_start = datetime(1970, 1, 1)
+
+def timestamp_to_ms(timestamp = None):
+    """Convert timestamp to integer milliseconds since 1970-01-01T00:00:00.
+
+    Timestamps are naive local time and no timezone conversion is done,
+    so ``ms_to_timestamp`` returns the same string.
+
+    :param timestamp: ISO format string, milliseconds (returned as is),
+        or ``None``/empty string for current time
+    :return: milliseconds
+    :rtype: int
+    """
+    if isinstance(timestamp, int):
+        return(timestamp)
+    if not timestamp:
+        moment = datetime.now()
+    else:
+        try:
+            moment = datetime.fromisoformat(timestamp)
+        except ValueError:
+            # timestamps from RTF import may not be zero-padded
+            try:
+                moment = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f")
+            except ValueError:
+                moment = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S")
+        if moment.tzinfo:
+            moment = moment.replace(tzinfo = None)
+    # timedelta floor division is slow, done by parts
+    delta = moment - epoch_start
+    return(delta.days * 86400000 + delta.seconds * 1000 + delta.microseconds // 1000)
+
+def ms_to_timestamp(millis):
+    """Convert milliseconds since 1970-01-01T00:00:00 to ISO format string with milliseconds."""
+    return((epoch_start + timedelta(milliseconds = millis)).isoformat("T", "milliseconds"))
+
+@contextmanager
+def log_time(name):
+    """Log time taken by code in ``with`` block.
+
+    :param str name: name of step timed, for log
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        log.info(f"{name} took {(time.perf_counter() - start) * 1000:.1f} ms")
+
+def ms_to_clock(millis):
+    """Convert milliseconds since 1970-01-01T00:00:00 to hour:min:sec of the day."""
+    seconds = millis // 1000 % 86400
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return("%02d:%02d:%02d" % (hours, minutes, seconds))
+
 def in_to_pt(inch):
     """Convert inch to point."""
     inch = float(inch)
@@ -99,6 +156,80 @@ def save_json(json_dict, file_path):
         json.dump(json_dict, f, indent = 4)
         log.debug(f"Data saved in {str(file_path)}.")
 
+def append_journal(entries, file_path, base = None):
+    """Append entries to transcript journal, one JSON object per line.
+
+    A new journal starts with a header line naming the snapshot file 
+    the entries apply to.
+
+    :param list entries: dicts with ``upsert`` block number and ``data`` block dict, 
+        or ``truncate`` with block count
+    :param file_path: path to journal
+    :param str base: file name of snapshot, only used for new journal
+    """
+    file_path = pathlib.Path(file_path)
+    lines = []
+    if not file_path.exists():
+        lines.append(json.dumps({"base": base}))
+    elif file_path.stat().st_size > 0:
+        with open(file_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            # end line torn by crash, so new entries start on own line
+            if f.read(1) != b"\n":
+                lines.append("")
+    lines.extend(json.dumps(entry) for entry in entries)
+    if not any(lines):
+        return
+    with open(file_path, "a") as f:
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    log.debug(f"{len(entries)} entries appended to {str(file_path)}.")
+
+def read_journal(file_path):
+    """Read transcript journal.
+
+    Lines that were not completely written are skipped.
+
+    :param file_path: path to journal
+    :return: tuple of snapshot file name and list of entries
+    """
+    base = None
+    entries = []
+    with open(file_path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                log.debug(f"Incomplete journal line in {str(file_path)}, skipping.")
+                continue
+            if "base" in entry:
+                base = entry["base"]
+            else:
+                entries.append(entry)
+    return(base, entries)
+
+def apply_journal(json_document, entries):
+    """Apply journal entries to transcript dict in place.
+
+    :param dict json_document: transcript dict with block numbers as keys
+    :param list entries: journal entries, in order written
+    :return: transcript dict
+    """
+    for entry in entries:
+        if "upsert" in entry:
+            json_document[entry["upsert"]] = entry["data"]
+        elif "truncate" in entry:
+            for key in [key for key in json_document if key.isdigit() and int(key) >= entry["truncate"]]:
+                del json_document[key]
+    # paragraphs are loaded in dict order
+    ordered = sorted(json_document.items(), key = lambda item: int(item[0]) if item[0].isdigit() else -1)
+    json_document.clear()
+    json_document.update(ordered)
+    return(json_document)
+
 def add_custom_dicts(custom_dict_paths, dictionaries):
     """Takes list of dictionary paths, returns Plover dict config."""
     dictionaries = dictionaries[:]
@@ -14,24 +14,49 @@ from PySide6.QtGui import (
 )
 from PySide6.QtCore import QUrl
 from datetime import datetime
-from plover_cat.steno_objects import element_collection, stroke_text, automatic_text
+from plover_cat.steno_objects import element_collection, lazy_collection, stroke_text, automatic_text
+from plover_cat.helpers import ms_to_timestamp
 from plover_cat.constants import blockState
 
+class steno_log:
+    """Steno for edit logs, serialized only when the log line is written.
+
+    Elements are not changed once in a collection, so holding them is enough 
+    to log the steno as it was inserted.
+
+    :param steno: ``element_collection`` to log
+    """
+    __slots__ = ("elements",)
+    def __init__(self, steno):
+        self.elements = tuple(steno)
+    def __repr__(self):
+        return(repr([el.to_json() for el in self.elements]))
+
 class BlockUserData(QTextBlockUserData):
     """Representation of the data for a block.
     
     This was adapted from ninja-ide by using a default dict as ``attrs``
     in the class. An empty ``element_collection`` is set in ``self.attr["strokes"]``
     so every block will have an ``element_collection`` set.
+
+    ``strokes`` can be set to a ``lazy_collection``, it is turned into 
+    an ``element_collection`` the first time it is accessed through 
+    ``get`` or ``[]``. ``return_all`` returns it as is.
     """
     def __init__(self):
         QTextBlockUserData.__init__(self)
         self.attrs = collections.defaultdict(str)
         self.attrs["strokes"] = element_collection()
     def get(self, name, default=None):
-        return self.attrs.get(name, default)
+        if name in self.attrs:
+            return self[name]
+        return default
     def __getitem__(self, name):
-        return self.attrs[name]
+        value = self.attrs[name]
+        if isinstance(value, lazy_collection):
+            value = value.materialize()
+            self.attrs[name] = value
+        return value
     def __setitem__(self, name, value):
         self.attrs[name] = value
     def return_all(self):
@@ -112,6 +137,7 @@ class steno_insert(QUndoCommand):
             block_data["style"] = next(iter(self.document.txt_formats))
         log.debug("Insert: Insert text at %s" % str(current_block.position() + self.position_in_block))
         block_data["strokes"].insert_steno(self.position_in_block, self.steno)
+        self.document.stroke_index.add(self.block, self.steno)
         block_data = update_user_data(block_data, "edittime")
         current_block.setUserData(block_data)
         cursor_format = self.document.txt_formats[block_data["style"]]
@@ -121,8 +147,8 @@ class steno_insert(QUndoCommand):
             current_cursor.insertText(el.to_text(), cursor_format)
         current_block.setUserState(current_block.userState() | blockState.CHANGE)
         self.document.setTextCursor(current_cursor)
-        log_dict = {"action": "insert", "block": self.block, "position_in_block": self.position_in_block, "steno": self.steno.to_json()}
-        log.info(f"Insert: {log_dict}")
+        log_dict = {"action": "insert", "block": self.block, "position_in_block": self.position_in_block, "steno": steno_log(self.steno)}
+        self.document.writer.log("Insert: %s", log_dict)
         self.setText("Insert: %s" % self.steno.to_text())
     def undo(self):
         current_cursor = self.document.textCursor()
@@ -138,7 +164,7 @@ class steno_insert(QUndoCommand):
         current_block.setUserData(block_data)
         current_cursor.removeSelectedText()
         log_dict = {"action": "remove", "block": self.block, "position_in_block": self.position_in_block, "end": self.position_in_block + len(self.steno.to_text())}
-        log.info(f"Insert (undo): {log_dict}")
+        self.document.writer.log("Insert (undo): %s", log_dict)
         self.document.setTextCursor(current_cursor)
               
 class steno_remove(QUndoCommand):
@@ -176,7 +202,7 @@ class steno_remove(QUndoCommand):
         current_block.setUserState(current_block.userState() | blockState.CHANGE)
         self.document.setTextCursor(current_cursor)
         log_dict = {"action": "remove", "block": self.block, "position_in_block": self.position_in_block, "end": self.position_in_block + self.length}
-        log.info(f"Remove: {log_dict}")
+        self.document.writer.log("Remove: %s", log_dict)
         self.setText("Remove: %d backspace(s)" % len(self.steno))
     def undo(self):
         current_cursor = self.document.textCursor()
@@ -187,6 +213,7 @@ class steno_remove(QUndoCommand):
         self.document.setTextCursor(current_cursor)
         block_data = current_block.userData()
         res = block_data["strokes"].insert_steno(self.position_in_block, self.steno)
+        self.document.stroke_index.add(self.block, self.steno)
         block_data = update_user_data(block_data, "edittime")
         current_block.setUserData(block_data)
         cursor_format = self.document.txt_formats[block_data["style"]]
@@ -194,8 +221,8 @@ class steno_remove(QUndoCommand):
             cursor_format.setForeground(self.document.highlight_colors[el.element])
             # current_cursor.setCharFormat(cursor_format)
             current_cursor.insertText(el.to_text(), cursor_format)        
-        log_dict = {"action": "insert", "block": self.block, "position_in_block": self.position_in_block, "steno": self.steno.to_json()}
-        log.info(f"Remove (undo): {log_dict}")
+        log_dict = {"action": "insert", "block": self.block, "position_in_block": self.position_in_block, "steno": steno_log(self.steno)}
+        self.document.writer.log("Remove (undo): %s", log_dict)
         self.document.setTextCursor(current_cursor)
 
 class image_insert(QUndoCommand):
@@ -323,7 +350,7 @@ class split_steno_par(QUndoCommand):
             second_data = update_user_data(second_data, key = "audiostarttime", value = focal_stroke.audiotime)
         # update creationtime
         try:
-            second_data = update_user_data(second_data, key = "creationtime", value = second_part.data[0].time)
+            second_data = update_user_data(second_data, key = "creationtime", value = ms_to_timestamp(second_part.data[0].time))
         except Exception:
             second_data = update_user_data(second_data, key = "creationtime")
         second_data["strokes"] = second_part
@@ -335,10 +362,11 @@ class split_steno_par(QUndoCommand):
         new_block = current_block.next()
         current_block.setUserData(first_data)
         new_block.setUserData(second_data)
+        self.document.stroke_index.insert_block(self.block + 1, second_part)
         new_block.setUserState(current_block.userState() | blockState.CHANGE)
         self.setText("Split: paragraph %d at %d" % (self.block, self.position_in_block))
         log_dict = {"action": "split", "block": self.block, "position_in_block": self.position_in_block}
-        log.info(f"Split: {log_dict}")
+        self.document.writer.log("Split: %s", log_dict)
         self.block_state = current_block.userState()
         current_block.setUserState(current_block.userState() | blockState.CHANGE)
         current_cursor.movePosition(QTextCursor.StartOfBlock)
@@ -359,8 +387,9 @@ class split_steno_par(QUndoCommand):
         for key, item in self.block_data.items():
             restore_data = update_user_data(restore_data, key = key, value = item)
         current_block.setUserData(restore_data)
+        self.document.stroke_index.merge_block(self.block)
         log_dict = {"action": "merge", "block": self.block}
-        log.info(f"Split (undo): {log_dict}")
+        self.document.writer.log("Split (undo): %s", log_dict)
         self.document.setTextCursor(current_cursor)
 
 class merge_steno_par(QUndoCommand):
@@ -426,12 +455,13 @@ class merge_steno_par(QUndoCommand):
         if first_data["audioendtime"] != second_data["audioendtime"]:
             first_data = update_user_data(first_data, key = "audioendtime", value = second_data["audioendtime"])
         first_block.setUserData(first_data)
+        self.document.stroke_index.merge_block(self.block)
         self.block_state = first_block.userState()
         first_block.setUserState(first_block.userState() | blockState.CHANGE)
         current_cursor.deleteChar()
         current_cursor.setPosition(first_block.position() + self.position_in_block)
         log_dict = {"action": "merge", "block": self.block}
-        log.info(f"Merge: {log_dict}")
+        self.document.writer.log("Merge: %s", log_dict)
         self.document.setTextCursor(current_cursor)
         self.document.refresh_par_style(first_block)
         self.setText("Merge: paragraphs %d & %d" % (first_block_num, second_block_num))
@@ -461,9 +491,10 @@ class merge_steno_par(QUndoCommand):
         for key, item in self.second_data_dict.items():
             second_data = update_user_data(second_data, key = key, value = item)
         second_block.setUserData(second_data)
+        self.document.stroke_index.insert_block(second_block_num, second_data["strokes"])
         second_block.setUserState(second_block.userState() | blockState.CHANGE)
         log_dict = {"action": "split", "block": self.block, "position_in_block": self.position_in_block}
-        log.info(f"Merge (undo): {log_dict}")        
+        self.document.writer.log("Merge (undo): %s", log_dict)        
         self.document.setTextCursor(current_cursor)
         self.document.refresh_par_style(second_block)
 
@@ -509,7 +540,7 @@ class set_par_style(QUndoCommand):
         self.block_state = current_block.userState()
         current_block.setUserState(current_block.userState() | blockState.CHANGE)
         log_dict = {"action": "set_style", "block": self.block, "style": self.style}
-        log.info(f"Style: {log_dict}")
+        self.document.writer.log("Style: %s", log_dict)
     def undo(self):
         if self.old_style:
             current_block = self.document.document().findBlockByNumber(self.block)
@@ -518,7 +549,7 @@ class set_par_style(QUndoCommand):
             current_block.setUserData(block_data)
             self.document.refresh_par_style(current_block)      
             log_dict = {"action": "set_style", "block": self.block, "style": self.old_style}
-            log.info(f"Style: {log_dict}")
+            self.document.writer.log("Style: %s", log_dict)
 
 class set_par_property(QUndoCommand):
     """Set a paragraph's property.
@@ -655,10 +686,13 @@ class update_field(QUndoCommand):
                         current_cursor.setPosition(block.position() + start_pos)
                         current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
                         current_cursor.removeSelectedText()
+                        # element may be shared with copies and earlier commands
+                        el = block_strokes._own_element(ind)
                         el.user_dict = self.new_dict
                         cursor_format = self.document.txt_formats[block.userData()["style"]]
                         cursor_format.setForeground(self.document.highlight_colors["index"])
                         current_cursor.insertText(el.to_text(), cursor_format)
+                        block_strokes.reset_index(ind)
             if block == self.document.document().lastBlock():
                 break
             block = block.next()
@@ -682,11 +716,13 @@ class update_field(QUndoCommand):
                     current_cursor.setPosition(block.position() + start_pos)
                     current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
                     current_cursor.removeSelectedText()
+                    el = block_strokes._own_element(ind)
                     el.user_dict = self.user_field_dict
                     cursor_format = self.document.txt_formats[block.userData()["style"]]
                     cursor_format.setForeground(self.document.highlight_colors["index"])
                     # current_cursor.setCharFormat(cursor_format)  
                     current_cursor.insertText(el.to_text(), cursor_format)
+                    block_strokes.reset_index(ind)
             if block == self.document.document().lastBlock():
                 break
             block = block.next()
@@ -728,6 +764,8 @@ class update_entries(QUndoCommand):
                         current_cursor.setPosition(block.position() + start_pos)
                         current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
                         current_cursor.removeSelectedText()
+                        # element may be shared with copies and earlier commands
+                        el = block_strokes._own_element(ind)
                         el.prefix = self.new_dict[el.indexname]["prefix"]
                         el.hidden = self.new_dict[el.indexname]["hidden"]
                         el.description = self.new_dict[el.indexname]["entries"][el.data]
@@ -735,6 +773,7 @@ class update_entries(QUndoCommand):
                         cursor_format.setForeground(self.document.highlight_colors["index"])
                         # current_cursor.setCharFormat(cursor_format)                        
                         current_cursor.insertText(el.to_text(), cursor_format)
+                        block_strokes.reset_index(ind)
             if block == self.document.document().lastBlock():
                 break
             block = block.next()
@@ -755,12 +794,14 @@ class update_entries(QUndoCommand):
                     current_cursor.setPosition(block.position() + start_pos)
                     current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
                     current_cursor.removeSelectedText()
+                    el = block_strokes._own_element(ind)
                     el.prefix = self.store_dict[el.indexname]["prefix"]
                     el.hidden = self.store_dict[el.indexname]["hidden"]
                     el.description = self.store_dict[el.indexname]["entries"][el.data]
                     cursor_format = self.document.txt_formats[block.userData()["style"]]
                     cursor_format.setForeground(self.document.highlight_colors["index"])
                     current_cursor.insertText(el.to_text(), cursor_format)
+                    block_strokes.reset_index(ind)
             if block == self.document.document().lastBlock():
                 break
             block = block.next()
@@ -0,0 +1,51 @@
+"""Replay of tape strokes, to recover writing not yet saved when Plover2CAT did not close cleanly."""
+from plover import system
+from plover.formatting import Formatter
+from plover.steno import Stroke
+from plover.translation import Translator
+
+
+def tape_stroke(steno):
+    """Return stroke from steno field of a Plover2CAT tape line.
+
+    Each character of the field is one key of ``plover.system.KEYS``, 
+    a space if the key was not pressed.
+
+    :param str steno: steno field of tape line
+    """
+    keys = [system.KEYS[i] for i, key in enumerate(steno) if not key.isspace() and i < len(system.KEYS)]
+    return(Stroke(keys))
+
+
+class tape_translator:
+    """Translate strokes with a separate Plover translator, without sending output.
+
+    The translator and formatter of the engine are not used, so their state 
+    is not changed and Plover output does not need to be enabled.
+
+    :param dictionaries: Plover ``StenoDictionaryCollection`` to translate with
+    :param str space_placement: Plover ``space_placement`` setting
+    """
+    def __init__(self, dictionaries, space_placement = "Before Output"):
+        self.backspaces = 0
+        self.string = ""
+        self.formatter = Formatter()
+        self.formatter.set_output(self)
+        self.formatter.set_space_placement(space_placement)
+        self.translator = Translator()
+        self.translator.set_dictionary(dictionaries)
+        self.translator.add_listener(self.formatter.format)
+    def send_backspaces(self, count):
+        self.backspaces += count
+    def send_string(self, string):
+        self.string += string
+    def translate(self, stroke):
+        """Translate stroke.
+
+        :param stroke: Plover ``Stroke``
+        :return: tuple of number of backspaces and string sent for stroke
+        """
+        self.backspaces = 0
+        self.string = ""
+        self.translator.translate(stroke)
+        return(self.backspaces, self.string)
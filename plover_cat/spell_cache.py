@@ -0,0 +1,102 @@
+"""Spellcheck dictionaries shared by all editors, with an optional cache on disk.
+
+Parsing the ``.aff`` and ``.dic`` files of a Hunspell dictionary with ``spylls``
+can take seconds. Each dictionary is parsed once per process, and can be pickled
+to a cache folder so that later sessions load the parsed dictionary instead.
+Cache files are named by dictionary path, and by size and modification time of
+the dictionary files and the ``spylls`` version, so a changed dictionary is parsed again.
+"""
+import hashlib
+import os
+import pathlib
+import pickle
+import threading
+from importlib.metadata import version, PackageNotFoundError
+from spylls.hunspell import Dictionary
+from plover import log
+
+try:
+    SPYLLS_VERSION = version("spylls")
+except PackageNotFoundError:
+    SPYLLS_VERSION = ""
+
+# (dictionary stem, file signature): Dictionary
+_dictionaries = {}
+# dictionary stem: lock held while parsing
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def dictionary_signature(stem):
+    """Return size and modification time of ``.aff`` and ``.dic`` files, empty for dictionaries distributed with ``spylls``."""
+    signature = []
+    for suffix in (".aff", ".dic"):
+        try:
+            stat = os.stat(stem + suffix)
+        except OSError:
+            continue
+        signature.append((suffix, stat.st_size, stat.st_mtime_ns))
+    return(tuple(signature))
+
+def _digest(value):
+    return(hashlib.sha1(repr(value).encode("utf-8")).hexdigest()[:16])
+
+def get_dictionary(dic_path = "en_US", cache_dir = None):
+    """Return ``spylls`` dictionary, parsed only the first time it is requested.
+
+    :param dic_path: language code of dictionary distributed with ``spylls``,
+        or path to ``.dic`` file, with or without suffix
+    :param cache_dir: folder for pickled dictionaries, no cache on disk if ``None``
+    :return: ``spylls`` ``Dictionary``
+    """
+    stem = str(dic_path).removesuffix(".dic")
+    key = (stem, dictionary_signature(stem))
+    with _locks_lock:
+        lock = _locks.setdefault(stem, threading.Lock())
+    with lock:
+        if key not in _dictionaries:
+            _dictionaries[key] = load_dictionary(stem, key[1], cache_dir)
+        return(_dictionaries[key])
+
+def load_dictionary(stem, signature, cache_dir = None):
+    """Load dictionary from cache file if any, else parse and write cache file.
+
+    :param str stem: path of dictionary files without suffix, or language code
+    :param tuple signature: result of ``dictionary_signature``
+    :param cache_dir: folder for pickled dictionaries, no cache on disk if ``None``
+    """
+    if cache_dir is None:
+        log.debug(f"Parsing spellcheck dictionary {stem}.")
+        return(Dictionary.from_files(stem))
+    cache_dir = pathlib.Path(cache_dir)
+    prefix = _digest(stem)
+    cache_file = cache_dir / f"{prefix}-{_digest((signature, SPYLLS_VERSION))}.pickle"
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                dictionary = pickle.load(f)
+            log.debug(f"Loaded spellcheck dictionary {stem} from {str(cache_file)}.")
+            return(dictionary)
+        except Exception as e:
+            log.debug(f"Spellcheck cache {str(cache_file)} unreadable, parsing dictionary: {e}")
+    log.debug(f"Parsing spellcheck dictionary {stem}.")
+    dictionary = Dictionary.from_files(stem)
+    try:
+        cache_dir.mkdir(parents = True, exist_ok = True)
+        # written aside and replaced, another process may be reading
+        temp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_file, "wb") as f:
+            pickle.dump(dictionary, f, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+        for old_file in cache_dir.glob(f"{prefix}-*.pickle"):
+            if old_file != cache_file:
+                old_file.unlink()
+        log.debug(f"Spellcheck dictionary {stem} cached in {str(cache_file)}.")
+    except OSError as e:
+        log.debug(f"Spellcheck dictionary {stem} not cached: {e}")
+    return(dictionary)
+
+def clear_dictionaries():
+    """Remove dictionaries from memory, cache files are kept."""
+    with _locks_lock:
+        _dictionaries.clear()
@@ -1,11 +1,12 @@
 import re
 import textwrap
+import threading
 from datetime import datetime
-from collections import UserList, UserString
-from copy import deepcopy
+from collections import UserList, defaultdict, deque
+from copy import copy, deepcopy
 from itertools import accumulate
-from bisect import bisect_left, bisect
-from plover_cat.helpers import pixel_to_in, write_command
+from bisect import bisect_left, bisect_right
+from plover_cat.helpers import pixel_to_in, write_command, hours_to_ms, timestamp_to_ms, ms_to_timestamp, ms_to_clock
 from plover_cat.constants import user_field_dict
 from PySide6.QtCore import QByteArray, QBuffer, QIODevice
 from PySide6.QtGui import QImage, QImageReader
@@ -17,23 +18,70 @@ _whitespace = '\u2029\t\n\x0b\x0c\r '
 whitespace = r'[%s]' % re.escape(_whitespace)
 wordsep_simple_re = re.compile(r'(%s+)' % whitespace)
 
-class text_element(UserString):
+_slot_cache = {}
+
+def _slot_names(element_class):
+    """Return names of all ``__slots__`` of element class and its bases, cached per class."""
+    try:
+        return(_slot_cache[element_class])
+    except KeyError:
+        slots = tuple(name for cls in element_class.__mro__ for name in cls.__dict__.get("__slots__", ()))
+        _slot_cache[element_class] = slots
+        return(slots)
+
+class text_element:
     """The base text element used in editor.
 
+    Attributes are held in ``__slots__``, subclasses have to declare 
+    ``__slots__`` for new attributes (empty if none) and extend ``_fields`` 
+    with the attributes to serialize.
+
+    Time is held as integer milliseconds (see ``helpers.timestamp_to_ms``), 
+    and only converted to ISO format in ``to_json``.
+
     :param text: string that can be set
     :type text: str
-    :param time: time element is created in ISO milliseconds format
-    :type time: str
+    :param time: time element is created, in ISO milliseconds format or as milliseconds
+    :type time: str or int
     """
+    __slots__ = ("data", "element", "time")
+    _fields = ("data", "element", "time")
+    """attributes serialized by ``to_json``, in order"""
 
     def __init__(self, text="", time=None):
-        super().__init__(text)
+        self.data = str(text)
+        """text string of element"""
         self.element = "text"
         """type of element, ``text``"""
-        self.time = time or datetime.now().isoformat("T", "milliseconds")
+        self.time = timestamp_to_ms(time)
     def __len__(self):
         """return length of string"""
         return(len(self.data))
+    def __str__(self):
+        return(self.data)
+    def __copy__(self):
+        """Return shallow copy, setting slots directly instead of through ``__reduce_ex__``."""
+        new_element = self.__class__.__new__(self.__class__)
+        for name in _slot_names(self.__class__):
+            setattr(new_element, name, getattr(self, name))
+        return(new_element)
+    def __eq__(self, other):
+        """Compare text of element with element or string."""
+        if isinstance(other, text_element):
+            return(self.data == other.data)
+        return(self.data == other)
+    def __hash__(self):
+        return(hash(self.data))
+    def __contains__(self, char):
+        return(char in self.data)
+    def startswith(self, prefix, *args):
+        return(self.data.startswith(prefix, *args))
+    def endswith(self, suffix, *args):
+        return(self.data.endswith(suffix, *args))
+    def find(self, sub, *args):
+        return(self.data.find(sub, *args))
+    def rfind(self, sub, *args):
+        return(self.data.rfind(sub, *args))
     def split(self):
         """Splits text string on whitespace (re from textwrapper).
 
@@ -45,17 +93,12 @@ class text_element(UserString):
             chunks = [c for c in wordsep_simple_re.split(self.data) if c]
             list_chunks = []
             for c in chunks:
-                class_dict = deepcopy(self.__dict__)
-                class_dict["data"] = c
-                new_element = self.__class__()
-                new_element.from_dict(class_dict)
+                new_element = copy(self)
+                new_element.data = c
                 list_chunks.append(new_element)
             return(list_chunks)
         else:
-            class_dict = deepcopy(self.__dict__)
-            new_element = self.__class__()
-            new_element.from_dict(class_dict)
-            return([new_element])            
+            return([copy(self)])
     def __iter__(self):
         """Return element in list length one for iteration. 
         """
@@ -76,25 +119,24 @@ class text_element(UserString):
         else:
             return NotImplemented
     def __radd__(self, other):
-        """Override __radd__ from ``Userstring`` so inherited classes can override.
+        """Define __radd__ so inherited classes can override.
         
         :raises NotImplemented: __radd__ should not be needed with purely ``text_element`` objects
         """
         return NotImplemented
     def __getitem__(self, key):
-        """Get from class dict based on key.
+        """Get from text based on key.
         
         :param key: key
-        :return: returns new instance of class after deepcopy
+        :return: returns new instance of class with sliced text, 
+            other attributes are the same
         """
-        class_dict = deepcopy(self.__dict__)
-        class_dict["data"] = self.data[key]
-        new_element = self.__class__()
-        new_element.from_dict(class_dict)
+        new_element = copy(self)
+        new_element.data = self.data[key]
         return(new_element)
     def __repr__(self):
-        """Return representation as ``dict``."""
-        items = ("%s = %r" % (k, v) for k, v in self.__dict__.items())
+        """Return representation with serialized attributes."""
+        items = ("%s = %r" % (k, getattr(self, k)) for k in self._fields)
         return("{name}({args})".format(name = self.__class__.__name__, args = ", ".join(items)))
     def length(self):
         """Return functional length.
@@ -104,9 +146,17 @@ class text_element(UserString):
         """
         return(len(self.data))
     def from_dict(self, dictionary):
-        """Populate class using a dict."""
+        """Populate class using a dict, keys not in ``_fields`` are ignored.
+
+        ``time`` and ``audiotime`` strings are converted to milliseconds.
+        """
         for k, v in dictionary.items():
-            setattr(self, k, v)
+            if k in self._fields:
+                if k == "time":
+                    v = timestamp_to_ms(v)
+                elif k == "audiotime" and isinstance(v, str) and v:
+                    v = hours_to_ms(v)
+                setattr(self, k, v)
     def to_display(self):
         """Formatted string for display in GUI.
 
@@ -114,8 +164,10 @@ class text_element(UserString):
         """
         return("\U0001F163\n\n%s" % self.to_text())
     def to_json(self):
-        """Return dict of attributes."""
-        return(self.__dict__)
+        """Return dict of attributes in ``_fields``, with ``time`` in ISO format."""
+        json_dict = {k: getattr(self, k) for k in self._fields}
+        json_dict["time"] = ms_to_timestamp(self.time)
+        return(json_dict)
     def to_text(self):
         """Return "text" representation as imagined for ``QTextEdit``."""
         return(self.data)
@@ -126,7 +178,7 @@ class text_element(UserString):
         return(self.to_text())
     def to_rtf(self):
         """Return string representation with control groups from RTF/CRE spec as necessary."""
-        time_string = datetime.strptime(self.time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')      
+        time_string = ms_to_clock(self.time)
         string = write_command("cxt", time_string + ":00", visible = False, group = True) + write_command("cxs", "", visible = False, group = True) + self.to_text()
         return(string)
     def to_odt(self, paragraph, document):
@@ -153,6 +205,7 @@ class text_element(UserString):
 class dummy_element(text_element):
     """Dummy element used for testing.
     """
+    __slots__ = ()
     def __init__(self, **kargs):
         super().__init__(**kargs)
         self.element = "dummy"
@@ -162,6 +215,7 @@ class dummy_element(text_element):
 
 class pagebreak_element(text_element):
     """Page break element for editor"""
+    __slots__ = ()
     def __init__(self, **kargs):
         super().__init__(**kargs)
         self.data = "\u21a1"
@@ -180,21 +234,128 @@ class pagebreak_element(text_element):
     def to_odt(self, paragraph, document):
         pass
 
+class stroke_table:
+    """Symbol table interning steno outlines to integer ids.
+
+    Stroke elements only hold the id, the outline string is stored once 
+    and looked up on demand. Ids are never serialized and only valid 
+    within the running process, the module level ``stroke_symbols`` table is shared 
+    by all transcripts so elements can move between transcripts (paste, 
+    export threads) without remapping.
+    """
+    def __init__(self):
+        self.ids = {}
+        """Dict of outline to id"""
+        self.outlines = []
+        """List of outlines, indexed by id"""
+        self.counts = []
+        """List of number of strokes in each outline, indexed by id"""
+        self._lock = threading.Lock()
+    def intern(self, outline):
+        """Return id for outline, adding outline to table if new."""
+        try:
+            return(self.ids[outline])
+        except KeyError:
+            pass
+        with self._lock:
+            if outline in self.ids:
+                return(self.ids[outline])
+            stroke_id = len(self.outlines)
+            self.outlines.append(outline)
+            self.counts.append(outline.count("/") + 1)
+            self.ids[outline] = stroke_id
+            return(stroke_id)
+    def lookup(self, outline):
+        """Return id for outline, ``None`` if outline has never been seen."""
+        return(self.ids.get(outline))
+    def __len__(self):
+        return(len(self.outlines))
+
+stroke_symbols = stroke_table()
+
+class stroke_matcher:
+    """Aho-Corasick automaton matching several outlines over stroke ids in one pass.
+
+    Each query is split on ``/`` and every stroke must match the whole outline 
+    of consecutive stroke elements, same as ``element_collection.search_strokes``. 
+    Queries with a stroke never interned cannot match and are skipped.
+
+    :param queries: steno outlines to search for
+    :type queries: list[str]
+    """
+    def __init__(self, queries):
+        self.queries = list(queries)
+        """List of query outlines, match results refer to index in list"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for query_index, query in enumerate(self.queries):
+            stroke_ids = [stroke_symbols.lookup(outline) for outline in query.split("/")]
+            if None in stroke_ids:
+                continue
+            state = 0
+            for stroke_id in stroke_ids:
+                next_state = self._goto[state].get(stroke_id)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][stroke_id] = next_state
+                state = next_state
+            self._output[state].append((query_index, len(stroke_ids)))
+        # failure links breadth first, so shallower states are done first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for stroke_id, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and stroke_id not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if state:
+                    self._fail[next_state] = self._goto[fail].get(stroke_id, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    def matches(self, stroke_ids):
+        """Yield all matches in a sequence of stroke ids.
+
+        :param stroke_ids: iterable of stroke ids, -1 for non-stroke elements
+        :return: generator of tuples of query index, start and end (exclusive) index
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for i, stroke_id in enumerate(stroke_ids):
+            while state and stroke_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(stroke_id, 0)
+            for query_index, length in output[state]:
+                yield (query_index, i + 1 - length, i + 1)
+
 class stroke_text(text_element):
     """Stroke element used in editor.
 
     :param stroke: steno outline, separated by slashes
     :type stroke: str
-    :param audiotime: time of media at time of stroke
-    :type audiotime: str
+    :param audiotime: time of media at time of stroke in milliseconds, 
+        ``hours:min:sec.milli`` strings are converted
+    :type audiotime: int or str
 
     """
+    __slots__ = ("stroke_id", "audiotime")
+    _fields = text_element._fields + ("stroke", "audiotime")
     def __init__(self, stroke = "", audiotime = "", **kargs):
         super().__init__(**kargs)
         self.element = "stroke"
         """Type of element, ``stroke``."""
         self.stroke = stroke
-        self.audiotime = audiotime
+        self.audiotime = hours_to_ms(audiotime) if isinstance(audiotime, str) and audiotime else audiotime
+    @property
+    def stroke(self):
+        """Steno outline, resolved from ``stroke_id`` in the stroke table."""
+        return(stroke_symbols.outlines[self.stroke_id])
+    @stroke.setter
+    def stroke(self, outline):
+        self.stroke_id = stroke_symbols.intern(outline)
     def __add__(self, other):
         """Adds together stroke elements or stroke and text elements.
         Will only combine elements but not across word boundaries (spaces), 
@@ -244,7 +405,7 @@ class stroke_text(text_element):
             return NotImplemented
             # raise TypeError("Stroke elements can only combine with other stroke or text elements.")
     def to_rtf(self):
-        time_string = datetime.strptime(self.time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')      
+        time_string = ms_to_clock(self.time)
         string = write_command("cxt", time_string + ":00", visible = False, group = True) + write_command("cxs", self.stroke, visible = False, group = True) + self.data
         return(string)
     def to_display(self):
@@ -260,6 +421,8 @@ class image_text(text_element):
     :param height: pixel height of image
     :type height: int
     """
+    __slots__ = ("path", "width", "height")
+    _fields = text_element._fields + ("path", "width", "height")
     def __init__(self, path = None, width = None, height = None, **kargs):
         super().__init__(**kargs)
         self.data = "\ufffc"
@@ -313,6 +476,8 @@ class text_field(text_element):
     :param user_dict: transcript field dict, uses default ``user_field_dict`` if not supplied
     :type user_dict: dict
     """
+    __slots__ = ("name", "user_dict")
+    _fields = text_element._fields + ("name",)
     def __init__(self, name = None, user_dict = user_field_dict, **kargs):
         super().__init__(**kargs)
         self.element = "field"
@@ -334,9 +499,6 @@ class text_field(text_element):
         :rtype: int
         """
         return(1)
-    def to_json(self):
-        new = {k: v for k, v in self.__dict__.items() if k != "user_dict"}
-        return(new)        
     def to_display(self):
         self.update()
         return("\U0001F155\n \n%s" % self.data)
@@ -388,6 +550,8 @@ class automatic_text(stroke_text):
     :param suffix: text to appear after string
     :type suffix: str
     """
+    __slots__ = ("prefix", "suffix")
+    _fields = stroke_text._fields + ("prefix", "suffix")
     def __init__(self, prefix = "", suffix = "", **kargs):
         super().__init__(**kargs)
         self.element = "automatic"
@@ -419,7 +583,7 @@ class automatic_text(stroke_text):
         string = ""
         if self.prefix:
             string = string + write_command("cxa",  self.prefix, visible = False, group = True)
-        string = string + write_command("cxt", self.time + ":00", visible = False, group = True) + write_command("cxs", self.stroke, visible = False, group = True) + self.data
+        string = string + write_command("cxt", ms_to_clock(self.time) + ":00", visible = False, group = True) + write_command("cxs", self.stroke, visible = False, group = True) + self.data
         if self.suffix:
             string = string + write_command("cxa",  self.suffix, visible = False, group = True)
         return(string)
@@ -429,6 +593,8 @@ class automatic_text(stroke_text):
 class conflict_text(stroke_text):
     """Not yet implemented"""
     # need for resolving with imports from rtf
+    __slots__ = ("choices",)
+    _fields = stroke_text._fields + ("choices",)
     def __init__(self, choices = None, **kargs):
         super().__init__(**kargs)
         self.choices = choices
@@ -445,6 +611,8 @@ class index_text(text_element):
     :param hidden: whether description should be shown in editor or hidden
     :type hidden: bool
     """
+    __slots__ = ("indexname", "prefix", "description", "hidden")
+    _fields = text_element._fields + ("indexname", "prefix", "description", "hidden")
     def __init__(self, prefix = "Exhibit", indexname = 0, description = "", hidden = True, **kargs):
         super().__init__(**kargs)
         self.element = "index"
@@ -500,6 +668,7 @@ class index_text(text_element):
 
 class redact_text(text_element):
     """Not yet implemented"""
+    __slots__ = ()
     def __init__(self, **kargs):
         super().__init__(**kargs)
         self.element = "redacted"
@@ -508,6 +677,18 @@ class redact_text(text_element):
     def to_text(self):
         return("\u2588" * len(self.data))
 
+def _bisect_left(seq, x, lo = 0):
+    """``bisect_left`` for cumulative lengths, list or ``_cum_view``."""
+    if isinstance(seq, _cum_view):
+        return(seq.block_index.bisect(x, lo, seq.functional, False))
+    return(bisect_left(seq, x, lo))
+
+def _bisect_right(seq, x, lo = 0):
+    """``bisect_right`` for cumulative lengths, list or ``_cum_view``."""
+    if isinstance(seq, _cum_view):
+        return(seq.block_index.bisect(x, lo, seq.functional, True))
+    return(bisect_right(seq, x, lo))
+
 def translate_coords(len1, len2, pos):
     """Translate position from one sequence of cumulative lengths to another.
     
@@ -521,10 +702,10 @@ def translate_coords(len1, len2, pos):
     :return: position in second sequence
     :rtype: int
     """
-    pos_index = bisect_left(len1, pos)
+    pos_index = _bisect_left(len1, pos)
     if pos_index == 0:
         remainder = pos     
-    elif pos in len1:
+    elif pos_index < len(len1) and len1[pos_index] == pos:
         remainder = 0
     else:
         remainder = pos - len1[pos_index - 1]
@@ -560,15 +741,34 @@ def backtrack_coord(pos, backspace, text_len, func_len):
     cum_text_len.insert(0, 0)
     cum_func_len = list(accumulate(func_len))
     cum_func_len.insert(0, 0)
+    return(backtrack_cum_coord(pos, backspace, cum_text_len, cum_func_len))
+
+def backtrack_cum_coord(pos, backspace, cum_text_len, cum_func_len):
+    """Return position after backspace, using cumulative lengths.
+
+    Same as ``backtrack_coord`` but takes cumulative lengths starting with 0, 
+    such as those cached by ``element_collection``, so lookup is a binary search.
+
+    :param int pos: initial position in text
+    :param int backspace: hypothetical backspaces to mock
+    :param cum_text_len: cumulative text lengths of elements, starting with 0
+    :type cum_text_len: list[int]
+    :param cum_func_len: cumulative functional lengths of elements, starting with 0
+    :type cum_func_len: list[int]
+    :return: position after hypothetical backspaces, may be negative
+    :rtype: int
+    """
+    if backspace == 0:
+        return(pos)
     func_pos = translate_coords(cum_text_len, cum_func_len, pos)
     ending_func_pos = func_pos - backspace
     if ending_func_pos < 0:
         # if more backspaces than exists in collection
         return(ending_func_pos)
-    cum_func_index = bisect_left(cum_func_len, ending_func_pos)
+    cum_func_index = _bisect_left(cum_func_len, ending_func_pos)
     if cum_func_index == 0:
         return(0)
-    elif ending_func_pos in cum_func_len:
+    elif cum_func_index < len(cum_func_len) and cum_func_len[cum_func_index] == ending_func_pos:
         return(cum_text_len[cum_func_index])
     else:
         return(cum_text_len[cum_func_index - 1] +  ending_func_pos - cum_func_len[cum_func_index - 1])
@@ -585,8 +785,31 @@ def backtrack_coord(pos, backspace, text_len, func_len):
 # backspace = 1
 # backtrack_coord(pos, backspace, text_len, func_len)
 
+def _audiotime_to_ms(audiotime):
+    """Convert ``hours:min:sec.milli`` audiotime to milliseconds, other values returned as is."""
+    if isinstance(audiotime, str) and audiotime:
+        return(hours_to_ms(audiotime))
+    return(audiotime)
+
 class element_factory:
-    """Factory for creating elements from data dict"""
+    """Factory for creating elements from data dict.
+
+    Element classes are looked up by the ``element`` key in ``constructors``, 
+    unknown types are created as ``text_element``.
+    """
+    constructors = {
+        "stroke": stroke_text,
+        "image": image_text,
+        "field": text_field,
+        "automatic": automatic_text,
+        "index": index_text,
+        "pagebreak": pagebreak_element
+    }
+    """Element class for each type of element"""
+    converters = {"time": timestamp_to_ms, "audiotime": _audiotime_to_ms}
+    """Conversion applied to values from dict, same as in ``text_element.from_dict``"""
+    def __init__(self):
+        self._templates = {}
     def gen_element(self, element_dict, user_field_dict = user_field_dict):
         """Return element based on type.
         
@@ -598,28 +821,243 @@ class element_factory:
         :rtype: `text_element` or subclass
         """
         # default is always a text element
-        element = text_element()
-        match element_dict["element"]:
-            case "stroke":
-                element = stroke_text()
-        # elif element_dict["element"] == "dummy":
-        #     element = dummy_element()
-            case "image":
-                element = image_text()
-            case "field":
-                element = text_field(user_dict = user_field_dict)
-            case "automatic":
-                element = automatic_text()
-            case "index":
-                element = index_text()
-            case "pagebreak":
-                element = pagebreak_element()
+        element_class = self.constructors.get(element_dict["element"], text_element)
+        if element_class is text_field:
+            element = text_field(user_dict = user_field_dict)
+        else:
+            element = element_class()
         element.from_dict(element_dict)
         return(element)
+    def text_from_dict(self, element_dict, user_field_dict = user_field_dict):
+        """Return text of element from dict, same as ``to_text``.
+
+        Elements only showing ``data`` are not created.
+        """
+        element_class = self.constructors.get(element_dict["element"], text_element)
+        if element_class.to_text is text_element.to_text:
+            return(element_dict.get("data", ""))
+        return(self.gen_element(element_dict, user_field_dict).to_text())
+    def gen_collection(self, element_dicts, user_field_dict = user_field_dict):
+        """Return collection of elements from list of element dicts.
+
+        Same result as ``gen_element`` on each dict, but each type of element 
+        is set up once per factory from a template, and elements are filled in 
+        directly without running ``__init__`` and ``from_dict`` for every element.
+
+        :param element_dicts: list of element dicts, ie ``strokes`` of a paragraph
+        :type element_dicts: list[dict]
+        :param user_field_dict: user field data
+        :type user_field_dict: dict
+        :return: elements
+        :rtype: ``element_collection``
+        """
+        templates = self._templates
+        elements = []
+        for element_dict in element_dicts:
+            key = (element_dict["element"], id(user_field_dict))
+            if key not in templates:
+                templates[key] = self._template(key[0], user_field_dict)
+            element_class, slot_values, field_defaults = templates[key]
+            element = element_class.__new__(element_class)
+            for name, value in slot_values:
+                setattr(element, name, value)
+            for name, default, convert in field_defaults:
+                value = element_dict.get(name, default)
+                setattr(element, name, convert(value) if convert else value)
+            elements.append(element)
+        return(element_collection(elements))
+    def _template(self, element_type, user_field_dict):
+        """Return class, values of slots that are not serialized, and field defaults for element type.
+
+        Defaults are taken from an element made with the regular constructor.
+        A missing ``time`` stays ``None``, so it is set to time of creation as in ``__init__``.
+        """
+        element_class = self.constructors.get(element_type, text_element)
+        if element_class is text_field:
+            prototype = text_field(user_dict = user_field_dict)
+        else:
+            prototype = element_class(time = 0)
+        slots = _slot_names(element_class)
+        slot_values = tuple((name, getattr(prototype, name)) for name in slots if name not in element_class._fields)
+        field_defaults = tuple((name, None if name == "time" else getattr(prototype, name), self.converters.get(name)) 
+                                for name in element_class._fields)
+        return((element_class, slot_values, field_defaults))
+
+class _block_index:
+    """Cumulative element lengths kept per block of elements, for long paragraphs.
+
+    Each block keeps the text and functional lengths of its elements, and 
+    cumulative lengths relative to the start of the block. Offsets of the blocks 
+    are summed when needed, so a change to a few elements costs the size of a block 
+    and the number of blocks, not the number of elements after the change.
+
+    ``text`` and ``func`` are read-only views that index and bisect like the 
+    cumulative length lists of ``element_collection``.
+    """
+    block_size = 512
+    def __init__(self):
+        self.lens = [[]]
+        """text lengths of elements, list per block"""
+        self.lengths = [[]]
+        """functional lengths of elements, list per block"""
+        self.cum = [None]
+        """cumulative text and functional lengths per block, starting with 0, ``None`` if outdated"""
+        self.count = 0
+        """number of elements indexed"""
+        self.starts = None
+        self.text = _cum_view(self, 0)
+        self.func = _cum_view(self, 1)
+    def update(self, data):
+        """Index elements appended to ``data`` since last update."""
+        if self.count >= len(data):
+            return
+        new_elements = data[self.count:]
+        new_lens = [len(el) for el in new_elements]
+        new_lengths = [el.length() for el in new_elements]
+        self.count = len(data)
+        self.lens[-1].extend(new_lens)
+        self.lengths[-1].extend(new_lengths)
+        if len(self.lens[-1]) > 2 * self.block_size:
+            self._rechunk(len(self.lens) - 1, len(self.lens))
+        elif self.starts is not None:
+            # appending to last block, extend its cumulative lengths and the totals
+            cum_lens, cum_lengths = self.cum[-1]
+            cum_lens.extend(accumulate(new_lens, initial = cum_lens.pop()))
+            cum_lengths.extend(accumulate(new_lengths, initial = cum_lengths.pop()))
+            starts, text_offsets, func_offsets = self.starts
+            starts[-1] = self.count
+            text_offsets[-1] = text_offsets[-2] + cum_lens[-1]
+            func_offsets[-1] = func_offsets[-2] + cum_lengths[-1]
+        else:
+            self.cum[-1] = None
+    def splice(self, index, removed, new_elements):
+        """Replace lengths of ``removed`` elements at ``index`` with those of ``new_elements``."""
+        first_block, local = self._locate(index)
+        new_lens = [len(el) for el in new_elements]
+        new_lengths = [el.length() for el in new_elements]
+        self.count = self.count - removed + len(new_elements)
+        if local + removed <= len(self.lens[first_block]):
+            # change within one block, cumulative lengths before change are kept
+            lens, lengths = self.lens[first_block], self.lengths[first_block]
+            lens[local:local + removed] = new_lens
+            lengths[local:local + removed] = new_lengths
+            if self.cum[first_block] is not None:
+                cum_lens, cum_lengths = self.cum[first_block]
+                del cum_lens[local + 1:], cum_lengths[local + 1:]
+                cum_lens.extend(accumulate(lens[local:], initial = cum_lens.pop()))
+                cum_lengths.extend(accumulate(lengths[local:], initial = cum_lengths.pop()))
+            self.starts = None
+            if not self.lens[first_block] or len(self.lens[first_block]) > 2 * self.block_size:
+                self._rechunk(first_block, first_block + 1)
+            return
+        last_block = first_block
+        covered = len(self.lens[first_block])
+        while covered < local + removed:
+            last_block += 1
+            covered += len(self.lens[last_block])
+        lens = [n for block in self.lens[first_block:last_block + 1] for n in block]
+        lengths = [n for block in self.lengths[first_block:last_block + 1] for n in block]
+        lens[local:local + removed] = new_lens
+        lengths[local:local + removed] = new_lengths
+        self.lens[first_block:last_block + 1] = [lens]
+        self.lengths[first_block:last_block + 1] = [lengths]
+        self.cum[first_block:last_block + 1] = [None]
+        self._rechunk(first_block, first_block + 1)
+    def reset(self, index):
+        """Discard lengths from element ``index`` onwards."""
+        block, local = self._locate(index)
+        del self.lens[block + 1:], self.lengths[block + 1:], self.cum[block + 1:]
+        del self.lens[block][local:], self.lengths[block][local:]
+        self.cum[block] = None
+        self.starts = None
+        self.count = index
+    def _rechunk(self, first_block, last_block):
+        """Split oversized and drop empty blocks in range, blocks are marked outdated."""
+        new_lens, new_lengths = [], []
+        for lens, lengths in zip(self.lens[first_block:last_block], self.lengths[first_block:last_block]):
+            if len(lens) > 2 * self.block_size:
+                for i in range(0, len(lens), self.block_size):
+                    new_lens.append(lens[i:i + self.block_size])
+                    new_lengths.append(lengths[i:i + self.block_size])
+            elif lens:
+                new_lens.append(lens)
+                new_lengths.append(lengths)
+        self.lens[first_block:last_block] = new_lens
+        self.lengths[first_block:last_block] = new_lengths
+        self.cum[first_block:last_block] = [None] * len(new_lens)
+        if not self.lens:
+            self.lens, self.lengths, self.cum = [[]], [[]], [None]
+        self.starts = None
+    def _prefix(self):
+        """Return element index, text and functional offsets at start of each block, plus totals."""
+        if self.starts is None:
+            for block, cum in enumerate(self.cum):
+                if cum is None:
+                    self.cum[block] = (list(accumulate(self.lens[block], initial = 0)), 
+                                        list(accumulate(self.lengths[block], initial = 0)))
+            self.starts = (list(accumulate(map(len, self.lens), initial = 0)), 
+                            list(accumulate([cum[0][-1] for cum in self.cum], initial = 0)), 
+                            list(accumulate([cum[1][-1] for cum in self.cum], initial = 0)))
+        return(self.starts)
+    def _locate(self, index):
+        """Return block and index within block of element ``index``, end of last block for ``count``."""
+        starts = self._prefix()[0]
+        block = min(bisect_right(starts, index) - 1, len(self.lens) - 1)
+        return((block, index - starts[block]))
+    def position(self, index, functional):
+        """Return cumulative text or functional length before element ``index``."""
+        if not 0 <= index <= self.count:
+            raise IndexError("list index out of range")
+        starts = self._prefix()
+        block = min(bisect_right(starts[0], index) - 1, len(self.lens) - 1)
+        return(starts[1 + functional][block] + self.cum[block][functional][index - starts[0][block]])
+    def bisect(self, x, lo, functional, right):
+        """Return ``bisect_left`` (or ``bisect_right``) of cumulative lengths, by block then within block."""
+        starts = self._prefix()
+        offsets = starts[1 + functional]
+        search = bisect_right if right else bisect_left
+        block = search(offsets, x, 1) - 1
+        if block == len(self.lens):
+            return(max(self.count + 1, lo))
+        index = starts[0][block] + search(self.cum[block][functional], x - offsets[block])
+        return(max(index, lo))
+
+class _cum_view:
+    """Read-only view of ``_block_index`` cumulative lengths, supports ``len``, indexing and bisect."""
+    __slots__ = ("block_index", "functional")
+    def __init__(self, block_index, functional):
+        self.block_index = block_index
+        self.functional = functional
+    def __len__(self):
+        return(self.block_index.count + 1)
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.block_index.count + 1
+        return(self.block_index.position(index, self.functional))
 
 class element_collection(UserList):
-    """Container for holding elements in list."""
+    """Container for holding elements in list.
+
+    Cumulative text and functional lengths of the elements are cached, 
+    and extended lazily as elements are appended, so position lookups 
+    are binary searches rather than sums over the whole paragraph.
+    Methods changing ``data`` trim the cache from the first changed element.
+    Code that changes the text of an element directly has to call ``reset_index``.
+
+    Once a paragraph has more than ``block_threshold`` elements, the lengths 
+    are kept per block of elements instead (``_block_index``), so edits in the 
+    middle of very long paragraphs do not re-sum every element after the edit.
+
+    Slices share whole elements with the original collection, so elements 
+    should be treated as immutable. Methods here that change an element 
+    replace it with a copy first (``_own_element``).
+    """
+    block_threshold = 2048
+    """Number of elements above which cached lengths are kept in blocks"""
     def __init__(self, data = None):
+        self._cum_lens = [0]
+        self._cum_lengths = [0]
+        self._blocks = None
         # force element into list if not list
         if isinstance(data, list):
             super().__init__(data)
@@ -643,11 +1081,113 @@ class element_collection(UserList):
         return(lens)
     def __len__(self):
         """Returns sum of `len` for each element."""
-        return(sum(self.lens()))
+        return(self._update_index()[0][-1])
+    def _update_index(self):
+        """Extend cached cumulative lengths to cover every element.
+
+        :return: cumulative text lengths and cumulative functional lengths, 
+            both starting with 0, views of ``_block_index`` for long paragraphs
+        :rtype: tuple(list[int], list[int])
+        """
+        if self._blocks is None and len(self.data) > self.block_threshold:
+            self._blocks = _block_index()
+            self._cum_lens = [0]
+            self._cum_lengths = [0]
+        if self._blocks is not None:
+            self._blocks.update(self.data)
+            return((self._blocks.text, self._blocks.func))
+        cum_lens = self._cum_lens
+        cum_lengths = self._cum_lengths
+        indexed = len(cum_lens) - 1
+        if indexed < len(self.data):
+            text_pos = cum_lens[-1]
+            func_pos = cum_lengths[-1]
+            for el in self.data[indexed:]:
+                text_pos += len(el)
+                func_pos += el.length()
+                cum_lens.append(text_pos)
+                cum_lengths.append(func_pos)
+        return((cum_lens, cum_lengths))
+    def reset_index(self, index = 0):
+        """Discard cached cumulative lengths from element ``index`` onwards.
+
+        Has to be called after text of an element in collection is changed in place.
+
+        :param int index: index of first element changed, negative counts from end
+        """
+        if index < 0:
+            index = max(len(self.data) + index, 0)
+        if self._blocks is not None:
+            if index == 0:
+                self._blocks = None
+            elif index < self._blocks.count:
+                self._blocks.reset(index)
+            return
+        del self._cum_lens[index + 1:]
+        del self._cum_lengths[index + 1:]
+    def _splice_index(self, index, removed, inserted):
+        """Update cached lengths after ``removed`` elements at ``index`` are replaced by ``inserted`` elements.
+
+        Same as ``reset_index(index)``, but long paragraphs only update the blocks changed.
+
+        :param int index: index of first element changed, not negative
+        :param int removed: number of elements removed from ``data``
+        :param int inserted: number of elements now in ``data`` in their place
+        """
+        if self._blocks is not None and index + removed <= self._blocks.count:
+            self._blocks.splice(index, removed, self.data[index:index + inserted])
+        else:
+            self.reset_index(index)
+    def __setitem__(self, key, item):
+        if isinstance(key, slice):
+            self.data[key] = item
+            self.reset_index(key.start or 0)
+        else:
+            key = key + len(self.data) if key < 0 else key
+            self.data[key] = item
+            self._splice_index(key, 1, 1)
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            del self.data[key]
+            self.reset_index(key.start or 0)
+        else:
+            key = key + len(self.data) if key < 0 else key
+            del self.data[key]
+            self._splice_index(key, 1, 0)
+    def pop(self, i = -1):
+        i = i + len(self.data) if i < 0 else i
+        item = self.data.pop(i)
+        self._splice_index(i, 1, 0)
+        return(item)
+    def __copy__(self):
+        return(self.__class__(self.data[:]))
+    def clear(self):
+        self.data.clear()
+        self.reset_index()
+    def reverse(self):
+        self.data.reverse()
+        self.reset_index()
+    def sort(self, /, *args, **kwds):
+        self.data.sort(*args, **kwds)
+        self.reset_index()
+    def _own_element(self, index):
+        """Replace element at ``index`` with a copy before changing it in place.
+
+        :param int index: index of element
+        :return: the copied element now in collection
+        """
+        el = copy(self.data[index])
+        self.data[index] = el
+        return(el)
     def __getitem__(self, key):
-        """Return `element_collection` instance with copy of element(s) based on key."""
+        """Return `element_collection` instance with element(s) based on key.
+
+        Slices are by functional position. Whole elements are shared with this 
+        collection, only elements split at the slice boundaries are new objects.
+        """
         if isinstance(key, slice):
-            el_lengths = list(accumulate(self.lengths()))
+            cum_lengths = self._update_index()[1]
+            total_length = cum_lengths[-1]
             start = key.start
             if not start:
                 start = 0
@@ -658,34 +1198,27 @@ class element_collection(UserList):
             if not self.data:
                 return(el_part)
             if not end:
-                end = el_lengths[-1]
+                end = total_length
             if start < 0 or end < 0:
                 raise ValueError("negative slices not supported")            
-            if end > max(el_lengths):
+            if end > total_length:
                 raise IndexError('list index out of range')
-            if start == el_lengths[-1]:
+            if start == total_length:
                 return(el_part)
-            first_whole = bisect_left(el_lengths, start)
-            if first_whole == 0:
-                first_remain = start
-            else:
-                first_remain = start - el_lengths[(first_whole - 1)]
-            last_whole = bisect_left(el_lengths, end)
-            if last_whole == 0:
-                last_remain = end
-            else:
-                last_remain = end - el_lengths[(last_whole - 1)]
+            # cum_lengths[i] is the functional position where element i starts
+            first_whole = _bisect_left(cum_lengths, start, 1) - 1
+            first_remain = start - cum_lengths[first_whole]
+            last_whole = _bisect_left(cum_lengths, end, 1) - 1
+            last_remain = end - cum_lengths[last_whole]
+            data = self.data
             # special case where first and last are within same element
-            data = deepcopy(self.data)
             if first_whole == last_whole:
                 el_part.append(data[last_whole][first_remain:last_remain])
                 return(el_part)
-            if start not in el_lengths:
+            if cum_lengths[first_whole + 1] != start:
                 el_part.append(data[first_whole][first_remain:])
-            if (first_whole + 1) != last_whole:
-                for i in data[(first_whole + 1): last_whole]:
-                    el_part.append(i)
-            if end not in el_lengths:
+            el_part.extend(data[(first_whole + 1): last_whole])
+            if cum_lengths[last_whole + 1] != end:
                 el_part.append(data[last_whole][:last_remain])
             else:
                 el_part.append(data[last_whole])
@@ -716,93 +1249,121 @@ class element_collection(UserList):
         return([el.to_display() for el in self.data])
     def to_strokes(self):
         """Return strin with all strokes"""
-        el_strokes = [el.stroke for el in self.data if el.element == "stroke"]
+        outlines = stroke_symbols.outlines
+        el_strokes = [outlines[el.stroke_id] for el in self.data if el.element == "stroke"]
         return("/".join(el_strokes))
     def remove(self, start, end):
         """Remove elements based on specified functional position start/stop.
 
+        Elements are split at ``start`` and ``end`` only if the positions are 
+        inside an element, and removed from ``data`` in place.
+
         :param int start: start position for remove
         :param int end: end position for remove
         :return: removed elements
         :rtype: ``element_collection``
         """
-        new_data = []
-        first = self.__getitem__(slice(0, start)).data
-        new_data.extend(first)
-        second = self.__getitem__(slice(end, None)).data
-        new_data.extend(second)
-        del_data = self.__getitem__(slice(start, end))
-        self.data = new_data
+        if start > end:
+            raise ValueError("start of remove after end")
+        start_index = self._split_at(start)
+        end_index = self._split_at(end)
+        del_data = self.__class__(self.data[start_index:end_index])
+        del self.data[start_index:end_index]
+        self._splice_index(start_index, end_index - start_index, 0)
         return(del_data)
     def insert(self, i, item):
         """Insert based on functional position.
+
+        Inserting at the end of the collection appends, otherwise the element 
+        at ``i`` is split only if ``i`` is inside the element.
+
         :param int i: position
         :param item: data to be inserted
         :return: item
         """
-        new_data = []
-        first = self.__getitem__(slice(0, i))
-        second = self.__getitem__(slice(i, None))
-        new_data.extend(first.data)
-        if isinstance(item, UserList):
-            new_data.extend(item.data)
-        else:
-            new_data.append(item)
-        new_data.extend(second.data)
-        self.data = new_data
+        items = item.data if isinstance(item, UserList) else [item]
+        # fast path, writing at end of paragraph
+        if i == self._update_index()[1][-1]:
+            self.data.extend(items)
+            return(item)
+        index = self._split_at(i)
+        self.data[index:index] = items
+        self._splice_index(index, 0, len(items))
         return(item)
+    def _split_at(self, pos):
+        """Split element at functional ``pos`` in two if ``pos`` is inside the element.
+
+        :param int pos: functional position
+        :return: index of first element starting at ``pos``
+        :rtype: int
+        :raises ValueError: negative position
+        :raises IndexError: position beyond end of collection
+        """
+        if pos < 0:
+            raise ValueError("negative positions not supported")
+        cum_lengths = self._update_index()[1]
+        index = _bisect_left(cum_lengths, pos)
+        if index == len(cum_lengths):
+            raise IndexError("list index out of range")
+        if cum_lengths[index] == pos:
+            return(index)
+        # pos inside element before index
+        remain = pos - cum_lengths[index - 1]
+        el = self.data[index - 1]
+        self.data[index - 1:index] = [el[:remain], el[remain:]]
+        self._splice_index(index - 1, 1, 2)
+        return(index)
     def stroke_pos_at_pos(self, pos):
         """Returns tuple of text start, stop for element at text ``pos``."""
-        lengths = self.lens()
-        cum_len = list(accumulate(lengths))
-        pos_index = bisect(cum_len, pos)
-        # if first, need manual adjustment
-        if pos_index == 0:
-            start_pos = 0
-        else:
-            start_pos = cum_len[pos_index - 1]
+        cum_len = self._update_index()[0]
+        # element starting at or before pos
+        pos_index = _bisect_right(cum_len, pos) - 1
         # if last, pos_index will cause out of range error, subtract back 
-        if pos >= cum_len[-1]:
-            pos_index = pos_index - 1
-            start_pos = cum_len[pos_index - 1]
-        return((start_pos, cum_len[pos_index]))
+        if pos_index >= len(self.data):
+            pos_index = len(self.data) - 1
+        return((cum_len[pos_index], cum_len[pos_index + 1]))
     def closest_audiotime_at_pos(self, pos):
-        lengths = self.lens()
-        cum_len = list(accumulate(lengths))
-        # pos_index = bisect(cum_len, pos)
-        preceding_time = ""
-        for ind, el in enumerate(self.data):
-            if cum_len[ind] > pos and ind != 0:
-                break            
+        cum_len = self._update_index()[0]
+        # elements ending at or before pos, always including first
+        last_index = max(_bisect_right(cum_len, pos) - 1, 1)
+        for el in reversed(self.data[:last_index]):
             if el.element == "stroke" and el.audiotime != "":
-                preceding_time = el.audiotime
-            
-        return(preceding_time)
+                return(el.audiotime)
+        return("")
     def element_pos(self, index):
         """Returns tuple of text start, stop for element at ``index`` in collection."""
-        lengths = self.lens()
-        cum_len = list(accumulate(lengths))
-        if index == 0:
-            start_pos = 0
-        else:
-            start_pos = cum_len[index - 1]
-        if index >= len(cum_len):
-            index = index - 1
-            start_pos = cum_len[index - 1]            
-        return((start_pos, cum_len[index]))            
+        cum_len = self._update_index()[0]
+        if index >= len(self.data):
+            index = len(self.data) - 1
+        return((cum_len[index], cum_len[index + 1]))
+    def func_pos(self, pos):
+        """Return functional position for text position ``pos``.
+
+        :param int pos: text position
+        :return: functional position
+        :rtype: int
+        """
+        cum_len, cum_lengths = self._update_index()
+        return(translate_coords(cum_len, cum_lengths, pos))
+    def backtrack(self, pos, backspace):
+        """Return text position after ``backspace`` from ``pos``.
+
+        Uses the cached lengths, see ``backtrack_coord``.
+
+        :param int pos: initial text position
+        :param int backspace: hypothetical backspaces to mock
+        :return: position after backspaces, negative if more backspaces than length
+        :rtype: int
+        """
+        cum_len, cum_lengths = self._update_index()
+        return(backtrack_cum_coord(pos, backspace, cum_len, cum_lengths))
     def remove_steno(self, start, end):
         """Removes elements from `start` to `end` (text) position.
         
         :return: element(s) removed
         :rtype: ``element_collection``
         """
-        lens = self.lens()
-        cum_len = list(accumulate(lens))
-        cum_len.insert(0, 0)
-        # print(cum_len)
-        lengths = self.lengths()
-        cum_lengths = list(accumulate(lengths))
-        cum_lengths.insert(0, 0)
+        cum_len, cum_lengths = self._update_index()
         start_pos = translate_coords(cum_len, cum_lengths, start)
         end_pos = translate_coords(cum_len, cum_lengths, end)
         res = self.remove(start_pos, end_pos)
@@ -817,13 +1378,7 @@ class element_collection(UserList):
         :return: element(s) between coordinates
         :rtype: ``element_collection``
         """
-        lens = self.lens()
-        cum_len = list(accumulate(lens))
-        cum_len.insert(0, 0)
-        # print(cum_len)
-        lengths = self.lengths()
-        cum_lengths = list(accumulate(lengths))
-        cum_lengths.insert(0, 0)
+        cum_len, cum_lengths = self._update_index()
         start_pos = translate_coords(cum_len, cum_lengths, start)
         end_pos = translate_coords(cum_len, cum_lengths, end)
         res = self[start_pos:end_pos]
@@ -837,14 +1392,7 @@ class element_collection(UserList):
         :param item: ``element_collection`` or single element
         :return: item
         """
-        lens = self.lens()
-        cum_len = list(accumulate(lens))
-        cum_len.insert(0, 0)
-        # print(cum_len)
-        lengths = self.lengths()
-        cum_lengths = list(accumulate(lengths))
-        cum_lengths.insert(0, 0)
-        steno_pos = translate_coords(cum_len, cum_lengths, pos)
+        steno_pos = self.func_pos(pos)
         res = self.insert(steno_pos, item)
         return(res)
     def starts_with(self, char):
@@ -899,7 +1447,9 @@ class element_collection(UserList):
         if self.data[-1].data == char:
             del self.data[-1]
         elif self.data[-1].data.endswith(char):
-            self.data[-1].data = self.data[-1].data.rstrip(char) 
+            el = self._own_element(-1)
+            el.data = el.data.rstrip(char)
+        self.reset_index(-1)
     def remove_begin(self, char):
         """Remove ``char`` from first element if text starts with ``char``.
 
@@ -907,44 +1457,57 @@ class element_collection(UserList):
         """
         if self.data[0].data == char:
             del self.data[0]
+            self._splice_index(0, 1, 0)
         elif self.data[0].data.startswith(char):
-            self.data[0].data = self.data[0].data.lstrip(char)
+            el = self._own_element(0)
+            el.data = el.data.lstrip(char)
+            self._splice_index(0, 1, 1)
     def add_begin(self, char = " "):
         """Add ``char`` to beginning of first element.
         
         :param str char: string to add, default one space character
         """
-        self.data[0].data = char + self.data[0].data
+        el = self._own_element(0)
+        el.data = char + el.data
+        self._splice_index(0, 1, 1)
     def add_end(self, char = " "):
         """Add ``char`` to end of last element.
         
         :param str char: string to add, default one space character
         """
-        self.data[-1].data = self.data[-1].data + char
+        el = self._own_element(-1)
+        el.data = el.data + char
+        self.reset_index(-1)
+    def stroke_ids(self):
+        """Return set of stroke ids of stroke elements."""
+        return({el.stroke_id for el in self.data if el.element == "stroke"})
     def stroke_count(self):
         """Counts the number of strokes in collection."""
         # for RTF, maybe has uses elsewhere
-        return(sum([el.stroke.count("/") + 1 for el in self.data if el.element == "stroke"]))
+        counts = stroke_symbols.counts
+        return(sum([counts[el.stroke_id] for el in self.data if el.element == "stroke"]))
     def search_strokes(self, query):
         """Return text positions for matches to underlying strokes.
 
         :param str query: steno outline
         :return: tuple of start and end positions, ``None`` if no match
         """
-        stroke_list = [el.stroke if el.element == "stroke" else " " for el in self.data]
-        query = query.split("/")
-        # must match across strokes, match whole element of stroke
-        # cannot match across stroke auto_text stroke
-        match = False
-        for i, subsets in enumerate(zip(*(stroke_list[i:] for i in range(len(query))))):
-            if tuple(query) == subsets:
-                match = True
-                break
-        if not match:
+        matches = self.stroke_matches(stroke_matcher([query]))
+        if not matches:
             return None
-        start_pos = self.element_pos(i)[0]
-        end_pos = self.element_pos(i + len(query))[0]    
-        return((start_pos, end_pos))
+        return(matches[0][:2])
+    def stroke_matches(self, matcher):
+        """Return text positions for all matches of a compiled stroke matcher.
+
+        :param matcher: compiled outlines to search for
+        :type matcher: stroke_matcher
+        :return: list of tuples of start, end position and query index, ordered by start
+        """
+        # non-stroke elements get -1, never matches an id
+        # cannot match across stroke auto_text stroke
+        stroke_list = [el.stroke_id if el.element == "stroke" else -1 for el in self.data]
+        cum_len = self._update_index()[0]
+        return(sorted((cum_len[start], cum_len[end], query) for query, start, end in matcher.matches(stroke_list)))
     def search_text(self, query):
         """Return text positions for matches to text.
 
@@ -957,34 +1520,39 @@ class element_collection(UserList):
     def collection_time(self, reverse = False):
         """Return earliest/latest timestamp in collection.
 
-        :param bool reverse: ``True`` by default for earliest, 
-            ``False`` for latest
-        :return: formatted timestamp string
+        :param bool reverse: ``False`` by default for earliest, 
+            ``True`` for latest
+        :return: timestamp in milliseconds
+        :rtype: int
         """
         times = [el.time for el in self.data]
-        return(sorted(times, reverse = reverse)[0])
+        if reverse:
+            return(max(times))
+        return(min(times))
     def audio_time(self, reverse = False):
         """Return earliest/latest audio timestamp in collection.
 
-        :param bool reverse: ``True`` by default for earliest, 
-            ``False`` for latest
-        :return: formatted timestamp string
+        :param bool reverse: ``False`` by default for earliest, 
+            ``True`` for latest
+        :return: audio time in milliseconds, ``""`` if no audio times
         """
         times = [el.audiotime for el in self.data if el.element == "stroke" and el.audiotime != ""]
-        if times:
-            return(sorted(times, reverse = reverse)[0])
-        else:
+        if not times:
             return ""
+        if reverse:
+            return(max(times))
+        return(min(times))
     def replace_initial_tab(self, tab_replace = "    "):
         """Replace initial tab in place within collection.
 
         :param str tab_replace: string to replace tab character with, default four spaces
         """
         track_len = 3
-        for el in self.data:
+        for ind, el in enumerate(self.data):
             if "\t" in el.data[0:track_len]:
-                res = el.replace_initial_tab(tab_replace)
+                res = self._own_element(ind).replace_initial_tab(tab_replace)
                 if res:
+                    self._splice_index(ind, 1, 1)
                     break
             track_len -= len(el)
             if track_len < 0:
@@ -1004,6 +1572,139 @@ class element_collection(UserList):
                 new_ec.append(el)
         return(self.__class__(new_ec))
 
+class lazy_collection:
+    """Element dicts of a paragraph, made into an ``element_collection`` when first needed.
+
+    Set as ``strokes`` of ``BlockUserData`` when loading a transcript, 
+    ``BlockUserData`` replaces it with the collection on first access. 
+    Until then ``to_json`` returns the original dicts, which are never modified.
+
+    :param element_dicts: list of element dicts, ie ``strokes`` of a paragraph
+    :type element_dicts: list[dict]
+    :param user_field_dict: user field data for field elements
+    :type user_field_dict: dict
+    """
+    __slots__ = ("element_dicts", "user_field_dict")
+    def __init__(self, element_dicts, user_field_dict = user_field_dict):
+        self.element_dicts = element_dicts
+        self.user_field_dict = user_field_dict
+    def __deepcopy__(self, memo):
+        # dicts are not modified, and field dict has to stay a reference
+        return(self.__class__(self.element_dicts, self.user_field_dict))
+    def materialize(self):
+        """Return ``element_collection`` of the elements."""
+        return(element_factory().gen_collection(self.element_dicts, user_field_dict = self.user_field_dict))
+    def to_json(self):
+        """Return list of element dicts, as loaded."""
+        return(self.element_dicts)
+    def has_element(self, element_type):
+        """Check if any element is of type."""
+        return(any(el["element"] == element_type for el in self.element_dicts))
+    def texts(self):
+        """Return list of tuples of element type and text as ``to_text`` of each element."""
+        factory = element_factory()
+        return([(el["element"], factory.text_from_dict(el, self.user_field_dict)) for el in self.element_dicts])
+    def to_text(self):
+        """Return text string combining all elements."""
+        return("".join(el_text for el_type, el_text in self.texts()))
+    def stroke_ids(self):
+        """Return set of stroke ids of stroke elements, without making elements."""
+        intern = stroke_symbols.intern
+        return({intern(el["stroke"]) for el in self.element_dicts if el["element"] == "stroke"})
+
+class stroke_index:
+    """Transcript level inverted index of stroke ids to paragraphs.
+
+    Paragraphs are held as tokens in document order, so splitting and merging 
+    only touch the paragraphs involved, and block numbers are worked out from 
+    the order when queried. Removing elements does not update the index, 
+    a paragraph may still be in the posting of a stroke it no longer has 
+    until it is refreshed, but a paragraph with a stroke is always in its 
+    posting. Candidates have to be checked by searching the paragraph.
+
+    Updates for block numbers past the end are ignored, if paragraphs were 
+    changed outside of the undo commands the index has to be rebuilt with ``reset``.
+    """
+    def __init__(self):
+        self.postings = defaultdict(set)
+        """Dict of stroke id to set of paragraph tokens"""
+        self._order = []
+        self._ids = {}
+        self._next_token = 0
+        self._numbers = None
+    def __len__(self):
+        return(len(self._order))
+    def _add_ids(self, token, stroke_ids):
+        new_ids = stroke_ids - self._ids[token]
+        self._ids[token] |= new_ids
+        for stroke_id in new_ids:
+            self.postings[stroke_id].add(token)
+    def _new_token(self, strokes):
+        token = self._next_token
+        self._next_token += 1
+        self._ids[token] = set()
+        self._add_ids(token, _stroke_ids(strokes))
+        return(token)
+    def reset(self, collections):
+        """Rebuild index from collections of all paragraphs, in document order."""
+        self.postings.clear()
+        self._ids = {}
+        self._order = [self._new_token(collection) for collection in collections]
+        self._numbers = None
+    def add(self, block, strokes):
+        """Record strokes inserted into paragraph.
+
+        :param int block: block number
+        :param strokes: ``element_collection`` or single element
+        """
+        if block >= len(self._order):
+            return
+        self._add_ids(self._order[block], _stroke_ids(strokes))
+    def refresh(self, block, strokes):
+        """Set strokes of paragraph to those in its collection, dropping stale postings."""
+        if block >= len(self._order):
+            return
+        token = self._order[block]
+        for stroke_id in self._ids[token]:
+            self.postings[stroke_id].discard(token)
+        self._ids[token] = set()
+        self._add_ids(token, _stroke_ids(strokes))
+    def insert_block(self, block, strokes):
+        """Add new paragraph at block number, ie second part of a split."""
+        self._order.insert(block, self._new_token(strokes))
+        self._numbers = None
+    def merge_block(self, block):
+        """Merge strokes of paragraph after ``block`` into it and remove that paragraph."""
+        if block + 1 >= len(self._order):
+            return
+        token = self._order.pop(block + 1)
+        stroke_ids = self._ids.pop(token)
+        for stroke_id in stroke_ids:
+            self.postings[stroke_id].discard(token)
+        self._add_ids(self._order[block], stroke_ids)
+        self._numbers = None
+    def candidates(self, outline):
+        """Return sorted block numbers of paragraphs that may contain all strokes of outline.
+
+        :param str outline: steno outline
+        :return: list of block numbers, empty if a stroke was never interned
+        """
+        stroke_ids = [stroke_symbols.lookup(stroke) for stroke in outline.split("/")]
+        if None in stroke_ids:
+            return([])
+        postings = sorted((self.postings.get(stroke_id, set()) for stroke_id in set(stroke_ids)), key = len)
+        tokens = postings[0].intersection(*postings[1:])
+        if self._numbers is None:
+            self._numbers = {token: number for number, token in enumerate(self._order)}
+        return(sorted(self._numbers[token] for token in tokens))
+
+def _stroke_ids(strokes):
+    if isinstance(strokes, (element_collection, lazy_collection)):
+        return(strokes.stroke_ids())
+    if strokes.element == "stroke":
+        return({strokes.stroke_id})
+    return(set())
+
 # stroke_data = [text_element(text = "ABC"), stroke_text(stroke = "T-", text = "it "), text_element(text = "2 ", time = "2023-08-09T23:02:26.526"), text_element(text = "3 "), stroke_text(stroke = "EUFS ", text = "I was "), stroke_text(stroke = "TAO", text = "too ")]
 # ex_text = index_text(description = "index descript", text = "index name")
 # stroke_data.append(ex_text)
@@ -1037,6 +1738,11 @@ class element_collection(UserList):
 
 class steno_wrapper(textwrap.TextWrapper):
     """Wrap text, but adapted for elements in ``element_collection``.
+
+    Chunks are tuples of source element, text piece and width, elements are 
+    only copied once a line is done, one copy for each run of chunks from 
+    the same element. ``wrap_lines`` returns each line with the earliest 
+    ``time`` and the earliest and latest ``audiotime`` of its elements.
     
     :return: a list of lists of elements, not ``element_collection``.
     """
@@ -1045,13 +1751,45 @@ class steno_wrapper(textwrap.TextWrapper):
 
     def _split(self, text):
         # override
-        text.remove_end()
-        merged = text.merge_elements()
+        # same as remove_end on text, but without changing text
+        elements = list(text.data)
+        if elements and elements[-1].data == "\n":
+            elements.pop()
+        elif elements and elements[-1].data.endswith("\n"):
+            last = copy(elements[-1])
+            last.data = last.data.rstrip("\n")
+            elements[-1] = last
+        merged = element_collection(elements).merge_elements()
         chunks = []
-        for el in merged:
-            chunks.extend(el.split())
+        for el in merged.data:
+            # prefix and suffix of automatic text count for every piece, as with el.split()
+            extra = len(el) - len(el.data)
+            if el.length() > 1:
+                pieces = [c for c in wordsep_simple_re.split(el.data) if c]
+            else:
+                pieces = [el.data]
+            chunks.extend((el, piece, extra + len(piece)) for piece in pieces)
         return chunks
 
+    def _handle_long_word(self, reversed_chunks, cur_line, cur_len, width):
+        # same as textwrap, but slices text piece of chunk
+        if width < 1:
+            space_left = 1
+        else:
+            space_left = width - cur_len
+        if self.break_long_words:
+            end = space_left
+            el, piece, chunk_width = reversed_chunks[-1]
+            extra = chunk_width - len(piece)
+            if self.break_on_hyphens and chunk_width > space_left:
+                hyphen = piece.rfind('-', 0, space_left)
+                if hyphen > 0 and any(c != '-' for c in piece[:hyphen]):
+                    end = hyphen + 1
+            cur_line.append((el, piece[:end], extra + len(piece[:end])))
+            reversed_chunks[-1] = (el, piece[end:], extra + len(piece[end:]))
+        elif not cur_line:
+            cur_line.append(reversed_chunks.pop())
+
     def _wrap_chunks(self, chunks):
         lines = []
         if self.width <= 0:
@@ -1074,34 +1812,61 @@ class steno_wrapper(textwrap.TextWrapper):
             else:
                 indent = self.initial_indent
             width = self.width - len(indent)
-            # if self.drop_whitespace and chunks[-1].strip() == '' and lines:
-            #     del chunks[-1]
             while chunks:
-                l = len(chunks[-1])
+                l = chunks[-1][2]
                 if cur_len + l <= width:
                     cur_line.append(chunks.pop())
                     cur_len += l
                 else:
                     break
-            if chunks and len(chunks[-1]) > width:
+            if chunks and chunks[-1][2] > width:
                 self._handle_long_word(chunks, cur_line, cur_len, width)
-                cur_len = sum(map(len, cur_line))
-
-        #     # If the last chunk on this line is all whitespace, drop it.
-        #     if self.drop_whitespace and cur_line and cur_line[-1].strip() == '':
-        #         cur_len -= len(cur_line[-1])
-        #         del cur_line[-1]
-
+                cur_len = sum(chunk[2] for chunk in cur_line)
             if cur_line:
                 lines.append(cur_line)
         return lines
 
+    def _line_record(self, line):
+        """Return dict of elements and times for a line of chunks."""
+        elements = []
+        time = None
+        starttime = ""
+        endtime = ""
+        previous = None
+        for el, piece, chunk_width in line:
+            if el is previous and chunk_width == len(piece):
+                elements[-1].data = elements[-1].data + piece
+                continue
+            new_element = copy(el)
+            new_element.data = piece
+            elements.append(new_element)
+            if el is previous:
+                continue
+            previous = el
+            if time is None or el.time < time:
+                time = el.time
+            if el.element == "stroke" and el.audiotime != "":
+                if starttime == "" or el.audiotime < starttime:
+                    starttime = el.audiotime
+                if endtime == "" or el.audiotime > endtime:
+                    endtime = el.audiotime
+        return({"text": elements, "time": time, "starttime": starttime, "endtime": endtime})
+
     def _split_chunks(self, text):
         return self._split(text)
 
-    def wrap(self, text):
+    def wrap_lines(self, text):
+        """Wrap collection into lines with times.
+
+        :param text: ``element_collection`` to wrap, not changed
+        :return: list of dicts ``{text, time, starttime, endtime}``, ``text`` is list of elements in line, 
+            ``starttime`` and ``endtime`` are ``""`` if no audio times
+        """
         chunks = self._split_chunks(text)
-        return self._wrap_chunks(chunks)
+        return([self._line_record(line) for line in self._wrap_chunks(chunks)])
+
+    def wrap(self, text):
+        return([line["text"] for line in self.wrap_lines(text)])
 
 # wrap_text = steno_wrapper(width = 10)
 # wrap_text.wrap(stroke_collection)
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Transcript tape backed by the ``.tape`` file.
+
+Each line of the tape is one stroke, ``time|audio time|(paragraph,position)\\t|steno|``.
+The file is read through ``mmap``, and only the offsets of lines and the line
+of each stroke time are kept in memory. Lines can be written by a 
+``background_writer``, so logging a stroke does no disk access.
+"""
+import mmap
+import os
+import pathlib
+import threading
+from queue import Queue, Empty
+from time import monotonic
+from plover import log
+
+
+class background_writer:
+    """Write file data and log messages in batches on a separate thread.
+
+    Items wait in a bounded queue, writing blocks only when the queue is full. 
+    Waiting items are written when there are ``flush_lines`` of them, 
+    ``flush_interval`` ms after the first one, or when ``flush`` is called. 
+
+    :param int flush_interval: ms to wait before writing items
+    :param int flush_lines: number of items to write at once
+    :param int fsync_interval: ms between syncs of written files to disk, 
+        ``0`` to only sync on ``flush(sync = True)``
+    :param int max_queue: number of items that can wait
+    """
+    def __init__(self, flush_interval = 200, flush_lines = 100, fsync_interval = 0, max_queue = 10000):
+        self.flush_interval = flush_interval
+        self.flush_lines = flush_lines
+        self.fsync_interval = fsync_interval
+        self.queue = Queue(maxsize = max_queue)
+        self.last_sync = monotonic()
+        # files written since last sync, only used on writer thread
+        self.unsynced = set()
+        self.thread = threading.Thread(target = self.run, name = "plover2cat-writer", daemon = True)
+        self.thread.start()
+    def write(self, file, data):
+        """Write bytes to open binary file."""
+        self.queue.put(("write", file, data))
+    def log(self, message, *args):
+        """Log message with ``log.info``, formatted with ``args`` when written."""
+        self.queue.put(("log", message, args))
+    def call(self, function, *args):
+        """Run function with ``args`` on writer thread, after waiting items are written."""
+        self.queue.put(("call", function, args))
+    def flush(self, sync = False):
+        """Write all waiting items and wait until written.
+
+        :param bool sync: also sync written files to disk
+        """
+        if not self.thread.is_alive() or threading.current_thread() is self.thread:
+            return
+        done = threading.Event()
+        self.queue.put(("flush", sync, done))
+        done.wait()
+    def close(self):
+        """Write waiting items, sync files and stop thread."""
+        if not self.thread.is_alive():
+            return
+        self.queue.put(("stop", True, None))
+        self.thread.join()
+    def run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - monotonic())
+            try:
+                item = self.queue.get(timeout = timeout)
+            except Empty:
+                item = None
+            if item is not None and item[0] in ("write", "log"):
+                pending.append(item)
+                if deadline is None:
+                    deadline = monotonic() + self.flush_interval / 1000
+                if len(pending) < self.flush_lines:
+                    continue
+            self.write_pending(pending, sync = item is not None and item[0] in ("flush", "stop") and item[1])
+            pending = []
+            deadline = None
+            if item is not None and item[0] == "flush":
+                item[2].set()
+            elif item is not None and item[0] == "call":
+                try:
+                    item[1](*item[2])
+                except Exception as e:
+                    log.error(f"Background call failed: {e}")
+            elif item is not None and item[0] == "stop":
+                break
+    def write_pending(self, pending, sync = False):
+        """Write items, flush files and sync them if due, on writer thread."""
+        try:
+            for item in pending:
+                if item[0] == "write":
+                    item[1].write(item[2])
+                    self.unsynced.add(item[1])
+                else:
+                    log.info(item[1], *item[2])
+            self.unsynced = {f for f in self.unsynced if not f.closed}
+            for f in self.unsynced:
+                f.flush()
+            if sync or (self.fsync_interval and (monotonic() - self.last_sync) * 1000 >= self.fsync_interval):
+                for f in self.unsynced:
+                    os.fsync(f.fileno())
+                self.unsynced = set()
+                self.last_sync = monotonic()
+        except (OSError, ValueError) as e:
+            log.error(f"Background write failed: {e}")
+
+
+class tape_store:
+    """Lines of a tape file, indexed by line number and stroke time.
+
+    Logged lines are appended to the file, which is kept open while logging.
+    Lines are read back from a memory map of the file when requested.
+
+    :param path: path to ``.tape`` file, created on first ``append`` if it does not exist
+    :param writer: ``background_writer`` to write lines with, 
+        lines are written right away if ``None``
+    """
+    def __init__(self, path = None, writer = None):
+        self.writer = writer
+        self.indexer = None
+        self.path = None
+        self.file = None
+        self.map = None
+        self.size = 0
+        self.offsets = []
+        self.time_lines = {}
+        if path is not None:
+            self.open(path)
+    def __len__(self):
+        self.wait()
+        return(len(self.offsets))
+    def open(self, path, background = False):
+        """Index lines of tape file, closing any open tape first.
+
+        :param bool background: index lines on a separate thread, 
+            other methods wait until indexing is done
+        """
+        self.close()
+        self.path = pathlib.Path(path)
+        self.size = 0
+        self.offsets = []
+        self.time_lines = {}
+        if not self.path.is_file():
+            return
+        if background:
+            self.indexer = threading.Thread(target = self.index_file, name = "plover2cat-tape-index", daemon = True)
+            self.indexer.start()
+        else:
+            self.index_file()
+    def wait(self):
+        """Wait until lines are indexed, if indexing on a separate thread."""
+        indexer = self.indexer
+        if indexer is not None and indexer is not threading.current_thread():
+            indexer.join()
+    def index_file(self):
+        self.size = self.path.stat().st_size
+        self.remap()
+        self.index_lines()
+    def close(self):
+        """Close tape file and memory map."""
+        self.wait()
+        self.indexer = None
+        if self.file:
+            if self.writer:
+                self.writer.flush()
+            self.file.close()
+            self.file = None
+        if self.map:
+            self.map.close()
+            self.map = None
+    def remap(self):
+        """Map file again, after lines have been appended since the last map."""
+        if self.map:
+            self.map.close()
+            self.map = None
+        if self.size:
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    def index_lines(self):
+        """Add offsets and stroke times of lines in mapped file."""
+        tape_map = self.map
+        pos = 0
+        while pos < self.size:
+            end = tape_map.find(b"\n", pos, self.size)
+            if end == -1:
+                end = self.size
+            line_end = end - 1 if end > pos and tape_map[end - 1] == ord("\r") else end
+            bar = tape_map.find(b"|", pos, line_end)
+            time = tape_map[pos:bar].decode("utf-8") if bar != -1 else ""
+            self.add_line(pos, line_end, time)
+            pos = end + 1
+    def add_line(self, start, end, time):
+        self.time_lines.setdefault(time, len(self.offsets))
+        self.offsets.append((start, end))
+    def append(self, line):
+        """Write line to end of tape file.
+
+        :param str line: tape line, without new line
+        """
+        self.wait()
+        if not self.file:
+            ends_line = self.size == 0 or self.map[self.size - 1] == ord("\n")
+            self.file = open(self.path, "ab")
+            if not ends_line:
+                self.write(b"\n")
+                self.size += 1
+        data = line.encode("utf-8")
+        self.write(data + b"\n")
+        self.add_line(self.size, self.size + len(data), line.split("|", 1)[0] if "|" in line else "")
+        self.size += len(data) + 1
+    def write(self, data):
+        if self.writer:
+            self.writer.write(self.file, data)
+        else:
+            self.file.write(data)
+            self.file.flush()
+    def flush(self, sync = False):
+        """Write lines waiting in writer to file.
+
+        :param bool sync: also sync file to disk
+        """
+        if self.writer:
+            self.writer.flush(sync = sync)
+        elif self.file and sync:
+            os.fsync(self.file.fileno())
+    def line_bytes(self, index):
+        """Return bytes of line by number."""
+        self.wait()
+        start, end = self.offsets[index]
+        if not self.map or len(self.map) < end:
+            self.flush()
+            self.remap()
+        return(self.map[start:end])
+    def line(self, index):
+        """Return tape line by number."""
+        return(self.line_bytes(index).decode("utf-8"))
+    def lines(self, start = 0, stop = None):
+        """Iterate over tape lines from ``start`` up to ``stop``."""
+        for index in range(start, len(self) if stop is None else stop):
+            yield self.line(index)
+    def text(self):
+        """Return whole tape as string of lines."""
+        return("\n".join(self.lines()))
+    def fields(self, index):
+        """Return ``|`` separated fields of tape line by number."""
+        return(self.line(index).split("|"))
+    def position(self, index):
+        """Return paragraph and position in paragraph of tape line by number.
+
+        :return: tuple of ints, or ``None`` if line has no position
+        """
+        try:
+            par, col = self.fields(index)[2].strip().strip("()").split(",")
+            return((int(par), int(col)))
+        except (IndexError, ValueError):
+            return(None)
+    def line_at_time(self, time):
+        """Return number of first line for stroke time, ``None`` if not in tape.
+
+        :param str time: stroke time in ISO format, as written by ``ms_to_timestamp``
+        """
+        self.wait()
+        return(self.time_lines.get(time))
@@ -2,6 +2,7 @@ import unittest
 import pathlib
 import os
 import requests
+from types import SimpleNamespace
 from tempfile import mkdtemp, mkstemp
 from shutil import rmtree
 from io import StringIO
@@ -13,7 +14,10 @@ from PySide6.QtCore import Qt, QSettings
 from plover.oslayer.config import CONFIG_DIR
 from plover.steno import Stroke
 from plover import log
-from plover_cat.helpers import save_json
+from plover_cat.helpers import save_json, ms_to_timestamp, append_journal, read_journal, apply_journal
+from plover_cat.transcript_container import save_container, load_container, container_reader, load_transcript_file, save_sharded, shard_dir
+from plover_cat.tape_store import tape_store, background_writer
+from plover_cat.spell_cache import get_dictionary, clear_dictionaries
 from plover_cat.steno_objects import (
     text_element,
     stroke_text,
@@ -22,6 +26,12 @@ from plover_cat.steno_objects import (
     automatic_text,
     index_text,
     element_collection,
+    element_factory,
+    lazy_collection,
+    stroke_matcher,
+    stroke_index,
+    steno_wrapper,
+    backtrack_coord,
 )
 from plover_cat.test_dialog_ui import Ui_testDialog
 
@@ -152,8 +162,11 @@ class TestStenoData(unittest.TestCase):
         sc = element_collection(stroke_data)
         self.assertEqual(sc.element_count(), 5)
         self.assertEqual(sc.stroke_count(), 2)
-        self.assertEqual(sc.collection_time(), "2000-01-23T00:00:00.111")
-        self.assertEqual(sc.collection_time(reverse=True), "2100-01-24T00:00:00.111")
+        self.assertEqual(ms_to_timestamp(sc.collection_time()), "2000-01-23T00:00:00.111")
+        self.assertEqual(
+            ms_to_timestamp(sc.collection_time(reverse=True)), "2100-01-24T00:00:00.111"
+        )
+        self.assertEqual(sc.audio_time(reverse=True), 5567)
         merged = sc.merge_elements()
         self.assertEqual(merged.element_count(), 4)
         sc.remove_steno(15, 16)
@@ -164,11 +177,293 @@ class TestStenoData(unittest.TestCase):
         sc.insert_steno(4, element_collection(new_data))
         self.assertEqual(sc.to_text(), "ABC ABCD123was too ")
         self.assertEqual(sc.closest_audiotime_at_pos(3), "")
-        self.assertEqual(sc.closest_audiotime_at_pos(7), "00:00:01.123")
-        self.assertEqual(sc.closest_audiotime_at_pos(9), "00:00:01.123")
-        self.assertEqual(sc.closest_audiotime_at_pos(11), "00:00:01.123")
-        self.assertEqual(sc.closest_audiotime_at_pos(13), "00:00:01.123")
-        self.assertEqual(sc.closest_audiotime_at_pos(17), "00:00:01.123")
+        self.assertEqual(sc.closest_audiotime_at_pos(7), 1123)
+        self.assertEqual(sc.closest_audiotime_at_pos(9), 1123)
+        self.assertEqual(sc.closest_audiotime_at_pos(11), 1123)
+        self.assertEqual(sc.closest_audiotime_at_pos(13), 1123)
+        self.assertEqual(sc.closest_audiotime_at_pos(17), 1123)
+
+    def test_element_time(self):
+        el = stroke_text(stroke="T-", text="it", time="2023-08-09T23:02:26.526")
+        self.assertEqual(el.to_json()["time"], "2023-08-09T23:02:26.526")
+        el_rtf = stroke_text()
+        el_rtf.from_dict({"time": "2023-8-9T01:02:03.4", "audiotime": "00:00:01.123"})
+        self.assertEqual(el_rtf.to_json()["time"], "2023-08-09T01:02:03.400")
+        self.assertEqual(el_rtf.audiotime, 1123)
+        self.assertLess(el_rtf.time, el.time)
+
+    def test_collection_index(self):
+        sc = element_collection(
+            [
+                automatic_text(prefix="Q.\t", stroke="KWE", text="Did "),
+                stroke_text(stroke="U", text="you "),
+                index_text(description="index descript", text="A"),
+            ]
+        )
+        self.assertEqual(len(sc), len(sc.to_text()))
+        self.assertEqual(sc.backtrack(10, 2), backtrack_coord(10, 2, sc.lens(), sc.lengths()))
+        sc.append(stroke_text(stroke="SAOE", text=" see"))
+        self.assertEqual(len(sc), len(sc.to_text()))
+        self.assertEqual(sc.stroke_pos_at_pos(len(sc) - 1), (len(sc) - 4, len(sc)))
+        sc.add_end("\n")
+        self.assertEqual(sc.element_pos(3), (len(sc) - 5, len(sc)))
+        sc.remove_steno(0, 7)
+        self.assertEqual(sc.to_text(), "you Exhibit\u00a0A see\n")
+        self.assertEqual(sc.backtrack(len(sc), 6), 4)
+
+    def test_collection_splice(self):
+        first = stroke_text(stroke="-T", text="the ")
+        sc = element_collection([first, stroke_text(stroke="KAT", text="cat ")])
+        sc.insert(len(sc), stroke_text(stroke="-S", text="is"))
+        self.assertEqual(sc.element_count(), 3)
+        sc.insert_steno(2, text_element(text="XX"))
+        self.assertEqual(sc.to_text(), "thXXe cat is")
+        self.assertEqual(first.data, "the ")
+        removed = sc.remove_steno(1, 7)
+        self.assertEqual(removed.to_text(), "hXXe c")
+        self.assertEqual(sc.to_text(), "tat is")
+        self.assertEqual(len(sc), len(sc.to_text()))
+
+    def test_collection_blocks(self):
+        sc = element_collection([stroke_text(stroke="-T", text="the ") for i in range(3000)])
+        sc.append(index_text(description="index descript", text="A"))
+        self.assertEqual(len(sc), len(sc.to_text()))
+        self.assertIsNotNone(sc._blocks)
+        sc.insert_steno(6001, stroke_text(stroke="KAT", text="cat "))
+        sc.remove_steno(4, 2000)
+        sc.remove_begin("t")
+        self.assertEqual(len(sc), len(sc.to_text()))
+        self.assertEqual(sc.lens(), [sc.element_pos(i)[1] - sc.element_pos(i)[0] for i in range(sc.element_count())])
+        self.assertEqual(sc.backtrack(len(sc), 2), backtrack_coord(len(sc), 2, sc.lens(), sc.lengths()))
+        self.assertEqual(sc.stroke_pos_at_pos(len(sc) - 1), (len(sc) - 9, len(sc)))
+
+    def test_stroke_symbols(self):
+        el = stroke_text(stroke="KW-GS", text="\"")
+        el_same = stroke_text()
+        el_same.from_dict({"stroke": "KW-GS", "element": "stroke"})
+        self.assertEqual(el.stroke_id, el_same.stroke_id)
+        self.assertEqual(el_same.to_json()["stroke"], "KW-GS")
+        sc = element_collection([el, stroke_text(stroke="T-/-S", text="it's "), el_same])
+        self.assertEqual(sc.to_strokes(), "KW-GS/T-/-S/KW-GS")
+        self.assertEqual(sc.stroke_count(), 4)
+        self.assertEqual(sc.search_strokes("KW-GS"), (0, 1))
+        self.assertIsNone(sc.search_strokes("STKPWHR-FPLT"))
+
+    def test_stroke_matcher(self):
+        sc = element_collection(
+            [
+                stroke_text(stroke="T", text="it "),
+                stroke_text(stroke="-S", text="is "),
+                automatic_text(stroke="T", text="it", prefix="Q.\t"),
+                stroke_text(stroke="T", text="it "),
+                stroke_text(stroke="-S", text="is "),
+                stroke_text(stroke="T", text="it "),
+            ]
+        )
+        matcher = stroke_matcher(["T/-S", "-S/T", "T", "STKPWHR-FPLT"])
+        matches = sc.stroke_matches(matcher)
+        self.assertEqual(matches, [(0, 3, 2), (0, 6, 0), (11, 14, 2), (11, 17, 0), (14, 20, 1), (17, 20, 2)])
+        # automatic text is not a plain stroke, breaks the match
+        self.assertEqual(sc.search_strokes("-S/T"), (14, 20))
+        self.assertEqual(sc.search_strokes("T/-S/T"), (11, 20))
+
+    def test_steno_wrapper(self):
+        sc = element_collection(
+            [
+                stroke_text(stroke="T", text="it ", time=300, audiotime=1300),
+                stroke_text(stroke="WAS", text="was ", time=200, audiotime=1200),
+                stroke_text(stroke="HEL", text="hello ", time=400, audiotime=""),
+                text_element(text="world\n", time=100),
+            ]
+        )
+        lines = steno_wrapper(width=8).wrap_lines(sc)
+        self.assertEqual(["".join(el.to_text() for el in line["text"]) for line in lines], ["it was ", "hello ", "world"])
+        self.assertEqual([line["time"] for line in lines], [200, 400, 100])
+        self.assertEqual([(line["starttime"], line["endtime"]) for line in lines], [(1200, 1300), ("", ""), ("", "")])
+        # collection is not changed by wrapping
+        self.assertEqual(sc.to_text(), "it was hello world\n")
+
+    def test_transcript_journal(self):
+        document = {"0": {"strokes": [], "style": "Normal"}, "1": {"strokes": [], "style": "Normal"}, "2": {"strokes": [], "style": "Normal"}}
+        temp_dir = mkdtemp()
+        journal = pathlib.Path(temp_dir, ".test.journal")
+        append_journal([{"upsert": "1", "data": {"strokes": [], "style": "Question"}}], journal, base = "test.transcript")
+        append_journal([{"truncate": 2}, {"upsert": "3", "data": {"strokes": [], "style": "Answer"}}], journal, base = "ignored.transcript")
+        # write that did not finish
+        with open(journal, "a") as f:
+            f.write('{"upsert": "4", "da')
+        base, entries = read_journal(journal)
+        rmtree(temp_dir)
+        self.assertEqual(base, "test.transcript")
+        self.assertEqual(len(entries), 3)
+        apply_journal(document, entries)
+        self.assertEqual(list(document), ["0", "1", "3"])
+        self.assertEqual(document["1"]["style"], "Question")
+
+    def test_journal_torn_line(self):
+        temp_dir = mkdtemp()
+        journal = pathlib.Path(temp_dir, ".test.journal")
+        append_journal([{"upsert": "0", "data": {"strokes": [], "style": "Question"}}], journal, base = "test.transcript")
+        # crash during write, then autosave after restart
+        with open(journal, "a") as f:
+            f.write('{"upsert": "1", "da')
+        append_journal([{"upsert": "2", "data": {"strokes": [], "style": "Answer"}}], journal)
+        base, entries = read_journal(journal)
+        rmtree(temp_dir)
+        self.assertEqual(base, "test.transcript")
+        self.assertEqual([entry["upsert"] for entry in entries], ["0", "2"])
+
+    def test_transcript_container(self):
+        sc = element_collection([stroke_text(stroke="T", text="it ", audiotime=1123), stroke_text(stroke="-S", text="is "), 
+                                    text_element(text="\n"), index_text(description="index descript", text="A")])
+        document = {"0": {"strokes": sc.to_json(), "style": "Normal", "creationtime": "2020-01-01T00:00:00.000"}, 
+                    "1": {"style": "Question", "strokes": [{"data": "odd time", "element": "text", "time": "2020-01-01T00:00:00"}]},
+                    "2": {"strokes": [], "style": "Normal", "notes": "empty"}}
+        temp_dir = mkdtemp()
+        container = pathlib.Path(temp_dir, "test.transcript")
+        save_container(document, container)
+        loaded = load_container(container)
+        self.assertEqual(loaded, document)
+        self.assertEqual(list(loaded["0"]), list(document["0"]))
+        self.assertEqual(load_transcript_file(container), document)
+        with container_reader(container) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.paragraph(1), document["1"])
+        rmtree(temp_dir)
+
+    def test_sharded_transcript(self):
+        document = {str(i): {"strokes": [{"data": f"par {i}", "element": "text", "time": "2020-01-01T00:00:00.000"}], 
+                    "style": "Normal"} for i in range(5)}
+        temp_dir = mkdtemp()
+        manifest = pathlib.Path(temp_dir, "test.transcript")
+        save_sharded(document, manifest, 2)
+        shards = sorted(shard_dir(manifest).glob("*.transcript"))
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(load_transcript_file(manifest), document)
+        first_time = shards[0].stat().st_mtime_ns
+        document["4"]["style"] = "Question"
+        save_sharded(document, manifest, 2, first_dirty = 4)
+        self.assertEqual(shards[0].stat().st_mtime_ns, first_time)
+        self.assertEqual(load_transcript_file(manifest)["4"]["style"], "Question")
+        del document["4"]
+        save_sharded(document, manifest, 2, first_dirty = 4)
+        self.assertEqual(len(list(shard_dir(manifest).glob("*.transcript"))), 2)
+        self.assertEqual(load_transcript_file(manifest), document)
+        rmtree(temp_dir)
+
+    def test_tape_store(self):
+        temp_dir = mkdtemp()
+        tape_path = pathlib.Path(temp_dir, "test.tape")
+        tape_path.write_bytes(b"2020-01-01T00:00:00.001||(0,0)\t|T|\r\n2020-01-01T00:00:00.002||(0,3)\t|S|")
+        tape = tape_store(tape_path)
+        self.assertEqual(len(tape), 2)
+        self.assertEqual(tape.line(0), "2020-01-01T00:00:00.001||(0,0)\t|T|")
+        tape.append("2020-01-01T00:00:00.003|00:00:01.000|(0,6)\t|K|")
+        self.assertEqual(tape.fields(2)[1], "00:00:01.000")
+        self.assertEqual(tape.line_at_time("2020-01-01T00:00:00.002"), 1)
+        self.assertEqual(tape.position(2), (0, 6))
+        self.assertIsNone(tape.line_at_time("2020-01-01T00:00:00.004"))
+        tape.close()
+        # indexing on separate thread, methods wait for it
+        tape.open(tape_path, background = True)
+        self.assertEqual(tape.text().splitlines(), ["2020-01-01T00:00:00.001||(0,0)\t|T|", "2020-01-01T00:00:00.002||(0,3)\t|S|", 
+                                                    "2020-01-01T00:00:00.003|00:00:01.000|(0,6)\t|K|"])
+        tape.close()
+        rmtree(temp_dir)
+
+    def test_background_writer(self):
+        temp_dir = mkdtemp()
+        tape_path = pathlib.Path(temp_dir, "test.tape")
+        writer = background_writer(flush_interval = 10000, flush_lines = 1000)
+        tape = tape_store(tape_path, writer = writer)
+        for i in range(3):
+            tape.append(f"2020-01-01T00:00:00.00{i}||(0,{i})\t|T|")
+        # reading a line not yet written waits for the writer
+        self.assertEqual(tape.line(2), "2020-01-01T00:00:00.002||(0,2)\t|T|")
+        tape.append("2020-01-01T00:00:00.003||(0,3)\t|T|")
+        # calls run after earlier writes
+        line_counts = []
+        writer.call(lambda: line_counts.append(len(tape_path.read_text().splitlines())))
+        writer.flush()
+        self.assertEqual(line_counts, [4])
+        tape.close()
+        writer.close()
+        self.assertFalse(writer.thread.is_alive())
+        self.assertEqual(len(tape_path.read_text().splitlines()), 4)
+        rmtree(temp_dir)
+
+    def test_spell_cache(self):
+        temp_dir = mkdtemp()
+        clear_dictionaries()
+        dictionary = get_dictionary("en_US", temp_dir)
+        self.assertIs(get_dictionary("en_US.dic", temp_dir), dictionary)
+        self.assertEqual(len(list(pathlib.Path(temp_dir).glob("*.pickle"))), 1)
+        # new session loads pickled dictionary
+        clear_dictionaries()
+        cached = get_dictionary("en_US", temp_dir)
+        self.assertIsNot(cached, dictionary)
+        self.assertTrue(cached.lookup("hello"))
+        self.assertFalse(cached.lookup("helo"))
+        clear_dictionaries()
+        rmtree(temp_dir)
+
+    def test_stroke_index(self):
+        first = element_collection([stroke_text(stroke="T", text="it "), stroke_text(stroke="-S", text="is ")])
+        second = lazy_collection([{"element": "stroke", "stroke": "KAT", "data": "cat "}])
+        index = stroke_index()
+        index.reset([first, second, element_collection()])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.candidates("KAT"), [1])
+        self.assertEqual(index.candidates("T/-S"), [0])
+        self.assertEqual(index.candidates("STKPWHR-FPLT"), [])
+        # split first paragraph, second part becomes block 1
+        second_part = first.remove_steno(3, 6)
+        index.insert_block(1, second_part)
+        self.assertEqual(index.candidates("-S"), [0, 1])
+        self.assertEqual(index.candidates("KAT"), [2])
+        index.refresh(0, first)
+        self.assertEqual(index.candidates("-S"), [1])
+        index.add(3, stroke_text(stroke="KAT", text="cat "))
+        self.assertEqual(index.candidates("KAT"), [2, 3])
+        index.merge_block(0)
+        self.assertEqual(index.candidates("T/-S"), [0])
+        self.assertEqual(index.candidates("KAT"), [1, 2])
+
+    def test_gen_collection(self):
+        sc = element_collection(
+            [
+                automatic_text(prefix="Q.\t", stroke="KWE", text="Did ", audiotime=1123),
+                stroke_text(stroke="U", text="you "),
+                text_field(name="SPEAKER_A", user_dict={"SPEAKER_A": "Mr. Smith"}),
+                index_text(description="index descript", text="A"),
+                text_element(text="\n"),
+            ]
+        )
+        element_dicts = [el.to_json() for el in sc]
+        ef = element_factory()
+        bulk = ef.gen_collection(element_dicts)
+        single = [ef.gen_element(el) for el in element_dicts]
+        self.assertEqual([el.to_json() for el in bulk], element_dicts)
+        self.assertEqual([type(el) for el in bulk], [type(el) for el in single])
+        self.assertEqual(len(bulk), len(sc))
+        self.assertEqual(bulk.data[0].audiotime, 1123)
+
+    def test_lazy_collection(self):
+        sc = element_collection(
+            [
+                automatic_text(prefix="Q.\t", stroke="KWE", text="Did "),
+                stroke_text(stroke="U", text="you "),
+                index_text(description="index descript", text="A"),
+            ]
+        )
+        element_dicts = sc.to_json()
+        lazy = lazy_collection(element_dicts)
+        self.assertIs(lazy.to_json(), element_dicts)
+        self.assertEqual("".join(text for el_type, text in lazy.texts()), sc.to_text())
+        self.assertEqual(lazy.to_text(), sc.to_text())
+        self.assertEqual([el_type for el_type, text in lazy.texts()], ["automatic", "stroke", "index"])
+        self.assertEqual(lazy.materialize().to_json(), element_dicts)
+        self.assertFalse(lazy.has_element("image"))
 
 
 class TestTextEdit(unittest.TestCase):
@@ -595,6 +890,125 @@ class TestTextEdit(unittest.TestCase):
             "This is one line.\nThis is the second.\nThis is 3?",
         )
 
+    def step_IndexCopyUnchanged(self):
+        log.debug("Test: IndexCopyUnchanged")
+        self.editor.textEdit.clear_transcript()
+        old_index = {"0": {"prefix": "Exhibit", "hidden": True, "entries": {"A": " A glass."}}}
+        new_index = {"0": {"prefix": "Index", "hidden": True, "entries": {"A": " A glass."}}}
+        el = index_text(prefix = "Exhibit", indexname = "0", description = " A glass.", hidden = True, text = "A")
+        self.editor.textEdit.insert_index_entry(el)
+        self.assertEqual(self.editor.textEdit.toPlainText(), "Exhibit\u00a0A")
+        current_cursor = self.editor.textEdit.textCursor()
+        current_cursor.setPosition(0)
+        current_cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        self.editor.textEdit.setTextCursor(current_cursor)
+        self.editor.cut_steno(cut = False)
+        self.editor.textEdit.update_indices(old_index, new_index)
+        self.assertEqual(self.editor.textEdit.toPlainText(), "Index\u00a0A")
+        self.assertEqual(self.editor.cutcopy_storage[0].to_text(), "Exhibit\u00a0A")
+        self.editor.textEdit.undo_stack.undo()
+        self.assertEqual(self.editor.textEdit.toPlainText(), "Exhibit\u00a0A")
+        self.editor.textEdit.undo_stack.redo()
+        self.assertEqual(self.editor.cutcopy_storage[0].to_text(), "Exhibit\u00a0A")
+        self.editor.cutcopy_storage.clear()
+        self.editor.textEdit.undo_stack.setClean()
+
+    def step_WindowedLoad(self):
+        log.debug("Test: WindowedLoad")
+        paragraphs = {}
+        for num in range(3):
+            paragraphs[str(num)] = {
+                "style": "Normal",
+                "strokes": [
+                    {"data": f"PAR{num}", "element": "stroke", "stroke": "S-", "time": "2000-01-01T00:00:00.001"},
+                    {"data": "\n", "element": "stroke", "stroke": "R-R", "time": "2000-01-01T00:00:00.002"},
+                ],
+            }
+        paragraphs["2"]["strokes"].pop()
+        transcript = self.editor.textEdit.file_name.joinpath(self.editor.textEdit.file_name.stem).with_suffix(".transcript")
+        save_json(paragraphs, transcript)
+        self.editor.textEdit.window_threshold = 1
+        self.editor.textEdit.window_margin = 0
+        self.editor.textEdit.load_transcript(transcript)
+        self.assertEqual(self.editor.textEdit.document().blockCount(), 3)
+        self.assertEqual(self.editor.textEdit.plain_text(), "PAR0\nPAR1\nPAR2")
+        self.editor.textEdit.navigate_to(1)
+        self.assertEqual(self.editor.textEdit.textCursor().block().text(), "PAR1")
+        self.assertEqual(self.editor.textEdit.textCursor().positionInBlock(), 0)
+        self.editor.textEdit.load_all_blocks()
+        self.assertEqual(self.editor.textEdit.toPlainText(), "PAR0\nPAR1\nPAR2")
+        self.editor.textEdit.undo_stack.setClean()
+
+    def step_CaptionLoadBlocks(self):
+        log.debug("Test: CaptionLoadBlocks")
+        paragraphs = {}
+        for num in range(200):
+            paragraphs[str(num)] = {
+                "style": "Normal",
+                "strokes": [
+                    {"data": f"PAR{num}", "element": "stroke", "stroke": "S-", "time": "2000-01-01T00:00:00.001"},
+                    {"data": "\n", "element": "stroke", "stroke": "R-R", "time": "2000-01-01T00:00:00.002"},
+                ],
+            }
+        paragraphs["199"]["strokes"].pop()
+        transcript = self.editor.textEdit.file_name.joinpath(self.editor.textEdit.file_name.stem).with_suffix(".transcript")
+        save_json(paragraphs, transcript)
+        self.editor.textEdit.window_threshold = 1
+        self.editor.textEdit.window_margin = 0
+        self.editor.textEdit.load_transcript(transcript)
+        document = self.editor.textEdit.document()
+        self.assertTrue(self.editor.textEdit.block_unloaded(document.firstBlock()))
+        # captions sent up to start of last paragraph
+        self.editor.set_caption_position(document.lastBlock().position())
+        # as when scrolling up while captioning
+        self.editor.textEdit.load_all_blocks()
+        cap_worker = getattr(self.editor, "cap_worker", None)
+        sent = []
+        self.editor.cap_worker = SimpleNamespace(intake = sent.append)
+        try:
+            self.editor.flush_caption()
+        finally:
+            self.editor.cap_worker = cap_worker
+        self.assertEqual(sent, ["PAR199"])
+        self.editor.textEdit.window_threshold = 1000
+        self.editor.textEdit.window_margin = 50
+        self.editor.textEdit.undo_stack.setClean()
+
+    def step_Snapshot(self):
+        log.debug("Test: Snapshot")
+        self.editor.textEdit.clear_transcript()
+        self.editor.textEdit.insert_text(["This is one line."])
+        self.editor.textEdit.update_backup_document()
+        snapshot = self.editor.textEdit.snapshot()
+        self.editor.textEdit.insert_text([" More."])
+        self.editor.textEdit.update_backup_document()
+        self.assertEqual("".join(el["data"] for el in snapshot["0"]["strokes"]), "This is one line.")
+        self.assertEqual("".join(el["data"] for el in self.editor.textEdit.backup_document["0"]["strokes"]), "This is one line. More.")
+        self.editor.textEdit.clear_transcript()
+
+    def step_SaveCommit(self):
+        log.debug("Test: SaveCommit")
+        commits = len(self.editor.textEdit.get_dulwich_commits())
+        self.editor.textEdit.insert_text(["Commit this."])
+        self.editor.textEdit.save()
+        self.assertEqual(len(self.editor.textEdit.get_dulwich_commits()), commits + 1)
+        # nothing changed since save
+        self.editor.textEdit.dulwich_save()
+        self.assertEqual(len(self.editor.textEdit.get_dulwich_commits()), commits + 1)
+        self.editor.textEdit.clear_transcript()
+
+    def step_RecoverTape(self):
+        log.debug("Test: RecoverTape")
+        self.editor.textEdit.clear_transcript()
+        self.editor.textEdit.save()
+        # strokes on tape after save, as if editor closed before they were saved
+        self.editor.textEdit.stroke_time = "2020-01-01T00:00:00.000"
+        self.editor.textEdit.log_to_tape(Stroke("-T"))
+        self.editor.textEdit.recover_from_tape(self.editor.textEdit.session_path())
+        self.assertEqual(self.editor.textEdit.toPlainText().strip(), "the")
+        self.assertFalse(self.editor.textEdit.undo_stack.isClean())
+        self.editor.textEdit.clear_transcript()
+
     def step_VerifyLoadSpellCheck(self):
         log.debug("Test: VerifyLoadSpellCheck")
         transcript_path = self.editor.textEdit.file_name
@@ -659,6 +1073,12 @@ class testDialogWindow(QDialog, Ui_testDialog):
             "step_ColorHighlight": "Change highlight color",
             "step_SwitchTranscriptsPage": "Change page param with transcript switch",
             "step_InsertText": "Inserting normal text",
+            "step_IndexCopyUnchanged": "Index edits leave copied entries unchanged",
+            "step_WindowedLoad": "Load paragraph text when needed for long transcripts",
+            "step_CaptionLoadBlocks": "Captions continue after earlier paragraphs load",
+            "step_Snapshot": "Snapshot unchanged by later edits",
+            "step_SaveCommit": "Save commits changed files only",
+            "step_RecoverTape": "Recover strokes from tape",
             "step_VerifyLoadSpellCheck": "Load spellchecking*",
             "step_VerifyOnlineUrls": "Online lookup links*",
         }
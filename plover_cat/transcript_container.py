@@ -0,0 +1,341 @@
+"""Binary transcript container.
+
+An optional alternative to the indented JSON ``.transcript`` file. The file is
+a header, a paragraph offset table and one record per paragraph, so any
+paragraph can be read without parsing the rest of the file.
+
+Layout, all integers little endian:
+
+- header: ``MAGIC``, format version, flags and number of records (``<4sHHI``)
+- offset table: byte offset and length of each record (``<QI`` per record)
+- records, one per key of the transcript dict, in dict order
+
+A record is a ``<9I`` table of section lengths followed by the sections:
+
+- ``key``: the paragraph key, utf-8
+- ``meta``: the paragraph dict as JSON, with ``strokes`` set to ``null``,
+  or the whole value if it is not a paragraph with a list of strokes
+- ``strings``: JSON list of the distinct ``data`` and ``stroke`` strings
+- ``kinds``: one byte per element, ``STROKE``, ``TEXT`` or ``OTHER``
+- ``data``: string index of ``data`` for each stroke and text element (``I``)
+- ``stroke``: string index of ``stroke`` for each stroke element (``I``)
+- ``time``: zlib compressed ISO times for stroke and text elements, ``TIME_WIDTH``
+  ascii characters each
+- ``audio``: stroke audiotime in milliseconds, ``-1`` for no audiotime (``q``)
+- ``other``: JSON list of all other element dicts, stored as is, empty
+  if the value is not a paragraph
+
+Only stroke and text element dicts that turn back into exactly the same dict
+are packed, so converting between JSON and the container is lossless.
+
+Transcripts can also be saved sharded, as JSON files of ``shard_size``
+paragraphs each and a JSON manifest in place of the transcript file, see
+``save_sharded``.
+"""
+import json
+import pathlib
+import struct
+import sys
+import zlib
+from array import array
+from plover import log
+from plover_cat.helpers import save_json
+
+MAGIC = b"P2CT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+OFFSET = struct.Struct("<QI")
+SECTIONS = struct.Struct("<9I")
+
+STROKE = 0
+TEXT = 1
+OTHER = 2
+
+_stroke_keys = ("data", "element", "time", "stroke", "audiotime")
+_text_keys = ("data", "element", "time")
+# ISO format with milliseconds, as written by ``ms_to_timestamp``
+TIME_WIDTH = 23
+
+
+def _column(typecode, values = ()):
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return(column)
+
+def _read_column(typecode, buffer):
+    column = array(typecode)
+    column.frombytes(buffer)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return(column)
+
+def encode_paragraph(key, value):
+    """Encode one transcript entry as a container record.
+
+    :param str key: paragraph key, usually block number
+    :param value: paragraph dict
+    :return: record bytes
+    """
+    strokes = value.get("strokes") if isinstance(value, dict) else None
+    if not isinstance(strokes, list):
+        return(_pack_record(key, json.dumps(value), "[]", b"", (), (), (), (), ""))
+    meta = dict(value)
+    meta["strokes"] = None
+    strings = {}
+    kinds = bytearray()
+    data_col = []
+    stroke_col = []
+    time_col = []
+    audio_col = []
+    other = []
+    for el in strokes:
+        kind = OTHER
+        if isinstance(el, dict) and isinstance(el.get("data"), str):
+            timestamp = el.get("time")
+            keys = tuple(el)
+            if not isinstance(timestamp, str) or len(timestamp) != TIME_WIDTH or not timestamp.isascii():
+                pass
+            elif keys == _stroke_keys and el["element"] == "stroke" and isinstance(el["stroke"], str):
+                audiotime = el["audiotime"]
+                if audiotime == "":
+                    audiotime = -1
+                    kind = STROKE
+                elif type(audiotime) is int and audiotime >= 0:
+                    kind = STROKE
+                if kind == STROKE:
+                    stroke_col.append(strings.setdefault(el["stroke"], len(strings)))
+                    audio_col.append(audiotime)
+            elif keys == _text_keys and el["element"] == "text":
+                kind = TEXT
+        if kind == OTHER:
+            other.append(el)
+        else:
+            data_col.append(strings.setdefault(el["data"], len(strings)))
+            time_col.append(timestamp)
+        kinds.append(kind)
+    return(_pack_record(key, json.dumps(meta), json.dumps(list(strings)), bytes(kinds),
+                        data_col, stroke_col, time_col, audio_col, json.dumps(other)))
+
+def _pack_record(key, meta, strings, kinds, data_col, stroke_col, time_col, audio_col, other):
+    sections = [key.encode("utf-8"), meta.encode("utf-8"), strings.encode("utf-8"), kinds,
+                _column("I", data_col).tobytes(), _column("I", stroke_col).tobytes(),
+                zlib.compress("".join(time_col).encode("ascii")), _column("q", audio_col).tobytes(),
+                other.encode("utf-8")]
+    return(SECTIONS.pack(*[len(section) for section in sections]) + b"".join(sections))
+
+def decode_paragraph(record):
+    """Decode container record.
+
+    :param bytes record: record bytes from ``encode_paragraph``
+    :return: tuple of paragraph key and value
+    """
+    record = memoryview(record)
+    sections = []
+    pos = SECTIONS.size
+    for length in SECTIONS.unpack_from(record):
+        sections.append(record[pos:pos + length])
+        pos += length
+    key, meta, strings, kinds, data_col, stroke_col, time_col, audio_col, other = sections
+    key = str(key, "utf-8")
+    value = json.loads(str(meta, "utf-8"))
+    if not other:
+        return(key, value)
+    strings = json.loads(str(strings, "utf-8"))
+    datas = [strings[i] for i in _read_column("I", data_col)]
+    stroke_ids = [strings[i] for i in _read_column("I", stroke_col)]
+    times = zlib.decompress(time_col).decode("ascii")
+    times = [times[i:i + TIME_WIDTH] for i in range(0, len(times), TIME_WIDTH)]
+    audiotimes = ["" if audiotime < 0 else audiotime for audiotime in _read_column("q", audio_col)]
+    if len(stroke_ids) == len(kinds):
+        # paragraphs of only strokes are the usual case
+        value["strokes"] = [{"data": data, "element": "stroke", "time": timestamp, "stroke": stroke, "audiotime": audiotime}
+                                for data, timestamp, stroke, audiotime in zip(datas, times, stroke_ids, audiotimes)]
+        return(key, value)
+    other = iter(json.loads(str(other, "utf-8")))
+    strokes = []
+    packed = 0
+    stroked = 0
+    for kind in bytes(kinds):
+        if kind == OTHER:
+            strokes.append(next(other))
+        elif kind == STROKE:
+            strokes.append({"data": datas[packed], "element": "stroke", "time": times[packed],
+                            "stroke": stroke_ids[stroked], "audiotime": audiotimes[stroked]})
+            stroked += 1
+            packed += 1
+        else:
+            strokes.append({"data": datas[packed], "element": "text", "time": times[packed]})
+            packed += 1
+    value["strokes"] = strokes
+    return(key, value)
+
+def is_container(file_path):
+    """Check if file is a binary transcript container."""
+    with open(file_path, "rb") as f:
+        return(f.read(len(MAGIC)) == MAGIC)
+
+def save_container(json_document, file_path):
+    """Save transcript dict as binary container.
+
+    :param dict json_document: transcript dict of form ``{"par_number": {paragraph data}, ...}``
+    :param file_path: path to container
+    """
+    file_path = pathlib.Path(file_path)
+    if not file_path.parent.exists():
+        file_path.parent.mkdir()
+    records = [encode_paragraph(key, value) for key, value in json_document.items()]
+    offset = HEADER.size + OFFSET.size * len(records)
+    table = []
+    for record in records:
+        table.append(OFFSET.pack(offset, len(record)))
+        offset += len(record)
+    with open(file_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records)))
+        f.write(b"".join(table))
+        f.write(b"".join(records))
+    log.debug(f"Container saved in {str(file_path)}.")
+
+def load_container(file_path):
+    """Load transcript dict from binary container."""
+    with open(file_path, "rb") as f:
+        contents = f.read()
+    magic, version, flags, count = HEADER.unpack_from(contents)
+    if magic != MAGIC or version > VERSION:
+        raise ValueError(f"{str(file_path)} is not a version {VERSION} transcript container.")
+    view = memoryview(contents)
+    json_document = {}
+    for offset, length in OFFSET.iter_unpack(view[HEADER.size:HEADER.size + OFFSET.size * count]):
+        key, value = decode_paragraph(view[offset:offset + length])
+        json_document[key] = value
+    return(json_document)
+
+class container_reader:
+    """Random access to paragraphs in binary container.
+
+    Only the header and offset table are read on open, each paragraph is
+    read and decoded when accessed.
+
+    :param file_path: path to container
+    """
+    def __init__(self, file_path):
+        self.file_path = pathlib.Path(file_path)
+        self.file = open(self.file_path, "rb")
+        magic, version, flags, count = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version > VERSION:
+            self.file.close()
+            raise ValueError(f"{str(file_path)} is not a version {VERSION} transcript container.")
+        self.offsets = list(OFFSET.iter_unpack(self.file.read(OFFSET.size * count)))
+    def __len__(self):
+        return(len(self.offsets))
+    def __enter__(self):
+        return(self)
+    def __exit__(self, *args):
+        self.close()
+    def close(self):
+        self.file.close()
+    def record(self, index):
+        """Return tuple of key and value of record by position in file."""
+        offset, length = self.offsets[index]
+        self.file.seek(offset)
+        return(decode_paragraph(self.file.read(length)))
+    def paragraph(self, index):
+        """Return paragraph dict by position in file."""
+        return(self.record(index)[1])
+    def items(self):
+        """Iterate over keys and values in file order."""
+        for index in range(len(self)):
+            yield self.record(index)
+
+def shard_dir(file_path):
+    """Return directory of shards for transcript file, ``{transcript_name}.shards``."""
+    file_path = pathlib.Path(file_path)
+    return(file_path.with_name(file_path.stem + ".shards"))
+
+def is_manifest(json_document):
+    """Check if loaded JSON is a manifest of shards instead of a transcript dict."""
+    return(isinstance(json_document, dict) and isinstance(json_document.get("shards"), dict))
+
+def save_sharded(json_document, file_path, shard_size, first_dirty = 0):
+    """Save transcript dict as shards of ``shard_size`` paragraphs and a manifest.
+
+    Paragraph ``n`` is in shard ``n // shard_size``, saved as 
+    ``{shard_size}-{n // shard_size}.transcript``. Shards before the one 
+    holding ``first_dirty`` are only written if their file does not exist, 
+    and shard files not in the manifest are removed.
+
+    :param dict json_document: transcript dict of form ``{"par_number": {paragraph data}, ...}``
+    :param file_path: path to manifest, shards are saved in ``shard_dir(file_path)``
+    :param int shard_size: number of paragraphs in each shard
+    :param int first_dirty: first paragraph changed since the last save to ``file_path``
+    """
+    file_path = pathlib.Path(file_path)
+    shards = {}
+    for key, value in json_document.items():
+        shards.setdefault(int(key) // shard_size if key.isdigit() else 0, {})[key] = value
+    directory = shard_dir(file_path)
+    directory.mkdir(parents = True, exist_ok = True)
+    files = []
+    for index in range(max(shards, default = -1) + 1):
+        shard_path = directory / f"{shard_size}-{index:06d}.transcript"
+        files.append(shard_path.relative_to(file_path.parent).as_posix())
+        if index >= first_dirty // shard_size or not shard_path.exists():
+            save_json(shards.get(index, {}), shard_path)
+    listed = set(files)
+    for shard_path in directory.glob("*.transcript"):
+        if shard_path.relative_to(file_path.parent).as_posix() not in listed:
+            shard_path.unlink()
+    save_json({"shards": {"size": shard_size, "files": files}}, file_path)
+
+def load_sharded(file_path, manifest):
+    """Load transcript dict from shards listed in manifest.
+
+    :param file_path: path to manifest
+    :param dict manifest: loaded manifest
+    """
+    json_document = {}
+    for shard in manifest["shards"]["files"]:
+        with open(pathlib.Path(file_path).parent / shard, "r") as f:
+            json_document.update(json.loads(f.read()))
+    return(json_document)
+
+def load_transcript_file(file_path):
+    """Load transcript dict from JSON, binary container or shards, detected by file contents."""
+    if is_container(file_path):
+        return(load_container(file_path))
+    with open(file_path, "r") as f:
+        json_document = json.loads(f.read())
+    if is_manifest(json_document):
+        return(load_sharded(file_path, json_document))
+    return(json_document)
+
+def save_transcript_file(json_document, file_path, binary = False, shard_size = 0, first_dirty = 0):
+    """Save transcript dict as indented JSON, as binary container if ``binary``, 
+    or as shards if ``shard_size``, see ``save_sharded``."""
+    if shard_size:
+        save_sharded(json_document, file_path, shard_size, first_dirty)
+    elif binary:
+        save_container(json_document, file_path)
+    else:
+        save_json(json_document, file_path)
+
+def json_to_container(json_path, container_path):
+    """Convert JSON transcript file to binary container."""
+    with open(json_path, "r") as f:
+        save_container(json.loads(f.read()), container_path)
+
+def container_to_json(container_path, json_path):
+    """Convert binary container to JSON transcript file."""
+    save_json(load_container(container_path), json_path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description = "Convert transcript file between JSON and binary container.")
+    parser.add_argument("direction", choices = ["to_binary", "to_json"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+    if args.direction == "to_binary":
+        json_to_container(args.source, args.destination)
+    else:
+        container_to_json(args.source, args.destination)
@@ -0,0 +1,127 @@
+"""Commits of transcript files to the transcript ``dulwich`` repository."""
+import os
+import pathlib
+import threading
+from queue import Queue, Empty
+from dulwich import porcelain
+from dulwich.objects import Blob
+from dulwich.object_store import tree_lookup_path
+from dulwich.repo import Repo
+from plover import log
+
+AUTHOR = "plover2CAT <fake_email@fakedomain.com>"
+
+
+def restore_files(repo_path, commit_id, paths):
+    """Write files as they are in commit, skipping files that are already the same.
+
+    :param repo_path: path of repository
+    :param bytes commit_id: id of commit
+    :param list paths: paths of files relative to repository, with ``/`` separators
+    :return: list of paths that were written
+    """
+    written = []
+    with Repo(str(repo_path)) as repo:
+        tree = repo[commit_id].tree
+        for path in paths:
+            try:
+                mode, sha = tree_lookup_path(repo.__getitem__, tree, path.encode("utf-8"))
+            except KeyError:
+                continue
+            file_path = pathlib.Path(repo_path, path)
+            if file_path.exists() and Blob.from_string(file_path.read_bytes()).id == sha:
+                continue
+            file_path.parent.mkdir(parents = True, exist_ok = True)
+            file_path.write_bytes(repo[sha].data)
+            written.append(path)
+    return(written)
+
+
+class commit_worker:
+    """Commit files to ``dulwich`` repository on a separate thread.
+
+    Commits requested while an earlier one runs are made as one commit,
+    with their messages joined. Files with the same size and modification
+    time as when last committed are not added again, and no commit is made
+    if no file changed. Loose objects are packed every ``pack_interval`` commits.
+
+    :param repo_path: path of repository
+    :param int pack_interval: number of commits between packing objects
+    """
+    def __init__(self, repo_path, pack_interval = 50):
+        self.repo_path = str(repo_path)
+        self.pack_interval = pack_interval
+        self.commits = 0
+        # path: (size, modification time in ns) when last added, only used on worker thread
+        self.file_stats = {}
+        self.queue = Queue()
+        self.thread = threading.Thread(target = self.run, name = "plover2cat-commit", daemon = True)
+        self.thread.start()
+    def commit(self, files, message = "autosave"):
+        """Commit files that exist and changed.
+
+        :param list files: paths of files in repository
+        :param str message: commit message
+        """
+        self.queue.put(("commit", [str(f) for f in files], message))
+    def flush(self):
+        """Wait until requested commits are done."""
+        if not self.thread.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        done.wait()
+    def close(self):
+        """Make requested commits and stop thread."""
+        if not self.thread.is_alive():
+            return
+        self.queue.put(("stop",))
+        self.thread.join()
+    def run(self):
+        stop = False
+        while not stop:
+            requests = [self.queue.get()]
+            while True:
+                try:
+                    requests.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            files = {}
+            messages = []
+            for request in requests:
+                if request[0] == "commit":
+                    files.update(dict.fromkeys(request[1]))
+                    if request[2] not in messages:
+                        messages.append(request[2])
+            if messages:
+                try:
+                    self.commit_changed(list(files), "; ".join(messages))
+                except Exception as e:
+                    log.error(f"Commit to {self.repo_path} failed: {e}")
+            for request in requests:
+                if request[0] == "flush":
+                    request[1].set()
+                elif request[0] == "stop":
+                    stop = True
+    def commit_changed(self, files, message):
+        """Add changed files and commit, on worker thread."""
+        changed = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            file_stat = (stat.st_size, stat.st_mtime_ns)
+            if self.file_stats.get(path) != file_stat:
+                changed[path] = file_stat
+        if not changed:
+            log.debug(f"No changed files to commit: {message}")
+            return
+        porcelain.add(self.repo_path, paths = list(changed))
+        porcelain.commit(self.repo_path, message = message, author = AUTHOR, committer = AUTHOR)
+        self.file_stats.update(changed)
+        self.commits += 1
+        if self.commits % self.pack_interval == 0:
+            with Repo(self.repo_path) as repo:
+                repo.object_store.pack_loose_objects()
+            log.debug(f"Packed objects in {self.repo_path}.")